@@ -60,3 +60,14 @@ class OpenStackConfig(AppConfig):
             sender=Quota,
             dispatch_uid='openstack.handlers.log_tenant_quota_update',
         )
+
+        from celery import signals as celery_signals
+        celery_signals.task_prerun.connect(
+            handlers.reset_openstack_client_stats,
+            dispatch_uid='openstack.handlers.reset_openstack_client_stats',
+        )
+
+        celery_signals.task_postrun.connect(
+            handlers.log_openstack_client_stats,
+            dispatch_uid='openstack.handlers.log_openstack_client_stats',
+        )
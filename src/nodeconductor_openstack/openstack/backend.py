@@ -11,10 +11,12 @@ from neutronclient.client import exceptions as neutron_exceptions
 from novaclient import exceptions as nova_exceptions
 
 from nodeconductor.core.models import StateMixin
-from nodeconductor.structure import log_backend_action, SupportedServices
+from nodeconductor.structure import SupportedServices
 
 from nodeconductor_openstack.openstack_base.backend import (
-    OpenStackBackendError, BaseOpenStackBackend, update_pulled_fields)
+    OpenStackBackendError, BaseOpenStackBackend, log_backend_action, update_pulled_fields)
+from nodeconductor_openstack.openstack_base.utils import (
+    BulkReconciler, get_chunks, get_marker_pages, get_page_size, prefetch)
 from . import models
 
 logger = logging.getLogger(__name__)
@@ -73,8 +75,8 @@ class OpenStackBackend(BaseOpenStackBackend):
 
         logger.info('Deleted ssh public key %s from backend', key_name)
 
-    def _get_current_properties(self, model):
-        return {p.backend_id: p for p in model.objects.filter(settings=self.settings)}
+    def _get_property_reconciler(self, model):
+        return BulkReconciler(model.objects.filter(settings=self.settings), settings=self.settings)
 
     def _are_rules_equal(self, backend_rule, nc_rule):
         if backend_rule['from_port'] != nc_rule.from_port:
@@ -114,43 +116,36 @@ class OpenStackBackend(BaseOpenStackBackend):
             six.reraise(OpenStackBackendError, e)
 
         with transaction.atomic():
-            cur_flavors = self._get_current_properties(models.Flavor)
+            reconciler = self._get_property_reconciler(models.Flavor)
             for backend_flavor in flavors:
-                cur_flavors.pop(backend_flavor.id, None)
-                models.Flavor.objects.update_or_create(
-                    settings=self.settings,
-                    backend_id=backend_flavor.id,
-                    defaults={
-                        'name': backend_flavor.name,
-                        'cores': backend_flavor.vcpus,
-                        'ram': backend_flavor.ram,
-                        'disk': self.gb2mb(backend_flavor.disk),
-                    })
-
-            models.Flavor.objects.filter(backend_id__in=cur_flavors.keys()).delete()
+                reconciler.add(
+                    backend_flavor.id,
+                    name=backend_flavor.name,
+                    cores=backend_flavor.vcpus,
+                    ram=backend_flavor.ram,
+                    disk=self.gb2mb(backend_flavor.disk))
+            reconciler.apply()
 
     def _pull_images(self):
         glance = self.glance_client
         try:
-            images = glance.images.list()
+            images = [backend_image
+                      for backend_images in prefetch(get_chunks(glance.images.list(page_size=get_page_size())))
+                      for backend_image in backend_images
+                      if backend_image.is_public and not backend_image.deleted]
         except glance_exceptions.ClientException as e:
             six.reraise(OpenStackBackendError, e)
 
+        # Transaction is not kept open while images are downloaded.
         with transaction.atomic():
-            cur_images = self._get_current_properties(models.Image)
+            reconciler = self._get_property_reconciler(models.Image)
             for backend_image in images:
-                if backend_image.is_public and not backend_image.deleted:
-                    cur_images.pop(backend_image.id, None)
-                    models.Image.objects.update_or_create(
-                        settings=self.settings,
-                        backend_id=backend_image.id,
-                        defaults={
-                            'name': backend_image.name,
-                            'min_ram': backend_image.min_ram,
-                            'min_disk': self.gb2mb(backend_image.min_disk),
-                        })
-
-            models.Image.objects.filter(backend_id__in=cur_images.keys()).delete()
+                reconciler.add(
+                    backend_image.id,
+                    name=backend_image.name,
+                    min_ram=backend_image.min_ram,
+                    min_disk=self.gb2mb(backend_image.min_disk))
+            reconciler.apply()
 
     @log_backend_action('push quotas for tenant')
     def push_tenant_quotas(self, tenant, quotas):
@@ -605,16 +600,17 @@ class OpenStackBackend(BaseOpenStackBackend):
         nova = self.nova_client
 
         try:
-            servers = nova.servers.list()
+            # Only IDs are kept, so memory usage does not depend on full objects size.
+            server_ids = [server.id for page in get_marker_pages(nova.servers.list) for server in page]
         except nova_exceptions.ClientException as e:
             six.reraise(OpenStackBackendError, e)
 
-        for server in servers:
-            logger.info("Deleting instance %s from tenant %s", server.id, tenant.backend_id)
+        for server_id in server_ids:
+            logger.info("Deleting instance %s from tenant %s", server_id, tenant.backend_id)
             try:
-                server.delete()
+                nova.servers.delete(server_id)
             except nova_exceptions.NotFound:
-                logger.debug("Instance %s is already gone from tenant %s", server.id, tenant.backend_id)
+                logger.debug("Instance %s is already gone from tenant %s", server_id, tenant.backend_id)
             except nova_exceptions.ClientException as e:
                 six.reraise(OpenStackBackendError, e)
 
@@ -623,7 +619,7 @@ class OpenStackBackend(BaseOpenStackBackend):
         nova = self.nova_client
 
         try:
-            servers = nova.servers.list()
+            servers = nova.servers.list(limit=1)
         except nova_exceptions.ClientException as e:
             six.reraise(OpenStackBackendError, e)
         else:
@@ -634,16 +630,17 @@ class OpenStackBackend(BaseOpenStackBackend):
         cinder = self.cinder_client
 
         try:
-            snapshots = cinder.volume_snapshots.list()
+            # Only IDs are kept, so memory usage does not depend on full objects size.
+            snapshot_ids = [snapshot.id for page in get_marker_pages(cinder.volume_snapshots.list) for snapshot in page]
         except cinder_exceptions.ClientException as e:
             six.reraise(OpenStackBackendError, e)
 
-        for snapshot in snapshots:
-            logger.info("Deleting snapshot %s from tenant %s", snapshot.id, tenant.backend_id)
+        for snapshot_id in snapshot_ids:
+            logger.info("Deleting snapshot %s from tenant %s", snapshot_id, tenant.backend_id)
             try:
-                snapshot.delete()
+                cinder.volume_snapshots.delete(snapshot_id)
             except cinder_exceptions.NotFound:
-                logger.debug("Snapshot %s is already gone from tenant %s", snapshot.id, tenant.backend_id)
+                logger.debug("Snapshot %s is already gone from tenant %s", snapshot_id, tenant.backend_id)
             except cinder_exceptions.ClientException as e:
                 six.reraise(OpenStackBackendError, e)
 
@@ -652,7 +649,7 @@ class OpenStackBackend(BaseOpenStackBackend):
         cinder = self.cinder_client
 
         try:
-            snapshots = cinder.volume_snapshots.list()
+            snapshots = cinder.volume_snapshots.list(limit=1)
         except cinder_exceptions.ClientException as e:
             six.reraise(OpenStackBackendError, e)
         else:
@@ -663,16 +660,17 @@ class OpenStackBackend(BaseOpenStackBackend):
         cinder = self.cinder_client
 
         try:
-            volumes = cinder.volumes.list()
+            # Only IDs are kept, so memory usage does not depend on full objects size.
+            volume_ids = [volume.id for page in get_marker_pages(cinder.volumes.list) for volume in page]
         except cinder_exceptions.ClientException as e:
             six.reraise(OpenStackBackendError, e)
 
-        for volume in volumes:
-            logger.info("Deleting volume %s from tenant %s", volume.id, tenant.backend_id)
+        for volume_id in volume_ids:
+            logger.info("Deleting volume %s from tenant %s", volume_id, tenant.backend_id)
             try:
-                volume.delete()
+                cinder.volumes.delete(volume_id)
             except cinder_exceptions.NotFound:
-                logger.debug("Volume %s is already gone from tenant %s", volume.id, tenant.backend_id)
+                logger.debug("Volume %s is already gone from tenant %s", volume_id, tenant.backend_id)
             except cinder_exceptions.ClientException as e:
                 six.reraise(OpenStackBackendError, e)
 
@@ -681,7 +679,7 @@ class OpenStackBackend(BaseOpenStackBackend):
         cinder = self.cinder_client
 
         try:
-            volumes = cinder.volumes.list()
+            volumes = cinder.volumes.list(limit=1)
         except cinder_exceptions.ClientException as e:
             six.reraise(OpenStackBackendError, e)
         else:
@@ -87,6 +87,85 @@ class OpenStackExtension(NodeConductorExtension):
                 'ALLOCATION_POOL_END': '{first_octet}.{second_octet}.{third_octet}.200',
             },
             'DEFAULT_BLACKLISTED_USERNAMES': ['admin', 'service'],
+            # Authenticated clients are shared by all tasks of the worker process, at most MAX_SIZE
+            # least recently used clients are kept. HTTP connections are kept alive in pools,
+            # pool size could be configured for each service type of the catalog separately.
+            'SESSION_POOL': {
+                'ENABLED': True,
+                'MAX_SIZE': 200,
+                'POOL_CONNECTIONS': 10,
+                'POOL_MAXSIZE': 10,
+                'SERVICE_POOL_MAXSIZE': {
+                    'identity': 5,
+                    'compute': 10,
+                    'network': 10,
+                    'volumev2': 10,
+                    'image': 5,
+                    'metering': 5,
+                },
+            },
+            # Cached sessions are re-authenticated in background when they expire
+            # in less than SESSION_REFRESH_LEAD_TIME minutes. Refreshes are spread
+            # randomly within SESSION_REFRESH_JITTER seconds.
+            'SESSION_REFRESH_LEAD_TIME': 30,
+            'SESSION_REFRESH_JITTER': 300,
+            # Tenant quotas usage is read from Nova absolute limits, Cinder quota usage and
+            # Neutron quota details ("limits") or calculated by listing all tenant resources ("listing").
+            # "limits" strategy falls back to "listing" if these APIs are not available.
+            'QUOTA_USAGE_STRATEGY': 'limits',
+            # Large collections are listed page by page, so memory usage is bounded by page size.
+            'PAGE_SIZE': 500,
+            # Flavors are cached for all tenants of the same OpenStack deployment (in seconds).
+            'FLAVOR_CATALOG_TTL': 60 * 60,
+            # Public flavors and images are fetched once per OpenStack deployment
+            # and shared by all tenant settings for this period (in seconds).
+            'PUBLIC_CATALOG_TTL': 30 * 60,
+            # Tenant property sync is skipped if backend payload has not changed since the last sync.
+            # Fingerprints expire after this period (in seconds), so database is reconciled anyway.
+            'PROPERTY_FINGERPRINT_TTL': 24 * 60 * 60,
+            # Latency of OpenStack API calls and backend methods is aggregated per worker process
+            # and flushed to cache every FLUSH_INTERVAL seconds.
+            'METRICS': {
+                'ENABLED': True,
+                'FLUSH_INTERVAL': 60,
+                'TTL': 24 * 60 * 60,
+            },
+            # Periodic pulls of tenants and tenant resources are spread evenly over INTERVAL seconds
+            # (it should match celerybeat schedule of these tasks). At most MAX_CONCURRENT_PULLS_PER_BACKEND
+            # pulls are executed against the same backend URL at once, other pulls are applied again
+            # after SLOT_RETRY_DELAY seconds increased by random SLOT_RETRY_JITTER fraction up to
+            # SLOT_MAX_RETRIES times and are skipped till the next cycle otherwise.
+            # If ADAPTIVE is enabled, pull interval of tenant resources changes between MIN_INTERVAL
+            # and MAX_INTERVAL: it is halved after pull that applied changes, doubled after IDLE_CYCLES
+            # pulls without changes and set to MIN_INTERVAL for ACTION_BOOST_PERIOD after user action.
+            'PULL_SCHEDULE': {
+                'ENABLED': True,
+                'INTERVAL': 30 * 60,
+                'MAX_CONCURRENT_PULLS_PER_BACKEND': 4,
+                'SLOT_RETRY_DELAY': 30,
+                'SLOT_RETRY_JITTER': 0.5,
+                'SLOT_MAX_RETRIES': 2,
+                'SLOT_TIMEOUT': 60 * 60,
+                'ADAPTIVE': True,
+                'MIN_INTERVAL': 10 * 60,
+                'MAX_INTERVAL': 4 * 60 * 60,
+                'IDLE_CYCLES': 3,
+                'ACTION_BOOST_PERIOD': 60 * 60,
+            },
+            # Independent API calls (for example, quotas pull) are executed
+            # concurrently by bounded thread pool. Disable to execute them serially.
+            'CONCURRENCY': {
+                'ENABLED': True,
+                'MAX_WORKERS': 8,
+            },
+            # If I/O engine is enabled, concurrent read-only API calls of all tasks of worker process
+            # are executed by shared pool of MAX_CONCURRENT_REQUESTS threads, and runtime states of
+            # resources of all tenants are polled by single task. Number of connections per endpoint
+            # is still limited by SESSION_POOL settings.
+            'IO_ENGINE': {
+                'ENABLED': False,
+                'MAX_CONCURRENT_REQUESTS': 100,
+            },
         }
 
     @staticmethod
@@ -107,4 +186,9 @@ class OpenStackExtension(NodeConductorExtension):
                 'schedule': timedelta(minutes=30),
                 'args': (),
             },
+            'openstack-refresh-sessions': {
+                'task': 'openstack.RefreshSessionsTask',
+                'schedule': timedelta(minutes=10),
+                'args': (),
+            },
         }
@@ -8,6 +8,8 @@ from django.core.exceptions import ValidationError
 from nodeconductor.core import models as core_models, tasks as core_tasks, utils as core_utils
 from nodeconductor.structure import filters as structure_filters, models as structure_models
 
+from nodeconductor_openstack.openstack_base.backend import client_stats
+
 from .log import event_logger
 from .models import SecurityGroup, SecurityGroupRule, Tenant
 
@@ -110,3 +112,13 @@ def log_tenant_quota_update(sender, instance, created=False, **kwargs):
             'tenant': tenant,
             'limit': float(quota.limit),  # Prevent passing integer
         })
+
+
+def reset_openstack_client_stats(sender=None, **kwargs):
+    client_stats.reset()
+
+
+def log_openstack_client_stats(sender=None, task_id=None, **kwargs):
+    if client_stats.constructed or client_stats.reused:
+        logger.debug('Task %s (%s) constructed %s OpenStack clients, reused %s clients.',
+                     getattr(sender, 'name', sender), task_id, client_stats.constructed, client_stats.reused)
@@ -0,0 +1,33 @@
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from nodeconductor_openstack.openstack_base import metrics
+
+
+class Command(BaseCommand):
+    help_text = "Show latency of OpenStack API calls and backend methods aggregated over all worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=('api', 'backend'), help='Show only API calls or backend methods.')
+        parser.add_argument('--service', help='Filter by service type or backend class name.')
+        parser.add_argument('--service-settings', dest='service_settings', help='Filter by service settings UUID.')
+
+    def handle(self, *args, **options):
+        filters = {
+            'kind': options.get('kind'),
+            'service': options.get('service'),
+            'settings': options.get('service_settings'),
+        }
+        aggregates = sorted(metrics.registry.get_aggregates(**filters), key=lambda item: item['sum'], reverse=True)
+        if not aggregates:
+            self.stdout.write('There are no collected metrics.')
+            return
+
+        row_format = '{:<8} {:<24} {:<48} {:<32} {:>8} {:>12} {:>10} {:>10}'
+        self.stdout.write(row_format.format(
+            'Kind', 'Service', 'Operation', 'Settings', 'Count', 'Total, ms', 'Avg, ms', 'Max, ms'))
+        for item in aggregates:
+            self.stdout.write(row_format.format(
+                item['kind'], item['service'], item['operation'][:48], item['settings'],
+                item['count'], item['sum'], item['avg'], item['max']))
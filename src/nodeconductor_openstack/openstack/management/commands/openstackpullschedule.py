@@ -0,0 +1,57 @@
+from __future__ import unicode_literals
+
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from nodeconductor.structure import models as structure_models
+
+from nodeconductor_openstack.openstack import models
+from nodeconductor_openstack.openstack_base.scheduling import (
+    BackendSemaphore, get_upcoming_schedule, pull_tracker)
+
+
+class Command(BaseCommand):
+    help_text = "Show upcoming periodic pulls of tenants and tenant resources, " \
+                "adaptive pull intervals and usage of backend pull slots."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=50, help='Number of upcoming pulls to show.')
+
+    def handle(self, *args, **options):
+        ok_state = structure_models.ServiceSettings.States.OK
+        tenant_settings = structure_models.ServiceSettings.objects.filter(type='OpenStackTenant', state=ok_state)
+        tenants = models.Tenant.objects.filter(
+            state__in=[models.Tenant.States.OK, models.Tenant.States.ERRED]).exclude(backend_id='').select_related(
+            'service_project_link__service__settings')
+
+        now = time.time()
+        states = pull_tracker.get_states([settings.uuid.hex for settings in tenant_settings])
+        schedule = []
+        for settings in tenant_settings:
+            state = states[settings.uuid.hex]
+            next_pull_at = max(now, (state['last_pull_at'] or now) + state['interval'])
+            schedule.append((datetime.datetime.fromtimestamp(next_pull_at, timezone.utc), (
+                'Tenant resources', settings.name, settings.backend_url,
+                '%s min' % (state['interval'] // 60), ','.join(str(count) for count in state['changes']))))
+
+        tenant_items = [(tenant.uuid.hex, ('Tenant', tenant.name,
+                                           tenant.service_project_link.service.settings.backend_url, '', ''))
+                        for tenant in tenants]
+        schedule = sorted(schedule + get_upcoming_schedule(tenant_items, now), key=lambda item: item[0])
+        if not schedule:
+            self.stdout.write('There are no scheduled pulls.')
+            return
+
+        row_format = '{:<20} {:<18} {:<32} {:<10} {:<24} {}'
+        self.stdout.write(row_format.format('Start', 'Pull', 'Name', 'Interval', 'Recent changes', 'Backend URL'))
+        for start, (kind, name, backend_url, interval, changes) in schedule[:options['limit']]:
+            self.stdout.write(row_format.format(
+                start.strftime('%Y-%m-%d %H:%M:%S'), kind, name[:32], interval, changes[:24], backend_url))
+
+        self.stdout.write('\nRunning pulls per backend URL:')
+        for backend_url in sorted(set(item[2] for _, item in schedule)):
+            semaphore = BackendSemaphore(backend_url)
+            self.stdout.write('{} {}/{}'.format(backend_url, semaphore.get_usage(), semaphore.limit))
@@ -1,5 +1,7 @@
 from nodeconductor.core import tasks as core_tasks
 
+from nodeconductor_openstack.openstack_base.polling import get_poll_policy
+
 from .. import models
 
 
@@ -47,5 +49,6 @@ class PollBackendCheckTask(core_tasks.Task):
         # backend_check_method should return True if object does not exist at backend
         backend = self.get_backend(instance)
         if not getattr(backend, backend_check_method)(instance):
-            self.retry()
+            policy = get_poll_policy(instance.__class__, 'deleted')
+            self.retry(countdown=policy.get_delay(self.request.retries))
         return instance
@@ -1,10 +1,15 @@
+import datetime
 import logging
+import random
 
-from django.utils import six
+from django.conf import settings
+from django.utils import six, timezone
 
-from nodeconductor.structure import ServiceBackendError, tasks as structure_tasks
+from nodeconductor.core import tasks as core_tasks, utils as core_utils
+from nodeconductor.structure import ServiceBackendError, models as structure_models, tasks as structure_tasks
 
-from nodeconductor_openstack.openstack import models
+from nodeconductor_openstack.openstack import apps, models
+from nodeconductor_openstack.openstack_base.scheduling import backend_slot, get_countdown, retry_without_slot
 
 
 logger = logging.getLogger(__name__)
@@ -14,6 +19,17 @@ logger = logging.getLogger(__name__)
 #      We should pull all security groups, floating IPs and tenants at once.
 class TenantBackgroundPullTask(structure_tasks.BackgroundPullTask):
 
+    def run(self, serialized_tenant, slot_retries=0):
+        tenant = core_utils.deserialize_instance(serialized_tenant)
+        backend_url = tenant.service_project_link.service.settings.backend_url
+        with backend_slot(backend_url) as acquired:
+            if not acquired:
+                if not retry_without_slot(self, (serialized_tenant,), slot_retries):
+                    logger.info('Pull of tenant %s (PK: %s) is skipped, because too many pulls are running '
+                                'against %s.' % (tenant, tenant.pk, backend_url))
+                return
+            super(TenantBackgroundPullTask, self).run(serialized_tenant)
+
     def pull(self, tenant):
         backend = tenant.get_backend()
         backend.pull_tenant(tenant)
@@ -32,6 +48,76 @@ class TenantBackgroundPullTask(structure_tasks.BackgroundPullTask):
 
 
 class TenantListPullTask(structure_tasks.BackgroundListPullTask):
+    """ Schedule pull of each tenant at its stable offset within pull interval. """
     name = 'openstack.TenantListPullTask'
     model = models.Tenant
     pull_task = TenantBackgroundPullTask
+
+    def run(self):
+        for tenant in self.get_pulled_objects():
+            serialized_tenant = core_utils.serialize_instance(tenant)
+            self.pull_task().apply_async(args=(serialized_tenant,), countdown=get_countdown(tenant.uuid.hex))
+
+
+class RefreshSessionsTask(core_tasks.BackgroundTask):
+    """ Schedule re-authentication of cached sessions that are going to expire soon.
+
+        Refreshes are spread randomly within configured jitter interval
+        to avoid simultaneous requests to Keystone.
+    """
+    name = 'openstack.RefreshSessionsTask'
+    service_types = (apps.OpenStackConfig.service_name, 'OpenStackTenant')
+
+    def is_equal(self, other_task):
+        return self.name == other_task.get('name')
+
+    def run(self):
+        nc_settings = getattr(settings, 'NODECONDUCTOR_OPENSTACK', {})
+        lead_time = datetime.timedelta(minutes=nc_settings.get('SESSION_REFRESH_LEAD_TIME', 30))
+        jitter = nc_settings.get('SESSION_REFRESH_JITTER', 300)
+        threshold = timezone.now() + lead_time
+
+        for service_settings, tenant_id, admin in self.get_cached_sessions():
+            backend = self.get_backend(service_settings, tenant_id)
+            expires = backend.get_cached_session_expiration(admin)
+            if expires is not None and expires < threshold:
+                serialized_service_settings = core_utils.serialize_instance(service_settings)
+                RefreshSessionTask().apply_async(
+                    args=(serialized_service_settings, tenant_id, admin),
+                    countdown=random.randint(0, jitter))
+
+    def get_cached_sessions(self):
+        ok_state = structure_models.ServiceSettings.States.OK
+        for service_settings in structure_models.ServiceSettings.objects.filter(
+                type__in=self.service_types, state=ok_state):
+            yield service_settings, None, False
+            if service_settings.type == apps.OpenStackConfig.service_name:
+                yield service_settings, None, True
+
+        tenants = models.Tenant.objects.filter(state=models.Tenant.States.OK).exclude(backend_id='').select_related(
+            'service_project_link__service__settings')
+        for tenant in tenants:
+            yield tenant.service_project_link.service.settings, tenant.backend_id, False
+
+    @staticmethod
+    def get_backend(service_settings, tenant_id):
+        if tenant_id:
+            return service_settings.get_backend(tenant_id=tenant_id)
+        return service_settings.get_backend()
+
+
+class RefreshSessionTask(core_tasks.BackgroundTask):
+    name = 'openstack.RefreshSessionTask'
+
+    def is_equal(self, other_task, serialized_service_settings, tenant_id, admin):
+        return self.name == other_task.get('name') and \
+            [serialized_service_settings, tenant_id, admin] == list(other_task.get('args', []))
+
+    def run(self, serialized_service_settings, tenant_id, admin):
+        service_settings = core_utils.deserialize_instance(serialized_service_settings)
+        backend = RefreshSessionsTask.get_backend(service_settings, tenant_id)
+        try:
+            backend.refresh_cached_session(admin)
+        except ServiceBackendError as e:
+            logger.warning('Failed to refresh OpenStack session for service settings: %s (PK: %s). Error: %s' % (
+                service_settings, service_settings.pk, e))
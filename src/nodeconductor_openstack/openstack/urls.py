@@ -12,3 +12,4 @@ def register_in(router):
     router.register(r'openstack-floating-ips', views.FloatingIPViewSet, base_name='openstack-fip')
     router.register(r'openstack-networks', views.NetworkViewSet, base_name='openstack-network')
     router.register(r'openstack-subnets', views.SubNetViewSet, base_name='openstack-subnet')
+    router.register(r'openstack-metrics', views.MetricsViewSet, base_name='openstack-metrics')
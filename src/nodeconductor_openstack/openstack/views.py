@@ -11,6 +11,10 @@ from nodeconductor.structure import (
     filters as structure_filters, permissions as structure_permissions)
 from nodeconductor.structure.managers import filter_queryset_for_user
 
+from nodeconductor_openstack.openstack_base import metrics
+from nodeconductor_openstack.openstack_base.fingerprints import fingerprints
+from nodeconductor_openstack.openstack_base.polling import poll_stats
+
 from . import models, filters, serializers, executors
 
 
@@ -478,3 +482,31 @@ class SubNetViewSet(six.with_metaclass(structure_views.ResourceViewMetaclass, st
     update_executor = executors.SubNetUpdateExecutor
     delete_executor = executors.SubNetDeleteExecutor
     pull_executor = executors.SubNetPullExecutor
+
+
+class MetricsViewSet(viewsets.ViewSet):
+    """ Latency histograms of OpenStack API calls and backend methods aggregated over all worker processes.
+
+        Durations are in milliseconds. Results could be filtered by kind ("api" or "backend"),
+        service, operation and settings (UUID of service settings) query parameters.
+        Available for staff users only.
+    """
+    permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
+
+    def list(self, request):
+        filters = {name: request.query_params.get(name) for name in ('kind', 'service', 'operation', 'settings')}
+        return response.Response(metrics.registry.get_aggregates(**filters))
+
+    @decorators.list_route()
+    def property_syncs(self, request):
+        """ Number of property syncs that were skipped because backend payload has not changed
+            and number of syncs that were applied to database, grouped by property type.
+        """
+        return response.Response(fingerprints.get_stats())
+
+    @decorators.list_route()
+    def poll_policies(self, request):
+        """ Number of waits that succeeded and failed, average time in seconds and average number of polls
+            till resources have reached target state, grouped by poll policy.
+        """
+        return response.Response(poll_stats.get_stats())
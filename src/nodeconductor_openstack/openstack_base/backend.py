@@ -1,14 +1,22 @@
+import collections
 import datetime
+import functools
 import hashlib
 import pickle
 import six
 import logging
+import threading
+import time
 
+from multiprocessing.pool import ThreadPool
+
+from django.conf import settings as django_settings
 from django.core.cache import cache
 from django.utils import six, timezone
 from requests import ConnectionError
 
 from keystoneauth1.identity import v3
+from keystoneauth1 import exceptions as keystoneauth_exceptions
 from keystoneauth1 import session as keystone_session
 
 from ceilometerclient import client as ceilometer_client
@@ -25,9 +33,12 @@ from keystoneclient import exceptions as keystone_exceptions
 from neutronclient.client import exceptions as neutron_exceptions
 from novaclient import exceptions as nova_exceptions
 
-from nodeconductor.structure import ServiceBackend, ServiceBackendError
+from nodeconductor.structure import ServiceBackend, ServiceBackendError, log_backend_action as structure_log_backend_action
 
 from nodeconductor_openstack.openstack.models import Tenant
+from nodeconductor_openstack.openstack_base import metrics
+from nodeconductor_openstack.openstack_base.catalog import flavor_catalog
+from nodeconductor_openstack.openstack_base.engine import io_engine
 
 
 logger = logging.getLogger(__name__)
@@ -64,6 +75,28 @@ class OpenStackAuthorizationFailed(OpenStackBackendError):
     pass
 
 
+class OpenStackLimitsNotAvailable(OpenStackBackendError):
+    """ Absolute limits or quota details API is not supported by backend. """
+    pass
+
+
+def log_backend_action(action=None):
+    """ Log backend method execution and record its duration. """
+    def decorator(func):
+        logged_func = structure_log_backend_action(action)(func)
+
+        @functools.wraps(func)
+        def wrapped(self, instance, *args, **kwargs):
+            start = time.time()
+            try:
+                return logged_func(self, instance, *args, **kwargs)
+            finally:
+                metrics.registry.observe('backend', self.__class__.__name__, func.__name__,
+                                         self.settings.uuid.hex, (time.time() - start) * 1000)
+        return wrapped
+    return decorator
+
+
 def update_pulled_fields(instance, imported_instance, fields):
     """ Update instance fields based on imported from backend data.
 
@@ -82,6 +115,33 @@ def update_pulled_fields(instance, imported_instance, fields):
         instance.save()
 
 
+def set_pulled_fields(instance, imported_instance, fields):
+    """ Copy changed fields from imported instance without saving and return their names. """
+    changed_fields = []
+    for field in fields:
+        pulled_value = getattr(imported_instance, field)
+        if getattr(instance, field) != pulled_value:
+            setattr(instance, field, pulled_value)
+            changed_fields.append(field)
+    return changed_fields
+
+
+class InstrumentedKeystoneSession(keystone_session.Session):
+    """ Keystone session that records latency of each request made by any OpenStack client. """
+    metrics_label = None
+
+    def request(self, url, method, *args, **kwargs):
+        endpoint_filter = kwargs.get('endpoint_filter') or {}
+        # requests without endpoint filter are authentication requests
+        service = endpoint_filter.get('service_type') or 'identity'
+        start = time.time()
+        try:
+            return super(InstrumentedKeystoneSession, self).request(url, method, *args, **kwargs)
+        finally:
+            metrics.registry.observe('api', service, metrics.get_operation(method, url),
+                                     self.metrics_label, (time.time() - start) * 1000)
+
+
 class OpenStackSession(dict):
     """ Serializable session """
 
@@ -89,7 +149,7 @@ class OpenStackSession(dict):
         self.keystone_session = ks_session
         if not self.keystone_session:
             auth_plugin = v3.Password(**credentials)
-            self.keystone_session = keystone_session.Session(auth=auth_plugin, verify=verify_ssl)
+            self.keystone_session = InstrumentedKeystoneSession(auth=auth_plugin, verify=verify_ssl)
 
         try:
             # This will eagerly sign in throwing AuthorizationFailure on bad credentials
@@ -100,6 +160,31 @@ class OpenStackSession(dict):
         for opt in ('auth_ref', 'auth_url', 'project_id', 'project_name', 'project_domain_name'):
             self[opt] = getattr(self.auth, opt)
 
+        self._mount_connection_pools()
+
+    def _mount_connection_pools(self):
+        """ Mount keep-alive connection pools sized separately for each service endpoint.
+
+            Endpoints are taken from the service catalog that has been already
+            fetched during authentication, so no additional requests are made.
+        """
+        pool_settings = get_session_pool_settings()
+        http_session = self.keystone_session.session
+        # Keystone adapter is used, because it enables TCP keep-alive on connections.
+        default_adapter = keystone_session.TCPKeepAliveAdapter(
+            pool_connections=pool_settings['POOL_CONNECTIONS'], pool_maxsize=pool_settings['POOL_MAXSIZE'])
+        for prefix in ('https://', 'http://'):
+            http_session.mount(prefix, default_adapter)
+
+        for service_type, pool_maxsize in pool_settings['SERVICE_POOL_MAXSIZE'].items():
+            try:
+                endpoint = self.keystone_session.get_endpoint(service_type=service_type, interface='public')
+            except keystoneauth_exceptions.ClientException:
+                endpoint = None
+            if endpoint:
+                http_session.mount(
+                    endpoint, keystone_session.TCPKeepAliveAdapter(pool_connections=1, pool_maxsize=pool_maxsize))
+
     def __getattr__(self, name):
         return getattr(self.keystone_session, name)
 
@@ -118,7 +203,7 @@ class OpenStackSession(dict):
             args['project_name'] = session['project_name']
             args['project_domain_name'] = session['project_domain_name']
 
-        ks_session = keystone_session.Session(auth=v3.Token(**args), verify=verify_ssl)
+        ks_session = InstrumentedKeystoneSession(auth=v3.Token(**args), verify=verify_ssl)
         return cls(ks_session=ks_session)
 
     def validate(self):
@@ -131,11 +216,84 @@ class OpenStackSession(dict):
         return str({k: v if k != 'password' else '***' for k, v in self.items()})
 
 
+def get_session_pool_settings():
+    nc_settings = getattr(django_settings, 'NODECONDUCTOR_OPENSTACK', {})
+    pool_settings = {
+        'ENABLED': True,
+        'MAX_SIZE': 200,
+        'POOL_CONNECTIONS': 10,
+        'POOL_MAXSIZE': 10,
+        'SERVICE_POOL_MAXSIZE': {},
+    }
+    pool_settings.update(nc_settings.get('SESSION_POOL', {}))
+    return pool_settings
+
+
+def get_concurrency_settings():
+    nc_settings = getattr(django_settings, 'NODECONDUCTOR_OPENSTACK', {})
+    concurrency_settings = {
+        'ENABLED': True,
+        'MAX_WORKERS': 8,
+    }
+    concurrency_settings.update(nc_settings.get('CONCURRENCY', {}))
+    return concurrency_settings
+
+
+def fan_out(calls):
+    """ Execute independent backend calls concurrently and return their results.
+
+        Calls are passed as dictionary {name: callable}, results are returned as
+        dictionary {name: result}. Exception raised by any call is re-raised as is,
+        so callers could map client exceptions to OpenStackBackendError as usual.
+        If concurrency is disabled in settings calls are executed one by one.
+        If I/O engine is enabled calls are executed by its shared pool.
+    """
+    concurrency_settings = get_concurrency_settings()
+    max_workers = min(concurrency_settings['MAX_WORKERS'], len(calls))
+    if not concurrency_settings['ENABLED'] or max_workers <= 1:
+        return {name: call() for name, call in calls.items()}
+
+    if io_engine.is_enabled():
+        return io_engine.map(calls)
+
+    pool = ThreadPool(processes=max_workers)
+    try:
+        async_results = {name: pool.apply_async(call) for name, call in calls.items()}
+        return {name: async_result.get() for name, async_result in async_results.items()}
+    finally:
+        pool.terminate()
+
+
+class OpenStackClientStats(threading.local):
+    """ Per-thread counters of service clients construction.
+
+        Counters are reset before each Celery task, so they show how many
+        clients were built and how many constructions were avoided by the task.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.constructed = 0
+        self.reused = 0
+
+    def get_stats(self):
+        return {'constructed': self.constructed, 'reused': self.reused}
+
+
+client_stats = OpenStackClientStats()
+
+
 class OpenStackClient(object):
-    """ Generic OpenStack client. """
+    """ Generic OpenStack client.
+
+        Service clients are built lazily on first access and reused while session is not changed.
+    """
 
     def __init__(self, session=None, verify_ssl=False, **credentials):
         self.verify_ssl = verify_ssl
+        self._clients = {}
         if session:
             if isinstance(session, dict):
                 logger.debug('Trying to recover OpenStack session.')
@@ -150,14 +308,36 @@ class OpenStackClient(object):
                 logger.error('Failed to create OpenStack session.')
                 six.reraise(OpenStackBackendError, e)
 
+    @property
+    def session(self):
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        # service clients are bound to keystone session, so they should be rebuilt
+        self._session = session
+        self._clients = {}
+
+    def _get_client(self, name, factory):
+        try:
+            client = self._clients[name]
+        except KeyError:
+            client = self._clients[name] = factory()
+            client_stats.constructed += 1
+        else:
+            client_stats.reused += 1
+        return client
+
     @property
     def keystone(self):
-        return keystone_client.Client(session=self.session.keystone_session)
+        return self._get_client(
+            'keystone', lambda: keystone_client.Client(session=self.session.keystone_session))
 
     @property
     def nova(self):
         try:
-            return nova_client.Client(session=self.session.keystone_session)
+            return self._get_client(
+                'nova', lambda: nova_client.Client(session=self.session.keystone_session))
         except nova_exceptions.ClientException as e:
             logger.exception('Failed to create nova client: %s', e)
             six.reraise(OpenStackBackendError, e)
@@ -165,7 +345,8 @@ class OpenStackClient(object):
     @property
     def neutron(self):
         try:
-            return neutron_client.Client(session=self.session.keystone_session)
+            return self._get_client(
+                'neutron', lambda: neutron_client.Client(session=self.session.keystone_session))
         except neutron_exceptions.NeutronClientException as e:
             logger.exception('Failed to create neutron client: %s', e)
             six.reraise(OpenStackBackendError, e)
@@ -173,7 +354,8 @@ class OpenStackClient(object):
     @property
     def cinder(self):
         try:
-            return cinder_client.Client(session=self.session.keystone_session)
+            return self._get_client(
+                'cinder', lambda: cinder_client.Client(session=self.session.keystone_session))
         except cinder_exceptions.ClientException as e:
             logger.exception('Failed to create cinder client: %s', e)
             six.reraise(OpenStackBackendError, e)
@@ -181,7 +363,8 @@ class OpenStackClient(object):
     @property
     def glance(self):
         try:
-            return glance_client.Client(session=self.session.keystone_session)
+            return self._get_client(
+                'glance', lambda: glance_client.Client(session=self.session.keystone_session))
         except glance_exceptions.ClientException as e:
             logger.exception('Failed to create glance client: %s', e)
             six.reraise(OpenStackBackendError, e)
@@ -189,12 +372,99 @@ class OpenStackClient(object):
     @property
     def ceilometer(self):
         try:
-            return ceilometer_client.Client('2', session=self.session.keystone_session)
+            return self._get_client(
+                'ceilometer', lambda: ceilometer_client.Client('2', session=self.session.keystone_session))
         except ceilometer_exceptions.BaseException as e:
             logger.exception('Failed to create ceilometer client: %s', e)
             six.reraise(OpenStackBackendError, e)
 
 
+class OpenStackSessionPool(object):
+    """ Registry of long-lived OpenStack clients shared by all backends of the worker process.
+
+        Backend objects are created for almost every Celery task, so caching client
+        in the backend object only is not enough: each task would authenticate again
+        or recover session from cache and open new HTTP connections.
+        Pool is keyed by (service settings UUID, tenant ID, admin flag). At most MAX_SIZE
+        clients are kept, the least recently used client is evicted from the full pool.
+    """
+
+    def __init__(self):
+        self._clients = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+        self.evictions = 0
+
+    def get(self, key, session_key):
+        """ Return valid client or None if client should be (re)created.
+
+            session_key identifies settings credentials, client is dropped if they were changed.
+        """
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+        # Session is validated without lock, so it does not block other tasks.
+        cached_session_key, client = entry
+        is_valid = False
+        if cached_session_key == session_key:
+            try:
+                client.session.validate()
+            except OpenStackSessionExpired:
+                pass
+            else:
+                is_valid = True
+
+        with self._lock:
+            # Entry could be replaced by other task while it was validated.
+            is_current = self._clients.get(key) is entry
+            if is_current:
+                del self._clients[key]
+            if is_valid:
+                if is_current:
+                    self._clients[key] = entry
+                self.hits += 1
+                return client
+            self.reconnects += 1
+            return None
+
+    def put(self, key, session_key, client):
+        max_size = get_session_pool_settings()['MAX_SIZE']
+        with self._lock:
+            self._clients.pop(key, None)
+            self._clients[key] = (session_key, client)
+            while len(self._clients) > max_size:
+                # Connections of evicted client are not closed, it could be still used by backend object.
+                self._clients.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key):
+        with self._lock:
+            self._clients.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+            self.hits = self.misses = self.reconnects = self.evictions = 0
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'size': len(self._clients),
+                'hits': self.hits,
+                'misses': self.misses,
+                'reconnects': self.reconnects,
+                'evictions': self.evictions,
+            }
+
+
+session_pool = OpenStackSessionPool()
+
+
 class BaseOpenStackBackend(ServiceBackend):
 
     def __init__(self, settings, tenant_id=None):
@@ -207,7 +477,10 @@ class BaseOpenStackBackend(ServiceBackend):
         hashed_settings_key = hashlib.sha256(settings_key).hexdigest()
         return '%s_%s_%s' % (self.settings.uuid.hex, hashed_settings_key, key)
 
-    def get_client(self, name=None, admin=False):
+    def _get_session_pool_key(self, admin):
+        return self.settings.uuid.hex, self.tenant_id, admin
+
+    def _get_credentials(self):
         domain_name = self.settings.domain or 'Default'
         credentials = {
             'auth_url': self.settings.backend_url,
@@ -220,6 +493,10 @@ class BaseOpenStackBackend(ServiceBackend):
         else:
             credentials['project_domain_name'] = domain_name
             credentials['project_name'] = self.settings.get_option('tenant_name')
+        return credentials
+
+    def get_client(self, name=None, admin=False):
+        credentials = self._get_credentials()
 
         # Skip cache if service settings do no exist
         if not self.settings.uuid:
@@ -228,25 +505,57 @@ class BaseOpenStackBackend(ServiceBackend):
         client = None
         attr_name = 'admin_session' if admin else 'session'
         key = self._get_cached_session_key(admin)
+        use_pool = get_session_pool_settings()['ENABLED']
+        pool_key = self._get_session_pool_key(admin)
         if hasattr(self, attr_name):  # try to get client from object
             client = getattr(self, attr_name)
-        elif key in cache:  # try to get session from cache
-            session = cache.get(key)
-            try:
-                client = OpenStackClient(session=session)
-            except (OpenStackSessionExpired, OpenStackAuthorizationFailed):
-                pass
+        else:
+            if use_pool:  # try to get client from process-wide pool
+                client = session_pool.get(pool_key, key)
+            if client is None and key in cache:  # try to get session from cache
+                session = cache.get(key)
+                try:
+                    client = OpenStackClient(session=session)
+                except (OpenStackSessionExpired, OpenStackAuthorizationFailed):
+                    pass
+            if client is not None:
+                setattr(self, attr_name, client)
 
         if client is None:  # create new token if session is not cached or expired
             client = OpenStackClient(**credentials)
             setattr(self, attr_name, client)  # Cache client in the object
             cache.set(key, dict(client.session), 24 * 60 * 60)  # Add session to cache
 
+        if use_pool:
+            session_pool.put(pool_key, key, client)
+        client.session.keystone_session.metrics_label = self.settings.uuid.hex
+
         if name:
             return getattr(client, name)
         else:
             return client
 
+    def get_cached_session_expiration(self, admin=False):
+        """ Return expiration time of session stored in cache or None if there is no cached session. """
+        session = cache.get(self._get_cached_session_key(admin))
+        if not isinstance(session, dict) or not session.get('auth_ref'):
+            return None
+        return session['auth_ref'].expires
+
+    def refresh_cached_session(self, admin=False):
+        """ Re-authenticate and replace cached session before it is treated as expired.
+
+            So tasks that use cached session will never wait for new token.
+        """
+        key = self._get_cached_session_key(admin)
+        client = OpenStackClient(**self._get_credentials())
+        setattr(self, 'admin_session' if admin else 'session', client)
+        cache.set(key, dict(client.session), 24 * 60 * 60)
+        if get_session_pool_settings()['ENABLED']:
+            session_pool.put(self._get_session_pool_key(admin), key, client)
+        client.session.keystone_session.metrics_label = self.settings.uuid.hex
+        return client
+
     def __getattr__(self, name):
         clients = 'keystone', 'nova', 'neutron', 'cinder', 'glance', 'ceilometer'
         for client in clients:
@@ -277,15 +586,27 @@ class BaseOpenStackBackend(ServiceBackend):
         else:
             return True
 
+    def get_flavors(self, flavor_ids):
+        """ Get flavors from catalog shared by all tenants of the deployment.
+
+            Flavors that are missing in catalog are requested from nova one by one.
+        """
+        return flavor_catalog.get_flavors(self.settings.backend_url, self.nova_client, flavor_ids)
+
     def get_tenant_quotas_limits(self, tenant_backend_id):
         nova = self.nova_client
         neutron = self.neutron_client
         cinder = self.cinder_client
 
         try:
-            nova_quotas = nova.quotas.get(tenant_id=tenant_backend_id)
-            cinder_quotas = cinder.quotas.get(tenant_id=tenant_backend_id)
-            neutron_quotas = neutron.show_quota(tenant_id=tenant_backend_id)['quota']
+            results = fan_out({
+                'nova_quotas': lambda: nova.quotas.get(tenant_id=tenant_backend_id),
+                'cinder_quotas': lambda: cinder.quotas.get(tenant_id=tenant_backend_id),
+                'neutron_quotas': lambda: neutron.show_quota(tenant_id=tenant_backend_id)['quota'],
+            })
+            nova_quotas = results['nova_quotas']
+            cinder_quotas = results['cinder_quotas']
+            neutron_quotas = results['neutron_quotas']
         except (nova_exceptions.ClientException,
                 cinder_exceptions.ClientException,
                 neutron_exceptions.NeutronClientException) as e:
@@ -306,30 +627,89 @@ class BaseOpenStackBackend(ServiceBackend):
         }
 
     def get_tenant_quotas_usage(self, tenant_backend_id):
+        """ Get tenant quotas usage using strategy configured in settings.
+
+            "limits" strategy reads usage counted by OpenStack services, so its cost
+            does not depend on tenant size. If some of these APIs are not available
+            usage is calculated by listing all tenant resources. Other errors, for example,
+            authorization or connection failures, are re-raised without fallback.
+        """
+        nc_settings = getattr(django_settings, 'NODECONDUCTOR_OPENSTACK', {})
+        if nc_settings.get('QUOTA_USAGE_STRATEGY', 'limits') == 'limits':
+            try:
+                return self._get_tenant_quotas_usage_from_limits(tenant_backend_id)
+            except (OpenStackLimitsNotAvailable, KeyError, TypeError) as e:
+                logger.warning('Failed to get quotas usage of tenant %s from absolute limits, '
+                               'falling back to resources listing. Error: %s', tenant_backend_id, e)
+        return self._get_tenant_quotas_usage_from_listing(tenant_backend_id)
+
+    def _get_tenant_quotas_usage_from_limits(self, tenant_backend_id):
         nova = self.nova_client
         neutron = self.neutron_client
         cinder = self.cinder_client
         try:
-            volumes = cinder.volumes.list()
-            snapshots = cinder.volume_snapshots.list()
-            instances = nova.servers.list()
-            security_groups = nova.security_groups.list()
-            floating_ips = neutron.list_floatingips(tenant_id=tenant_backend_id)['floatingips']
-            networks = neutron.list_networks(tenant_id=tenant_backend_id)['networks']
-            subnets = neutron.list_subnets(tenant_id=tenant_backend_id)['subnets']
+            results = fan_out({
+                'nova_limits': lambda: {limit.name: limit.value
+                                        for limit in nova.limits.get(tenant_id=tenant_backend_id).absolute},
+                'cinder_quotas': lambda: cinder.quotas.get(tenant_backend_id, usage=True),
+                'neutron_quotas': lambda: neutron.get('/quotas/%s/details' % tenant_backend_id)['quota'],
+            })
+        except (nova_exceptions.ClientException, cinder_exceptions.ClientException) as e:
+            if e.code in (400, 404):
+                six.reraise(OpenStackLimitsNotAvailable, e)
+            six.reraise(OpenStackBackendError, e)
+        except neutron_exceptions.NeutronClientException as e:
+            if e.status_code in (400, 404):
+                six.reraise(OpenStackLimitsNotAvailable, e)
+            six.reraise(OpenStackBackendError, e)
 
-            flavors = {flavor.id: flavor for flavor in nova.flavors.list()}
+        nova_limits = results['nova_limits']
+        cinder_quotas = results['cinder_quotas']
+        neutron_quotas = results['neutron_quotas']
+        return {
+            Tenant.Quotas.ram: nova_limits['totalRAMUsed'],
+            Tenant.Quotas.vcpu: nova_limits['totalCoresUsed'],
+            Tenant.Quotas.storage: self.gb2mb(cinder_quotas.gigabytes['in_use']),
+            Tenant.Quotas.volumes: cinder_quotas.volumes['in_use'],
+            Tenant.Quotas.snapshots: cinder_quotas.snapshots['in_use'],
+            Tenant.Quotas.instances: nova_limits['totalInstancesUsed'],
+            Tenant.Quotas.security_group_count: neutron_quotas['security_group']['used'],
+            Tenant.Quotas.security_group_rule_count: neutron_quotas['security_group_rule']['used'],
+            Tenant.Quotas.floating_ip_count: neutron_quotas['floatingip']['used'],
+            Tenant.Quotas.network_count: neutron_quotas['network']['used'],
+            Tenant.Quotas.subnet_count: neutron_quotas['subnet']['used'],
+        }
 
-            ram, vcpu = 0, 0
-            for flavor_id in (instance.flavor['id'] for instance in instances):
-                try:
-                    flavor = flavors.get(flavor_id, nova.flavors.get(flavor_id))
-                except nova_exceptions.NotFound:
-                    logger.warning('Cannot find flavor with id %s', flavor_id)
-                    continue
+    def _get_tenant_quotas_usage_from_listing(self, tenant_backend_id):
+        nova = self.nova_client
+        neutron = self.neutron_client
+        cinder = self.cinder_client
+        try:
+            results = fan_out({
+                'volumes': lambda: cinder.volumes.list(),
+                'snapshots': lambda: cinder.volume_snapshots.list(),
+                'instances': lambda: nova.servers.list(),
+                'security_groups': lambda: nova.security_groups.list(),
+                'floating_ips': lambda: neutron.list_floatingips(tenant_id=tenant_backend_id)['floatingips'],
+                'networks': lambda: neutron.list_networks(tenant_id=tenant_backend_id)['networks'],
+                'subnets': lambda: neutron.list_subnets(tenant_id=tenant_backend_id)['subnets'],
+            })
+            volumes = results['volumes']
+            snapshots = results['snapshots']
+            instances = results['instances']
+            security_groups = results['security_groups']
+            floating_ips = results['floating_ips']
+            networks = results['networks']
+            subnets = results['subnets']
+
+            flavor_ids = [instance.flavor['id'] for instance in instances]
+            flavors = self.get_flavors(flavor_ids)
 
-                ram += getattr(flavor, 'ram', 0)
-                vcpu += getattr(flavor, 'vcpus', 0)
+            ram, vcpu = 0, 0
+            for flavor_id in flavor_ids:
+                if flavor_id in flavors:
+                    ram += flavors[flavor_id].ram
+                    vcpu += flavors[flavor_id].vcpus
 
         except (nova_exceptions.ClientException,
                 cinder_exceptions.ClientException,
@@ -343,7 +723,7 @@ class BaseOpenStackBackend(ServiceBackend):
             Tenant.Quotas.snapshots: len(snapshots),
             Tenant.Quotas.instances: len(instances),
             Tenant.Quotas.security_group_count: len(security_groups),
-            Tenant.Quotas.security_group_rule_count: len(sum([sg.rules for sg in security_groups], [])),
+            Tenant.Quotas.security_group_rule_count: sum(len(sg.rules) for sg in security_groups),
             Tenant.Quotas.floating_ip_count: len(floating_ips),
             Tenant.Quotas.network_count: len(networks),
             Tenant.Quotas.subnet_count: len(subnets),
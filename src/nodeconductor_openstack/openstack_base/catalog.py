@@ -0,0 +1,148 @@
+""" Caches of OpenStack catalog objects that are shared between all tenants of the same deployment. """
+import collections
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from novaclient import exceptions as nova_exceptions
+
+
+logger = logging.getLogger(__name__)
+
+
+CachedFlavor = collections.namedtuple('CachedFlavor', ('id', 'name', 'ram', 'vcpus', 'disk'))
+
+
+def get_catalog_ttl():
+    nc_settings = getattr(settings, 'NODECONDUCTOR_OPENSTACK', {})
+    return nc_settings.get('FLAVOR_CATALOG_TTL', 60 * 60)
+
+
+def get_public_catalog_ttl():
+    nc_settings = getattr(settings, 'NODECONDUCTOR_OPENSTACK', {})
+    return nc_settings.get('PUBLIC_CATALOG_TTL', 30 * 60)
+
+
+class FlavorCatalog(object):
+    """ Cache of nova flavors keyed by backend URL and flavor ID.
+
+        Flavor IDs are unique within OpenStack deployment, so flavors that are
+        fetched for one tenant are reused by all other tenants of the same cloud.
+        Only flavors that are missing in cache are requested from nova.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_key(self, backend_url, flavor_id):
+        hashed_url = hashlib.sha256(str(backend_url)).hexdigest()
+        return 'OPENSTACK_FLAVOR_%s_%s' % (hashed_url, flavor_id)
+
+    def get_flavors(self, backend_url, nova, flavor_ids):
+        """ Return dictionary {flavor_id: CachedFlavor}. Flavors that do not exist in nova are skipped. """
+        keys = {flavor_id: self._get_key(backend_url, flavor_id) for flavor_id in set(flavor_ids)}
+        cached = cache.get_many(keys.values())
+
+        flavors = {}
+        fetched = {}
+        for flavor_id, key in keys.items():
+            if key in cached:
+                flavors[flavor_id] = cached[key]
+                continue
+            try:
+                backend_flavor = nova.flavors.get(flavor_id)
+            except nova_exceptions.NotFound:
+                logger.warning('Cannot find flavor with id %s', flavor_id)
+                continue
+            flavor = CachedFlavor(
+                id=backend_flavor.id,
+                name=backend_flavor.name,
+                ram=backend_flavor.ram,
+                vcpus=backend_flavor.vcpus,
+                disk=backend_flavor.disk,
+            )
+            flavors[flavor_id] = fetched[key] = flavor
+
+        if fetched:
+            cache.set_many(fetched, get_catalog_ttl())
+
+        with self._lock:
+            self.hits += len(cached)
+            self.misses += len(keys) - len(cached)
+        return flavors
+
+    def get_stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': float(self.hits) / total if total else 0.0,
+            }
+
+
+flavor_catalog = FlavorCatalog()
+
+
+class PublicCatalog(object):
+    """ Snapshots of public flavors and images keyed by backend URL.
+
+        Public catalog is the same for all tenants of OpenStack deployment, so it is
+        fetched once per TTL and each tenant settings are reconciled from the snapshot.
+        While one worker fetches the snapshot others use the previous one instead of fetching
+        it again. Workers do not wait for the snapshot: if there is no previous snapshot yet,
+        it is fetched directly.
+    """
+    lock_timeout = 5 * 60
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_key(self, backend_url, name):
+        hashed_url = hashlib.sha256(str(backend_url)).hexdigest()
+        return 'OPENSTACK_PUBLIC_CATALOG_%s_%s' % (hashed_url, name)
+
+    def get_snapshot(self, backend_url, name, fetch):
+        """ Return cached snapshot or store result of fetch callable as a new snapshot. """
+        key = self._get_key(backend_url, name)
+        snapshot = cache.get(key)
+        is_locked = False
+        if snapshot is None:
+            is_locked = cache.add(key + '_LOCK', True, self.lock_timeout)
+            if not is_locked:
+                # Other worker fetches the snapshot.
+                snapshot = cache.get(key + '_PREVIOUS')
+
+        with self._lock:
+            if snapshot is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if snapshot is not None:
+            return snapshot
+
+        try:
+            snapshot = fetch()
+            cache.set(key, snapshot, get_public_catalog_ttl())
+            cache.set(key + '_PREVIOUS', snapshot, None)
+        finally:
+            # Lock of other worker is kept, it is still fetching the snapshot.
+            if is_locked:
+                cache.delete(key + '_LOCK')
+        return snapshot
+
+    def invalidate(self, backend_url, name):
+        cache.delete(self._get_key(backend_url, name))
+
+    def get_stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+public_catalog = PublicCatalog()
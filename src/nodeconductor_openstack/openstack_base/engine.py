@@ -0,0 +1,93 @@
+""" Process-wide engine that executes blocking OpenStack requests concurrently.
+
+    By default each backend call is executed in the task thread, concurrent calls
+    are executed by short-lived thread pool of fan_out. If engine is enabled, calls are
+    executed by long-lived pool shared by all tasks of the worker process, so one worker
+    keeps many outstanding requests to OpenStack across many tenants. Clients are taken
+    from session pool, so requests reuse Keystone tokens and keep-alive connections.
+    Size of connection pools (SESSION_POOL settings) limits concurrent requests per endpoint.
+
+    Only network-bound read-only calls should be executed by engine, database is updated
+    by the calling thread.
+"""
+import os
+import sys
+import threading
+from multiprocessing.pool import ThreadPool
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import six
+
+
+def get_engine_settings():
+    nc_settings = getattr(settings, 'NODECONDUCTOR_OPENSTACK', {})
+    engine_settings = {
+        'ENABLED': False,
+        'MAX_CONCURRENT_REQUESTS': 100,
+    }
+    engine_settings.update(nc_settings.get('IO_ENGINE', {}))
+    return engine_settings
+
+
+class IOEngine(object):
+
+    def __init__(self):
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def is_enabled(self):
+        return get_engine_settings()['ENABLED']
+
+    def _get_pool(self):
+        # Pool is created lazily in each worker process, threads are not inherited by forked processes.
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ThreadPool(processes=get_engine_settings()['MAX_CONCURRENT_REQUESTS'])
+                self._pid = os.getpid()
+            return self._pool
+
+    def _run(self, call):
+        self._local.is_engine_thread = True
+        try:
+            return call(), None
+        except Exception:
+            return None, sys.exc_info()
+        finally:
+            # Engine threads live long, so connections that could be opened by calls should not leak.
+            close_old_connections()
+
+    def map(self, calls, return_exceptions=False):
+        """ Execute calls {name: callable} and return results {name: result}.
+
+            If return_exceptions is True, exception raised by call is returned as its result,
+            otherwise the first exception is re-raised. Calls are executed one by one if engine
+            is disabled or if map is called from engine thread, because nested calls could wait
+            for each other forever if all engine threads are busy.
+        """
+        if not self.is_enabled() or getattr(self._local, 'is_engine_thread', False):
+            outcomes = {}
+            for name, call in calls.items():
+                try:
+                    outcomes[name] = call(), None
+                except Exception:
+                    outcomes[name] = None, sys.exc_info()
+        else:
+            pool = self._get_pool()
+            async_results = {name: pool.apply_async(self._run, (call,)) for name, call in calls.items()}
+            outcomes = {name: async_result.get() for name, async_result in async_results.items()}
+
+        results = {}
+        for name, (result, exc_info) in outcomes.items():
+            if exc_info is None:
+                results[name] = result
+            elif return_exceptions:
+                results[name] = exc_info[1]
+            else:
+                six.reraise(*exc_info)
+        return results
+
+
+io_engine = IOEngine()
@@ -0,0 +1,67 @@
+""" Fingerprints of normalized backend payloads that allow to skip unchanged property syncs.
+
+    Fingerprint of the last successfully applied payload is stored in cache per
+    service settings and property type. Counters of skipped and applied syncs are
+    stored in cache too, so they are aggregated over all worker processes.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+STATS_KEY_PREFIX = 'openstack_fingerprint_stats'
+STATS_INDEX_KEY = 'openstack_fingerprint_stats_index'
+
+
+def get_fingerprint_ttl():
+    nc_settings = getattr(settings, 'NODECONDUCTOR_OPENSTACK', {})
+    return nc_settings.get('PROPERTY_FINGERPRINT_TTL', 24 * 60 * 60)
+
+
+def get_fingerprint(payload):
+    """ Return hash of JSON-serializable payload that does not depend on dictionaries order. """
+    serialized = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+class FingerprintStore(object):
+
+    def _get_key(self, service_settings, name):
+        return 'openstack_fingerprint_%s_%s' % (service_settings.uuid.hex, name)
+
+    def _get_stats_key(self, name, result):
+        return '%s_%s_%s' % (STATS_KEY_PREFIX, name, result)
+
+    def is_unchanged(self, service_settings, name, fingerprint):
+        return cache.get(self._get_key(service_settings, name)) == fingerprint
+
+    def save(self, service_settings, name, fingerprint):
+        cache.set(self._get_key(service_settings, name), fingerprint, get_fingerprint_ttl())
+
+    def record(self, name, skipped):
+        index = cache.get(STATS_INDEX_KEY) or set()
+        if name not in index:
+            index.add(name)
+            cache.set(STATS_INDEX_KEY, index, None)
+
+        key = self._get_stats_key(name, 'skipped' if skipped else 'applied')
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # key has been evicted between add and incr
+            cache.set(key, 1, None)
+
+    def get_stats(self):
+        """ Return dictionary {property type: {'skipped': count, 'applied': count}}. """
+        names = cache.get(STATS_INDEX_KEY) or set()
+        keys = {(name, result): self._get_stats_key(name, result)
+                for name in names for result in ('skipped', 'applied')}
+        values = cache.get_many(keys.values())
+        return {name: {result: values.get(keys[name, result], 0) for result in ('skipped', 'applied')}
+                for name in names}
+
+
+fingerprints = FingerprintStore()
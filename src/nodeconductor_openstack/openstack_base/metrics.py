@@ -0,0 +1,151 @@
+""" Latency histograms of OpenStack API calls and backend methods.
+
+    Each worker process aggregates timings in memory and periodically flushes
+    its snapshot to cache, so aggregates of all processes could be read
+    by REST endpoint or management command.
+"""
+import os
+import re
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)  # milliseconds
+INDEX_KEY = 'openstack_metrics_index'
+ID_PATTERN = re.compile(r'^([0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}|[0-9a-f]{32}|\d+)$')
+
+
+def get_metrics_settings():
+    nc_settings = getattr(settings, 'NODECONDUCTOR_OPENSTACK', {})
+    metrics_settings = {
+        'ENABLED': True,
+        'FLUSH_INTERVAL': 60,
+        'TTL': 24 * 60 * 60,
+    }
+    metrics_settings.update(nc_settings.get('METRICS', {}))
+    return metrics_settings
+
+
+def get_operation(method, url):
+    """ Convert request to operation name, for example: "GET /servers/{id}". """
+    path = url.split('?', 1)[0]
+    if '://' in path:
+        path = '/' + path.split('://', 1)[1].split('/', 1)[-1]
+    segments = []
+    for segment in path.split('/'):
+        name, _, extension = segment.partition('.')
+        if ID_PATTERN.match(name):
+            segment = '{id}' + ('.' + extension if extension else '')
+        segments.append(segment)
+    return '%s %s' % (method.upper(), '/'.join(segments))
+
+
+class Histogram(object):
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, duration):
+        self.count += 1
+        self.sum += duration
+        self.max = max(self.max, duration)
+        for index, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                self.buckets[index] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def to_dict(self):
+        bounds = [str(bound) for bound in BUCKETS] + ['+Inf']
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'avg': round(self.sum / self.count, 3) if self.count else 0,
+            'max': round(self.max, 3),
+            'buckets': dict(zip(bounds, self.buckets)),
+        }
+
+
+class MetricsRegistry(object):
+    """ Per-process registry of histograms labelled by kind, service, operation and settings. """
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.time()
+        self.process_key = 'openstack_metrics_%s_%s' % (socket.gethostname(), os.getpid())
+
+    def observe(self, kind, service, operation, settings_uuid, duration):
+        metrics_settings = get_metrics_settings()
+        if not metrics_settings['ENABLED']:
+            return
+
+        key = (kind, service or 'unknown', operation, settings_uuid or '')
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(duration)
+            flush_required = time.time() - self._last_flush > metrics_settings['FLUSH_INTERVAL']
+
+        if flush_required:
+            self.flush()
+
+    def flush(self):
+        """ Store snapshot of the process histograms in cache. """
+        with self._lock:
+            self._last_flush = time.time()
+            snapshot = {key: histogram.__dict__.copy() for key, histogram in self._histograms.items()}
+
+        ttl = get_metrics_settings()['TTL']
+        cache.set(self.process_key, snapshot, ttl)
+        index = cache.get(INDEX_KEY) or set()
+        if self.process_key not in index:
+            index.add(self.process_key)
+            cache.set(INDEX_KEY, index, ttl)
+
+    def clear(self):
+        with self._lock:
+            self._histograms = {}
+
+    def get_aggregates(self, **filters):
+        """ Merge snapshots of all processes and return them as list of dictionaries. """
+        self.flush()
+        index = cache.get(INDEX_KEY) or set()
+        snapshots = cache.get_many(list(index))
+
+        aggregates = {}
+        for snapshot in snapshots.values():
+            for key, data in snapshot.items():
+                histogram = Histogram()
+                histogram.__dict__.update(data)
+                if key in aggregates:
+                    aggregates[key].merge(histogram)
+                else:
+                    aggregates[key] = histogram
+
+        result = []
+        for (kind, service, operation, settings_uuid), histogram in sorted(aggregates.items()):
+            item = dict(kind=kind, service=service, operation=operation, settings=settings_uuid)
+            if any(filters.get(name) and item[name] != filters[name] for name in item):
+                continue
+            item.update(histogram.to_dict())
+            result.append(item)
+        return result
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,128 @@
+""" Backoff policies of polling resources until they reach target state.
+
+    Policy is selected by model name (for example, "OpenStackTenant.Volume") and
+    target state (runtime state or "deleted"). Delay between polls starts from
+    INITIAL_DELAY, grows by FACTOR after each poll up to MAX_DELAY and is randomized
+    by JITTER, so simultaneously started polls do not hit backend together.
+
+    Observed convergence times and numbers of polls are stored in cache per policy,
+    so they are aggregated over all worker processes.
+"""
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+
+from nodeconductor.structure import SupportedServices
+
+
+STATS_KEY_PREFIX = 'openstack_poll_stats'
+STATS_INDEX_KEY = 'openstack_poll_stats_index'
+STATS_COUNTERS = ('succeeded', 'failed', 'polls', 'seconds')
+
+DEFAULT_POLICIES = {
+    'DEFAULT': {
+        'INITIAL_DELAY': 5,
+        'FACTOR': 1.5,
+        'JITTER': 0.2,
+        'MAX_DELAY': 30,
+    },
+    'OpenStackTenant.Volume:available': {'INITIAL_DELAY': 3, 'MAX_DELAY': 15},
+    'OpenStackTenant.Snapshot:available': {'INITIAL_DELAY': 5, 'MAX_DELAY': 20},
+    'OpenStackTenant.FloatingIP:ACTIVE': {'INITIAL_DELAY': 2, 'MAX_DELAY': 10},
+    'OpenStackTenant.Instance:ACTIVE': {'INITIAL_DELAY': 10, 'MAX_DELAY': 30},
+    'OpenStackTenant.Instance:VERIFY_RESIZE': {'INITIAL_DELAY': 30, 'MAX_DELAY': 60},
+}
+
+
+def get_policy_key(model, target_state):
+    model_name = SupportedServices.get_name_for_model(model)
+    if '.' not in model_name:
+        # Service properties, for example, floating IPs, are not registered as resources.
+        model_name = '%s.%s' % (model_name, model.__name__)
+    return '%s:%s' % (model_name, target_state)
+
+
+class PollPolicy(object):
+
+    def __init__(self, key, initial_delay, factor, jitter, max_delay):
+        self.key = key
+        self.initial_delay = initial_delay
+        self.factor = factor
+        self.jitter = jitter
+        self.max_delay = max_delay
+
+    def get_delay(self, attempt):
+        """ Return delay in seconds before poll with given number, first poll has number 0. """
+        delay = min(self.max_delay, self.initial_delay * self.factor ** attempt)
+        return max(0, delay * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def to_dict(self):
+        return {
+            'initial_delay': self.initial_delay,
+            'factor': self.factor,
+            'jitter': self.jitter,
+            'max_delay': self.max_delay,
+        }
+
+
+def get_policies_settings():
+    nc_settings = getattr(settings, 'NODECONDUCTOR_OPENSTACK_TENANT', {})
+    policies = {key: dict(value) for key, value in DEFAULT_POLICIES.items()}
+    for key, value in nc_settings.get('POLL_POLICIES', {}).items():
+        policies.setdefault(key, {}).update(value)
+    return policies
+
+
+def get_poll_policy(model, target_state):
+    """ Get policy of model and target state, fall back to policy of model and default policy. """
+    policies = get_policies_settings()
+    key = get_policy_key(model, target_state)
+    params = dict(policies['DEFAULT'])
+    params.update(policies.get(key.split(':')[0], {}))
+    params.update(policies.get(key, {}))
+    return PollPolicy(key, params['INITIAL_DELAY'], params['FACTOR'], params['JITTER'], params['MAX_DELAY'])
+
+
+class PollStats(object):
+    """ Convergence statistics of poll policies. """
+
+    def _get_stats_key(self, policy_key, counter):
+        return '%s_%s_%s' % (STATS_KEY_PREFIX, policy_key, counter)
+
+    def _incr(self, key, delta):
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # key has been evicted between add and incr
+            cache.set(key, delta, None)
+
+    def record(self, policy_key, succeeded, polls, duration):
+        index = cache.get(STATS_INDEX_KEY) or set()
+        if policy_key not in index:
+            index.add(policy_key)
+            cache.set(STATS_INDEX_KEY, index, None)
+
+        self._incr(self._get_stats_key(policy_key, 'succeeded' if succeeded else 'failed'), 1)
+        self._incr(self._get_stats_key(policy_key, 'polls'), polls)
+        self._incr(self._get_stats_key(policy_key, 'seconds'), int(round(duration)))
+
+    def get_stats(self):
+        """ Return dictionary {policy key: statistics} with average convergence time and number of polls. """
+        policy_keys = cache.get(STATS_INDEX_KEY) or set()
+        keys = {(policy_key, counter): self._get_stats_key(policy_key, counter)
+                for policy_key in policy_keys for counter in STATS_COUNTERS}
+        values = cache.get_many(keys.values())
+
+        stats = {}
+        for policy_key in policy_keys:
+            item = {counter: values.get(keys[policy_key, counter], 0) for counter in STATS_COUNTERS}
+            total = item['succeeded'] + item['failed']
+            item['avg_seconds'] = round(float(item['seconds']) / total, 1) if total else 0
+            item['avg_polls'] = round(float(item['polls']) / total, 1) if total else 0
+            stats[policy_key] = item
+        return stats
+
+
+poll_stats = PollStats()
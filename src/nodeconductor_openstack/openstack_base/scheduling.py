@@ -0,0 +1,213 @@
+""" Staggered scheduling of periodic pulls.
+
+    Each pulled object gets stable offset within the pull interval derived from its key,
+    so pulls are spread evenly over time instead of starting all at once. Number of pulls
+    that run against the same backend URL at once is limited by cache-based semaphore.
+    Pull that could not acquire slot is applied again after randomized countdown,
+    so workers do not wait for free slot. Pull interval of service settings could be
+    adapted to the number of changes that previous pulls have applied.
+"""
+import contextlib
+import datetime
+import hashlib
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from nodeconductor.core import tasks as core_tasks
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_schedule_settings():
+    nc_settings = getattr(settings, 'NODECONDUCTOR_OPENSTACK', {})
+    schedule_settings = {
+        'ENABLED': True,
+        'INTERVAL': 30 * 60,
+        'MAX_CONCURRENT_PULLS_PER_BACKEND': 4,
+        'SLOT_RETRY_DELAY': 30,
+        'SLOT_RETRY_JITTER': 0.5,
+        'SLOT_MAX_RETRIES': 2,
+        'SLOT_TIMEOUT': 60 * 60,
+        'ADAPTIVE': True,
+        'MIN_INTERVAL': 10 * 60,
+        'MAX_INTERVAL': 4 * 60 * 60,
+        'IDLE_CYCLES': 3,
+        'ACTION_BOOST_PERIOD': 60 * 60,
+    }
+    schedule_settings.update(nc_settings.get('PULL_SCHEDULE', {}))
+    return schedule_settings
+
+
+def get_offset(key, interval):
+    """ Return stable offset of key within interval in seconds. """
+    return int(hashlib.md5(str(key)).hexdigest(), 16) % interval
+
+
+def get_countdown(key, now=None, interval=None):
+    """ Return number of seconds until the next start of pull with given key. """
+    schedule_settings = get_schedule_settings()
+    if not schedule_settings['ENABLED']:
+        return 0
+    interval = interval or schedule_settings['INTERVAL']
+    now = now if now is not None else time.time()
+    return (get_offset(key, interval) - int(now) % interval) % interval
+
+
+def get_upcoming_schedule(items, now=None):
+    """ Return list of (start time, item) pairs sorted by start time, items are pairs (key, object). """
+    now = now if now is not None else time.time()
+    schedule = []
+    for key, obj in items:
+        start = datetime.datetime.fromtimestamp(now + get_countdown(key, now), timezone.utc)
+        schedule.append((start, obj))
+    return sorted(schedule, key=lambda item: item[0])
+
+
+class BackendSemaphore(object):
+    """ Limit number of pulls that are executed against the same backend URL at once.
+
+        Slots are stored in cache with timeout, so slot of crashed worker is released eventually.
+    """
+
+    def __init__(self, backend_url, limit=None, timeout=None):
+        schedule_settings = get_schedule_settings()
+        self.hashed_url = hashlib.sha256(str(backend_url)).hexdigest()
+        self.limit = limit or schedule_settings['MAX_CONCURRENT_PULLS_PER_BACKEND']
+        self.timeout = timeout or schedule_settings['SLOT_TIMEOUT']
+        self.key = None
+
+    def _get_key(self, index):
+        return 'openstack_pull_slot_%s_%s' % (self.hashed_url, index)
+
+    def acquire(self):
+        for index in range(self.limit):
+            key = self._get_key(index)
+            if cache.add(key, True, self.timeout):
+                self.key = key
+                return True
+        return False
+
+    def release(self):
+        if self.key:
+            cache.delete(self.key)
+            self.key = None
+
+    def get_usage(self):
+        keys = [self._get_key(index) for index in range(self.limit)]
+        return len(cache.get_many(keys))
+
+
+@contextlib.contextmanager
+def backend_slot(backend_url):
+    """ Try to acquire slot of backend URL once, yield True if it is acquired. """
+    if not get_schedule_settings()['ENABLED']:
+        yield True
+        return
+
+    semaphore = BackendSemaphore(backend_url)
+    acquired = semaphore.acquire()
+    try:
+        yield acquired
+    finally:
+        semaphore.release()
+
+
+def get_slot_retry_countdown():
+    schedule_settings = get_schedule_settings()
+    return schedule_settings['SLOT_RETRY_DELAY'] * (1 + random.uniform(0, schedule_settings['SLOT_RETRY_JITTER']))
+
+
+def retry_without_slot(task, args, slot_retries):
+    """ Apply background task again later if it has not acquired backend slot.
+
+        Returns False if task has been retried SLOT_MAX_RETRIES times already.
+    """
+    if slot_retries >= get_schedule_settings()['SLOT_MAX_RETRIES']:
+        return False
+    # Check of uncompleted equal tasks is skipped, because the current task is one of them.
+    super(core_tasks.BackgroundTask, task).apply_async(
+        args=args, kwargs={'slot_retries': slot_retries + 1}, countdown=get_slot_retry_countdown())
+    return True
+
+
+class AdaptivePullTracker(object):
+    """ Adapt pull interval of service settings to observed churn.
+
+        Interval is halved down to MIN_INTERVAL after pull that has applied changes
+        and doubled up to MAX_INTERVAL after IDLE_CYCLES pulls without changes.
+        Recent user action sets interval to MIN_INTERVAL for ACTION_BOOST_PERIOD.
+        Pulls are checked every MIN_INTERVAL and started only if they are due.
+    """
+    history_size = 10
+
+    def _get_key(self, key):
+        return 'openstack_pull_churn_%s' % key
+
+    def get_state(self, key):
+        state = cache.get(self._get_key(key))
+        if state is None:
+            state = {
+                'interval': get_schedule_settings()['INTERVAL'],
+                'idle_cycles': 0,
+                'last_pull_at': None,
+                'last_user_action_at': None,
+                'changes': [],
+            }
+        return state
+
+    def get_states(self, keys):
+        states = cache.get_many([self._get_key(key) for key in keys])
+        return {key: states.get(self._get_key(key)) or self.get_state(key) for key in keys}
+
+    def _save_state(self, key, state):
+        cache.set(self._get_key(key), state, None)
+
+    def is_due(self, key, now=None):
+        now = now if now is not None else time.time()
+        state = self.get_state(key)
+        if state['last_pull_at'] is None:
+            return True
+        # Pull is due if it would be late otherwise, because next check is after MIN_INTERVAL.
+        tick = get_schedule_settings()['MIN_INTERVAL']
+        return state['last_pull_at'] + state['interval'] < now + tick / 2
+
+    def record_pull(self, key, changes_count, now=None):
+        now = now if now is not None else time.time()
+        schedule_settings = get_schedule_settings()
+        state = self.get_state(key)
+        state['last_pull_at'] = now
+        state['changes'] = (state['changes'] + [changes_count])[-self.history_size:]
+
+        if not schedule_settings['ADAPTIVE']:
+            state['interval'] = schedule_settings['INTERVAL']
+        elif state['last_user_action_at'] is not None and now - state['last_user_action_at'] < \
+                schedule_settings['ACTION_BOOST_PERIOD']:
+            state['interval'] = schedule_settings['MIN_INTERVAL']
+            state['idle_cycles'] = 0
+        elif changes_count:
+            state['interval'] = max(schedule_settings['MIN_INTERVAL'], state['interval'] // 2)
+            state['idle_cycles'] = 0
+        else:
+            state['idle_cycles'] += 1
+            if state['idle_cycles'] >= schedule_settings['IDLE_CYCLES']:
+                state['interval'] = min(schedule_settings['MAX_INTERVAL'], state['interval'] * 2)
+                state['idle_cycles'] = 0
+        self._save_state(key, state)
+
+    def record_user_action(self, key, now=None):
+        schedule_settings = get_schedule_settings()
+        state = self.get_state(key)
+        state['last_user_action_at'] = now if now is not None else time.time()
+        if schedule_settings['ADAPTIVE']:
+            state['interval'] = schedule_settings['MIN_INTERVAL']
+            state['idle_cycles'] = 0
+        self._save_state(key, state)
+
+
+pull_tracker = AdaptivePullTracker()
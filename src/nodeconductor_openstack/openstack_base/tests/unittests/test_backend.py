@@ -1,3 +1,4 @@
+import mock
 import pickle
 import six
 
@@ -5,12 +6,16 @@ from unittest import TestCase
 
 from cinderclient import exceptions as cinder_exceptions
 from ddt import ddt, data
+from django.test import override_settings
 from glanceclient import exc as glance_exceptions
 from keystoneclient import exceptions as keystone_exceptions
 from neutronclient.client import exceptions as neutron_exceptions
 from novaclient import exceptions as nova_exceptions
 
-from nodeconductor_openstack.openstack_base.backend import OpenStackBackendError
+from nodeconductor_openstack.openstack.models import Tenant
+from nodeconductor_openstack.openstack_base.backend import (
+    BaseOpenStackBackend, OpenStackBackendError, OpenStackClient, OpenStackSession, OpenStackSessionExpired,
+    OpenStackSessionPool, client_stats, fan_out)
 
 
 @ddt
@@ -38,3 +43,156 @@ class TestOpenStackBackendError(TestCase):
             pickle.loads(pickle.dumps(exc))
         except Exception as e:
             self.fail('Reraised exception is not serializable: %s' % str(e))
+
+
+class TestOpenStackSessionPool(TestCase):
+    def setUp(self):
+        self.pool = OpenStackSessionPool()
+        self.client = mock.Mock()
+        self.key = ('settings_uuid', 'tenant_id', False)
+
+    def test_client_is_returned_from_pool_if_session_is_valid(self):
+        self.pool.put(self.key, 'session_key', self.client)
+
+        self.assertEqual(self.pool.get(self.key, 'session_key'), self.client)
+        self.assertEqual(self.pool.get_stats()['hits'], 1)
+
+    def test_missing_client_is_counted_as_miss(self):
+        self.assertIsNone(self.pool.get(self.key, 'session_key'))
+        self.assertEqual(self.pool.get_stats()['misses'], 1)
+
+    def test_client_is_dropped_if_credentials_are_changed(self):
+        self.pool.put(self.key, 'session_key', self.client)
+
+        self.assertIsNone(self.pool.get(self.key, 'new_session_key'))
+        self.assertEqual(self.pool.get_stats(), {'size': 0, 'hits': 0, 'misses': 0, 'reconnects': 1, 'evictions': 0})
+
+    def test_client_is_dropped_if_session_is_expired(self):
+        self.client.session.validate.side_effect = OpenStackSessionExpired()
+        self.pool.put(self.key, 'session_key', self.client)
+
+        self.assertIsNone(self.pool.get(self.key, 'session_key'))
+        self.assertEqual(self.pool.get_stats()['reconnects'], 1)
+
+    @override_settings(NODECONDUCTOR_OPENSTACK={'SESSION_POOL': {'MAX_SIZE': 2}})
+    def test_least_recently_used_client_is_evicted_from_full_pool(self):
+        for index in range(3):
+            self.pool.put(('settings_uuid', index, False), 'session_key', mock.Mock())
+            self.pool.get(('settings_uuid', 0, False), 'session_key')
+
+        self.assertIsNotNone(self.pool.get(('settings_uuid', 0, False), 'session_key'))
+        self.assertIsNone(self.pool.get(('settings_uuid', 1, False), 'session_key'))
+        self.assertEqual(self.pool.get_stats()['evictions'], 1)
+
+
+@mock.patch('nodeconductor_openstack.openstack_base.backend.nova_client')
+class TestOpenStackClient(TestCase):
+    def setUp(self):
+        client_stats.reset()
+        self.client = OpenStackClient(session=mock.Mock())
+
+    def test_service_client_is_constructed_once(self, mocked_nova):
+        self.assertIs(self.client.nova, self.client.nova)
+        self.assertEqual(mocked_nova.Client.call_count, 1)
+        self.assertEqual(client_stats.get_stats(), {'constructed': 1, 'reused': 1})
+
+    def test_service_client_is_rebuilt_when_session_is_replaced(self, mocked_nova):
+        self.client.nova
+        self.client.session = mock.Mock()
+        self.client.nova
+
+        self.assertEqual(mocked_nova.Client.call_count, 2)
+
+
+@mock.patch('nodeconductor_openstack.openstack_base.backend.cache')
+@mock.patch('nodeconductor_openstack.openstack_base.backend.OpenStackClient')
+class TestSessionRefresh(TestCase):
+    def setUp(self):
+        settings = mock.Mock(backend_url='http://example.com/', username='admin', password='secret', domain=None)
+        self.backend = BaseOpenStackBackend(settings, tenant_id='tenant_id')
+
+    def test_refreshed_session_is_written_to_cache(self, mocked_client, mocked_cache):
+        mocked_client.return_value.session = OpenStackSession.__new__(OpenStackSession)
+        mocked_client.return_value.session.update(auth_ref='new_auth_ref')
+        mocked_client.return_value.session.keystone_session = mock.Mock()
+
+        self.backend.refresh_cached_session()
+
+        key = self.backend._get_cached_session_key(admin=False)
+        mocked_cache.set.assert_called_once_with(key, {'auth_ref': 'new_auth_ref'}, 24 * 60 * 60)
+        self.assertEqual(mocked_client.call_args[1]['project_id'], 'tenant_id')
+
+    def test_expiration_is_not_returned_if_session_is_not_cached(self, mocked_client, mocked_cache):
+        mocked_cache.get.return_value = None
+        self.assertIsNone(self.backend.get_cached_session_expiration())
+
+
+@ddt
+class TestFanOut(TestCase):
+    @data(True, False)
+    def test_results_are_merged_by_name(self, enabled):
+        with mock.patch('nodeconductor_openstack.openstack_base.backend.get_concurrency_settings') as mocked:
+            mocked.return_value = {'ENABLED': enabled, 'MAX_WORKERS': 4}
+            results = fan_out({'first': lambda: 1, 'second': lambda: 2})
+
+        self.assertEqual(results, {'first': 1, 'second': 2})
+
+    def test_client_exception_is_reraised(self):
+        def fail():
+            raise nova_exceptions.ClientException(500)
+
+        with self.assertRaises(nova_exceptions.ClientException):
+            fan_out({'first': lambda: 1, 'second': fail})
+
+
+class TestTenantQuotasUsage(TestCase):
+    def setUp(self):
+        self.backend = BaseOpenStackBackend(mock.Mock(), tenant_id='tenant_id')
+        self.clients = {'nova': mock.Mock(), 'cinder': mock.Mock(), 'neutron': mock.Mock()}
+        patcher = mock.patch.object(BaseOpenStackBackend, 'get_client',
+                                    side_effect=lambda name, admin=False: self.clients[name])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        limits = [('totalRAMUsed', 2048), ('totalCoresUsed', 2), ('totalInstancesUsed', 1)]
+        self.clients['nova'].limits.get.return_value.absolute = [self.get_limit(*limit) for limit in limits]
+        self.clients['cinder'].quotas.get.return_value = mock.Mock(
+            gigabytes={'in_use': 3}, volumes={'in_use': 2}, snapshots={'in_use': 1})
+        self.clients['neutron'].get.return_value = {'quota': {
+            name: {'used': 1} for name in ('security_group', 'security_group_rule', 'floatingip', 'network', 'subnet')
+        }}
+
+    def get_limit(self, name, value):
+        limit = mock.Mock(value=value)
+        limit.name = name
+        return limit
+
+    def test_usage_is_read_from_absolute_limits(self):
+        usage = self.backend.get_tenant_quotas_usage('tenant_id')
+
+        self.assertEqual(usage[Tenant.Quotas.ram], 2048)
+        self.assertEqual(usage[Tenant.Quotas.storage], 3 * 1024)
+        self.assertEqual(usage[Tenant.Quotas.network_count], 1)
+        self.assertFalse(self.clients['nova'].servers.list.called)
+
+    def test_usage_is_calculated_by_listing_if_limits_are_not_available(self):
+        self.clients['neutron'].get.side_effect = neutron_exceptions.NotFound()
+        self.clients['nova'].servers.list.return_value = []
+        self.clients['nova'].security_groups.list.return_value = [mock.Mock(rules=[1, 2]), mock.Mock(rules=[3])]
+        self.clients['cinder'].volumes.list.return_value = []
+        self.clients['cinder'].volume_snapshots.list.return_value = []
+        self.clients['neutron'].list_floatingips.return_value = {'floatingips': []}
+        self.clients['neutron'].list_networks.return_value = {'networks': []}
+        self.clients['neutron'].list_subnets.return_value = {'subnets': []}
+
+        usage = self.backend.get_tenant_quotas_usage('tenant_id')
+
+        self.assertEqual(usage[Tenant.Quotas.security_group_rule_count], 3)
+
+    def test_listing_is_not_used_if_limits_request_fails_for_other_reason(self):
+        self.clients['nova'].limits.get.side_effect = nova_exceptions.ClientException(503)
+
+        with self.assertRaises(OpenStackBackendError):
+            self.backend.get_tenant_quotas_usage('tenant_id')
+
+        self.assertFalse(self.clients['nova'].servers.list.called)
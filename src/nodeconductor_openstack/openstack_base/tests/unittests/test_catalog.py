@@ -0,0 +1,84 @@
+import mock
+
+from unittest import TestCase
+
+from django.core.cache import cache
+from novaclient import exceptions as nova_exceptions
+
+from nodeconductor_openstack.openstack_base.catalog import FlavorCatalog, PublicCatalog
+
+
+class TestFlavorCatalog(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.catalog = FlavorCatalog()
+        self.nova = mock.Mock()
+        self.nova.flavors.get.side_effect = self.get_flavor
+
+    def get_flavor(self, flavor_id):
+        flavor = mock.Mock(id=flavor_id, ram=1024, vcpus=1, disk=10)
+        flavor.name = 'flavor-%s' % flavor_id
+        return flavor
+
+    def test_only_missing_flavors_are_fetched(self):
+        self.catalog.get_flavors('http://example.com/', self.nova, ['1', '1', '2'])
+        flavors = self.catalog.get_flavors('http://example.com/', self.nova, ['1', '2', '3'])
+
+        self.assertEqual(sorted(flavors.keys()), ['1', '2', '3'])
+        self.assertEqual(self.nova.flavors.get.call_count, 3)
+        self.assertEqual(self.catalog.get_stats(), {'hits': 2, 'misses': 3, 'hit_rate': 0.4})
+
+    def test_flavors_are_not_shared_between_deployments(self):
+        self.catalog.get_flavors('http://example.com/', self.nova, ['1'])
+        self.catalog.get_flavors('http://another.example.com/', self.nova, ['1'])
+
+        self.assertEqual(self.nova.flavors.get.call_count, 2)
+
+    def test_missing_flavor_is_skipped(self):
+        self.nova.flavors.get.side_effect = nova_exceptions.NotFound(404)
+
+        self.assertEqual(self.catalog.get_flavors('http://example.com/', self.nova, ['1']), {})
+
+
+class TestPublicCatalog(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.catalog = PublicCatalog()
+
+    def test_snapshot_is_fetched_once_per_backend_url(self):
+        fetch = mock.Mock(return_value={'id': {'name': 'flavor'}})
+
+        self.catalog.get_snapshot('http://example.com/', 'flavors', fetch)
+        snapshot = self.catalog.get_snapshot('http://example.com/', 'flavors', fetch)
+        self.catalog.get_snapshot('http://example.org/', 'flavors', fetch)
+
+        self.assertEqual(snapshot, {'id': {'name': 'flavor'}})
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(self.catalog.get_stats(), {'hits': 1, 'misses': 2})
+
+    def test_lock_is_released_if_fetch_fails(self):
+        fetch = mock.Mock(side_effect=[ValueError(), {}])
+
+        self.assertRaises(ValueError, self.catalog.get_snapshot, 'http://example.com/', 'images', fetch)
+        self.assertEqual(self.catalog.get_snapshot('http://example.com/', 'images', fetch), {})
+
+    def test_snapshot_is_fetched_directly_if_other_worker_fetches_it(self):
+        lock_key = self.catalog._get_key('http://example.com/', 'images') + '_LOCK'
+        cache.add(lock_key, True)
+        fetch = mock.Mock(return_value={})
+
+        self.assertEqual(self.catalog.get_snapshot('http://example.com/', 'images', fetch), {})
+
+        self.assertEqual(fetch.call_count, 1)
+        self.assertTrue(cache.get(lock_key))
+
+    def test_previous_snapshot_is_used_if_other_worker_fetches_new_one(self):
+        self.catalog.get_snapshot('http://example.com/', 'images', mock.Mock(return_value={'id': 'old'}))
+        self.catalog.invalidate('http://example.com/', 'images')
+        cache.add(self.catalog._get_key('http://example.com/', 'images') + '_LOCK', True)
+        fetch = mock.Mock(return_value={'id': 'new'})
+
+        snapshot = self.catalog.get_snapshot('http://example.com/', 'images', fetch)
+
+        self.assertEqual(snapshot, {'id': 'old'})
+        self.assertFalse(fetch.called)
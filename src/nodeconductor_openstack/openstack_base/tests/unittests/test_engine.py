@@ -0,0 +1,49 @@
+import threading
+
+from django.test import SimpleTestCase, override_settings
+
+from nodeconductor_openstack.openstack_base.engine import IOEngine
+
+
+@override_settings(NODECONDUCTOR_OPENSTACK={'IO_ENGINE': {'ENABLED': True, 'MAX_CONCURRENT_REQUESTS': 4}})
+class TestIOEngine(SimpleTestCase):
+
+    def setUp(self):
+        self.engine = IOEngine()
+
+    def test_calls_are_executed_concurrently(self):
+        events = [threading.Event(), threading.Event()]
+
+        def call(index):
+            events[index].set()
+            return events[1 - index].wait(5)
+
+        results = self.engine.map({index: lambda index=index: call(index) for index in range(2)})
+
+        self.assertEqual(results, {0: True, 1: True})
+
+    @override_settings(NODECONDUCTOR_OPENSTACK={'IO_ENGINE': {'ENABLED': False}})
+    def test_calls_are_executed_by_calling_thread_if_engine_is_disabled(self):
+        results = self.engine.map({'thread': lambda: threading.current_thread()})
+
+        self.assertEqual(results['thread'], threading.current_thread())
+
+    def test_exceptions_are_returned_as_results_if_requested(self):
+        error = ValueError('error')
+
+        def fail():
+            raise error
+
+        results = self.engine.map({'ok': lambda: 1, 'fail': fail}, return_exceptions=True)
+
+        self.assertEqual(results, {'ok': 1, 'fail': error})
+        self.assertRaises(ValueError, self.engine.map, {'ok': lambda: 1, 'fail': fail})
+
+    def test_nested_calls_are_executed_by_engine_thread(self):
+        def outer():
+            thread = threading.current_thread()
+            return self.engine.map({'inner': lambda: threading.current_thread()})['inner'] is thread
+
+        results = self.engine.map({index: outer for index in range(8)})
+
+        self.assertTrue(all(results.values()))
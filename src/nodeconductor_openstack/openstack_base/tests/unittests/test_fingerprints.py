@@ -0,0 +1,35 @@
+import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from nodeconductor_openstack.openstack_base import fingerprints
+
+
+class TestFingerprints(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.settings = mock.Mock()
+        self.store = fingerprints.FingerprintStore()
+
+    def test_fingerprint_does_not_depend_on_keys_order(self):
+        first = fingerprints.get_fingerprint({'a': {'name': 'a', 'ram': 1}, 'b': {'name': 'b', 'ram': 2}})
+        second = fingerprints.get_fingerprint({'b': {'ram': 2, 'name': 'b'}, 'a': {'ram': 1, 'name': 'a'}})
+        self.assertEqual(first, second)
+
+    def test_fingerprint_is_compared_with_saved_one(self):
+        fingerprint = fingerprints.get_fingerprint({'a': 1})
+        self.assertFalse(self.store.is_unchanged(self.settings, 'flavors', fingerprint))
+
+        self.store.save(self.settings, 'flavors', fingerprint)
+
+        self.assertTrue(self.store.is_unchanged(self.settings, 'flavors', fingerprint))
+        self.assertFalse(self.store.is_unchanged(self.settings, 'images', fingerprint))
+
+    def test_skipped_and_applied_syncs_are_counted(self):
+        self.store.record('flavors', skipped=False)
+        self.store.record('flavors', skipped=True)
+        self.store.record('flavors', skipped=True)
+
+        self.assertEqual(self.store.get_stats(), {'flavors': {'skipped': 2, 'applied': 1}})
@@ -0,0 +1,47 @@
+from unittest import TestCase
+
+from ddt import ddt, data, unpack
+from django.core.cache import cache
+
+from nodeconductor_openstack.openstack_base import metrics
+
+
+@ddt
+class TestOperationName(TestCase):
+    @data(
+        ('get', '/servers/detail?limit=10', 'GET /servers/detail'),
+        ('get', '/servers/0f2c9e37-6a4e-4f3e-9bc4-5b8e6b9c1d2a', 'GET /servers/{id}'),
+        ('delete', '/v2.0/ports/0f2c9e376a4e4f3e9bc45b8e6b9c1d2a.json', 'DELETE /v2.0/ports/{id}.json'),
+        ('get', 'http://example.com:8774/v2.1/flavors/42', 'GET /v2.1/flavors/{id}'),
+    )
+    @unpack
+    def test_identifiers_are_removed_from_operation(self, method, url, operation):
+        self.assertEqual(metrics.get_operation(method, url), operation)
+
+
+class TestMetricsRegistry(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.registry = metrics.MetricsRegistry()
+
+    def test_histograms_are_aggregated_by_labels(self):
+        self.registry.observe('api', 'compute', 'GET /servers/detail', 'settings', 20)
+        self.registry.observe('api', 'compute', 'GET /servers/detail', 'settings', 3000)
+        self.registry.observe('api', 'network', 'GET /v2.0/ports.json', 'settings', 5)
+
+        aggregates = self.registry.get_aggregates(service='compute')
+
+        self.assertEqual(len(aggregates), 1)
+        self.assertEqual(aggregates[0]['count'], 2)
+        self.assertEqual(aggregates[0]['max'], 3000)
+        self.assertEqual(aggregates[0]['buckets']['25'], 1)
+        self.assertEqual(aggregates[0]['buckets']['5000'], 1)
+
+    def test_snapshots_of_processes_are_merged(self):
+        other_registry = metrics.MetricsRegistry()
+        other_registry.process_key += '_other'
+        other_registry.observe('api', 'compute', 'GET /servers/detail', 'settings', 10)
+        other_registry.flush()
+        self.registry.observe('api', 'compute', 'GET /servers/detail', 'settings', 10)
+
+        self.assertEqual(self.registry.get_aggregates()[0]['count'], 2)
@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from nodeconductor_openstack.openstack_base import polling
+from nodeconductor_openstack.openstack_tenant import models
+
+
+class TestPollPolicy(SimpleTestCase):
+
+    def test_delay_grows_exponentially_up_to_max_delay(self):
+        policy = polling.PollPolicy('key', initial_delay=2, factor=2, jitter=0, max_delay=10)
+        self.assertEqual([policy.get_delay(attempt) for attempt in range(5)], [2, 4, 8, 10, 10])
+
+    def test_delay_is_randomized_by_jitter(self):
+        policy = polling.PollPolicy('key', initial_delay=10, factor=1, jitter=0.2, max_delay=10)
+        delays = [policy.get_delay(0) for _ in range(100)]
+        self.assertTrue(all(8 <= delay <= 12 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+    @override_settings(NODECONDUCTOR_OPENSTACK_TENANT={'POLL_POLICIES': {
+        'DEFAULT': {'INITIAL_DELAY': 7},
+        'OpenStackTenant.Instance': {'MAX_DELAY': 120},
+        'OpenStackTenant.Instance:SHUTOFF': {'FACTOR': 3},
+    }})
+    def test_policy_of_target_state_overrides_policy_of_model_and_default_policy(self):
+        policy = polling.get_poll_policy(models.Instance, 'SHUTOFF')
+
+        self.assertEqual(policy.key, 'OpenStackTenant.Instance:SHUTOFF')
+        self.assertEqual(policy.to_dict(), {'initial_delay': 7, 'factor': 3, 'jitter': 0.2, 'max_delay': 120})
+
+    def test_policy_key_of_service_property_contains_model_name(self):
+        policy = polling.get_poll_policy(models.FloatingIP, 'ACTIVE')
+
+        self.assertEqual(policy.key, 'OpenStackTenant.FloatingIP:ACTIVE')
+        self.assertEqual(policy.initial_delay, 2)
+
+
+class TestPollStats(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_average_convergence_time_and_polls_are_calculated_per_policy(self):
+        polling.poll_stats.record('OpenStackTenant.Volume:available', True, polls=2, duration=10)
+        polling.poll_stats.record('OpenStackTenant.Volume:available', False, polls=4, duration=20)
+
+        stats = polling.poll_stats.get_stats()['OpenStackTenant.Volume:available']
+        self.assertEqual(stats['succeeded'], 1)
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(stats['avg_seconds'], 15)
+        self.assertEqual(stats['avg_polls'], 3)
@@ -0,0 +1,100 @@
+
+import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from nodeconductor.core import tasks as core_tasks
+
+from nodeconductor_openstack.openstack_base import scheduling
+
+
+class TestStaggeredSchedule(SimpleTestCase):
+
+    def test_countdown_points_to_stable_offset_within_interval(self):
+        offset = scheduling.get_offset('settings-uuid', 1800)
+
+        for now in (0, 100, 1799, 1800 * 5 + 17):
+            countdown = scheduling.get_countdown('settings-uuid', now=now)
+            self.assertTrue(0 <= countdown < 1800)
+            self.assertEqual((now + countdown) % 1800, offset)
+
+    def test_offsets_are_spread_over_interval(self):
+        offsets = [scheduling.get_offset('settings-%s' % index, 1800) for index in range(1000)]
+        quarters = [len([offset for offset in offsets if quarter * 450 <= offset < (quarter + 1) * 450])
+                    for quarter in range(4)]
+        self.assertTrue(all(150 < count < 350 for count in quarters))
+
+    @override_settings(NODECONDUCTOR_OPENSTACK={'PULL_SCHEDULE': {'ENABLED': False}})
+    def test_countdown_is_zero_if_schedule_is_disabled(self):
+        self.assertEqual(scheduling.get_countdown('settings-uuid', now=100), 0)
+
+
+class TestBackendSemaphore(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_number_of_acquired_slots_is_limited(self):
+        semaphores = [scheduling.BackendSemaphore('http://example.com/', limit=2) for _ in range(3)]
+
+        self.assertEqual([semaphore.acquire() for semaphore in semaphores], [True, True, False])
+        semaphores[0].release()
+        self.assertTrue(semaphores[2].acquire())
+        self.assertEqual(semaphores[2].get_usage(), 2)
+
+    def test_slot_is_not_acquired_if_all_slots_are_busy(self):
+        with override_settings(NODECONDUCTOR_OPENSTACK={'PULL_SCHEDULE': {'MAX_CONCURRENT_PULLS_PER_BACKEND': 1}}):
+            with scheduling.backend_slot('http://example.com/') as first:
+                with scheduling.backend_slot('http://example.com/') as second:
+                    self.assertEqual((first, second), (True, False))
+
+    @override_settings(NODECONDUCTOR_OPENSTACK={'PULL_SCHEDULE': {
+        'SLOT_RETRY_DELAY': 10, 'SLOT_RETRY_JITTER': 0.5, 'SLOT_MAX_RETRIES': 1}})
+    def test_task_without_slot_is_applied_again_with_randomized_countdown(self):
+        task = mock.Mock(spec=core_tasks.BackgroundTask)
+        with mock.patch('celery.app.task.Task.apply_async') as mocked_apply_async:
+            self.assertTrue(scheduling.retry_without_slot(task, ('settings',), slot_retries=0))
+            self.assertFalse(scheduling.retry_without_slot(task, ('settings',), slot_retries=1))
+
+        self.assertEqual(mocked_apply_async.call_count, 1)
+        kwargs = mocked_apply_async.call_args[1]
+        self.assertEqual((kwargs['args'], kwargs['kwargs']), (('settings',), {'slot_retries': 1}))
+        self.assertTrue(10 <= kwargs['countdown'] <= 15)
+
+
+@override_settings(NODECONDUCTOR_OPENSTACK={'PULL_SCHEDULE': {
+    'INTERVAL': 1800, 'MIN_INTERVAL': 600, 'MAX_INTERVAL': 7200, 'IDLE_CYCLES': 2, 'ACTION_BOOST_PERIOD': 3600}})
+class TestAdaptivePullTracker(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.tracker = scheduling.AdaptivePullTracker()
+
+    def test_interval_grows_after_idle_cycles_up_to_max_interval(self):
+        for now in range(0, 10 * 1000, 1000):
+            self.tracker.record_pull('settings', 0, now=now)
+
+        state = self.tracker.get_state('settings')
+        self.assertEqual(state['interval'], 7200)
+        self.assertEqual(state['changes'], [0] * 10)
+
+    def test_interval_shrinks_after_changes_down_to_min_interval(self):
+        self.tracker.record_pull('settings', 5, now=0)
+        self.assertEqual(self.tracker.get_state('settings')['interval'], 900)
+
+        self.tracker.record_pull('settings', 5, now=1000)
+        self.assertEqual(self.tracker.get_state('settings')['interval'], 600)
+
+    def test_user_action_sets_min_interval_for_boost_period(self):
+        self.tracker.record_user_action('settings', now=0)
+        self.tracker.record_pull('settings', 0, now=100)
+        self.tracker.record_pull('settings', 0, now=200)
+        self.assertEqual(self.tracker.get_state('settings')['interval'], 600)
+
+    def test_pull_is_due_when_interval_has_passed(self):
+        self.assertTrue(self.tracker.is_due('settings', now=0))
+        self.tracker.record_pull('settings', 0, now=0)
+
+        self.assertFalse(self.tracker.is_due('settings', now=1000))
+        self.assertTrue(self.tracker.is_due('settings', now=1600))
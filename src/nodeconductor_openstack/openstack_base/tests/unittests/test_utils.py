@@ -0,0 +1,56 @@
+import mock
+
+from unittest import TestCase
+
+from nodeconductor_openstack.openstack_base import utils
+
+
+class TestPaging(TestCase):
+    def test_marker_pages_are_requested_until_last_page(self):
+        items = [mock.Mock(id=i) for i in range(5)]
+
+        def list_method(marker=None, limit=None):
+            start = marker + 1 if marker is not None else 0
+            return items[start:start + limit]
+
+        list_method = mock.Mock(side_effect=list_method)
+        pages = list(utils.get_marker_pages(list_method, page_size=2))
+
+        self.assertEqual(pages, [items[0:2], items[2:4], items[4:5]])
+        self.assertEqual(list_method.call_count, 4)
+
+    def test_marker_pages_are_requested_if_server_limits_page_size(self):
+        items = [mock.Mock(id=i) for i in range(5)]
+
+        def list_method(marker=None, limit=None):
+            start = marker + 1 if marker is not None else 0
+            return items[start:start + min(limit, 2)]
+
+        pages = list(utils.get_marker_pages(list_method, page_size=3))
+
+        self.assertEqual(pages, [items[0:2], items[2:4], items[4:5]])
+
+    def test_neutron_pages_are_requested_lazily(self):
+        list_method = mock.Mock(return_value=iter([{'ports': [1, 2]}, {'ports': [3]}]))
+
+        pages = list(utils.get_neutron_pages(list_method, 'ports', page_size=2, device_id='id'))
+
+        self.assertEqual(pages, [[1, 2], [3]])
+        list_method.assert_called_once_with(retrieve_all=False, limit=2, device_id='id')
+
+    def test_iterable_is_split_into_chunks(self):
+        self.assertEqual(list(utils.get_chunks(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+
+class TestPrefetch(TestCase):
+    def test_pages_order_is_preserved(self):
+        self.assertEqual(list(utils.prefetch(iter([[1], [2], [3]]))), [[1], [2], [3]])
+
+    def test_exception_is_reraised_in_consumer_thread(self):
+        def pages():
+            yield [1]
+            raise ValueError()
+
+        prefetched = utils.prefetch(pages())
+        self.assertEqual(next(prefetched), [1])
+        self.assertRaises(ValueError, next, prefetched)
@@ -0,0 +1,205 @@
+import sys
+import threading
+
+from django.conf import settings
+from django.db.models import Case, DateTimeField, F, Value, When
+from django.db.models.signals import post_save
+from django.utils import six, timezone
+from django.utils.six.moves import queue
+from model_utils.fields import AutoLastModifiedField
+
+
+def get_page_size():
+    nc_settings = getattr(settings, 'NODECONDUCTOR_OPENSTACK', {})
+    return nc_settings.get('PAGE_SIZE', 500)
+
+
+def get_marker_pages(list_method, page_size=None, **kwargs):
+    """ Walk Nova or Cinder collection page by page using marker and limit.
+
+        Yields lists of backend objects, so only one page is kept in memory.
+        Walk stops on empty page only: server caps limit with osapi_max_limit,
+        so page shorter than requested does not mean that collection is over.
+    """
+    page_size = page_size or get_page_size()
+    marker = None
+    while True:
+        page = list_method(marker=marker, limit=page_size, **kwargs)
+        if not page:
+            return
+        yield page
+        marker = page[-1].id
+
+
+def get_neutron_pages(list_method, collection, page_size=None, **params):
+    """ Walk Neutron collection page by page following pagination links. """
+    page_size = page_size or get_page_size()
+    for response in list_method(retrieve_all=False, limit=page_size, **params):
+        if response[collection]:
+            yield response[collection]
+
+
+def get_chunks(iterable, chunk_size=None):
+    """ Split iterable (for example, Glance images generator) into lists of given size. """
+    chunk_size = chunk_size or get_page_size()
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def prefetch(pages, buffer_size=1):
+    """ Download next pages in background thread while current page is processed.
+
+        Exception raised while downloading is re-raised in the consumer thread.
+    """
+    buffer = queue.Queue(maxsize=buffer_size)
+    stopped = threading.Event()
+    end = object()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for page in pages:
+                if not put((page, None)):
+                    return
+        except Exception:
+            put((None, sys.exc_info()))
+        else:
+            put((end, None))
+
+    producer = threading.Thread(target=produce)
+    producer.daemon = True
+    producer.start()
+    try:
+        while True:
+            page, exc_info = buffer.get()
+            if exc_info:
+                six.reraise(*exc_info)
+            if page is end:
+                return
+            yield page
+    finally:
+        stopped.set()
+
+
+class BulkReconciler(object):
+    """ Synchronize rows of queryset with backend objects using bulk queries.
+
+        Current rows are loaded once, backend objects are compared with them in memory
+        and only the difference is written: new rows are inserted with bulk_create,
+        changed rows are updated in batches grouped by new values and missing rows
+        are removed with single delete. Rows with identical fields are skipped.
+
+        Usage:
+            reconciler = BulkReconciler(models.Flavor.objects.filter(settings=settings), settings=settings)
+            for backend_flavor in flavors:
+                reconciler.add(backend_flavor.id, name=backend_flavor.name, ram=backend_flavor.ram)
+            reconciler.apply()
+    """
+
+    def __init__(self, queryset, batch_size=None, **defaults):
+        self.queryset = queryset
+        self.model = queryset.model
+        self.batch_size = batch_size or get_page_size()
+        self.defaults = defaults
+        self.rows = list(queryset)
+        self.current = {row.backend_id: row for row in self.rows}
+        self.pulled = set()
+        self.to_create = []
+        self.to_update = {}
+
+    def add(self, backend_id, **values):
+        if backend_id in self.pulled:
+            return
+        self.pulled.add(backend_id)
+
+        row = self.current.get(backend_id)
+        if row is None:
+            params = dict(self.defaults, backend_id=backend_id, **values)
+            self.to_create.append(self.model(**params))
+            return
+
+        changed = {name: value for name, value in values.items() if getattr(row, name) != value}
+        if changed:
+            # Group rows by new values so that each group is updated with one query.
+            key = repr(sorted(changed.items()))
+            self.to_update.setdefault(key, (changed, []))[1].append(row.pk)
+
+    def keep(self, backend_id):
+        """ Keep existing row as is, for example, if backend object cannot be converted yet. """
+        self.pulled.add(backend_id)
+
+    def apply(self, delete_queryset=None):
+        """ Write difference to database and return number of created, updated and deleted rows.
+
+            Stale rows are deleted from delete_queryset, which allows to keep some of them,
+            for example, booked floating IPs.
+        """
+        self.model.objects.bulk_create(self.to_create, batch_size=self.batch_size)
+
+        updated = 0
+        for values, pks in self.to_update.values():
+            for chunk in get_chunks(pks, self.batch_size):
+                updated += self.model.objects.filter(pk__in=chunk).update(**values)
+
+        stale = [row.pk for row in self.rows if row.backend_id not in self.pulled]
+        deleted = 0
+        if stale:
+            if delete_queryset is None:
+                delete_queryset = self.queryset
+            deleted, _ = delete_queryset.filter(pk__in=stale).delete()
+
+        return len(self.to_create), updated, deleted
+
+
+def bulk_update(changes, batch_size=None):
+    """ Write changed fields of model objects with one UPDATE query per batch.
+
+        Changes are passed as list of pairs (object, names of changed fields).
+        Columns are updated using CASE expression, only rows and columns that have
+        been changed are touched. Fields are not processed by pre_save, so auto-updated
+        fields (for example, "modified") are set explicitly for each changed object.
+        pre_save signal is not sent, post_save signal is sent for each object afterwards,
+        so handlers, for example, cost tracking, observe changes as after regular save.
+    """
+    if not changes:
+        return
+    batch_size = batch_size or get_page_size()
+    model = changes[0][0].__class__
+    auto_now_fields = [field for field in model._meta.concrete_fields
+                       if getattr(field, 'auto_now', False) or isinstance(field, AutoLastModifiedField)]
+    now = timezone.now()
+    changes = [(obj, list(field_names) + [field.name for field in auto_now_fields if field.name not in field_names])
+               for obj, field_names in changes if field_names]
+    for obj, _ in changes:
+        for field in auto_now_fields:
+            setattr(obj, field.attname, now if isinstance(field, DateTimeField) else now.date())
+
+    for batch in get_chunks(changes, batch_size):
+        cases = {}
+        for obj, field_names in batch:
+            for name in field_names:
+                field = model._meta.get_field(name)
+                when = When(pk=obj.pk, then=Value(getattr(obj, field.attname), output_field=field))
+                cases.setdefault(field, []).append(when)
+
+        values = {field.attname: Case(*whens, default=F(field.attname), output_field=field)
+                  for field, whens in cases.items()}
+        model.objects.filter(pk__in=[obj.pk for obj, _ in batch]).update(**values)
+
+        for obj, field_names in batch:
+            post_save.send(sender=model, instance=obj, created=False, update_fields=frozenset(field_names),
+                           raw=False, using=obj._state.db)
@@ -42,6 +42,12 @@ class OpenStackTenantConfig(AppConfig):
                 dispatch_uid='openstack_tenant.handlers.log_%s_action' % name,
             )
 
+            signals.post_save.connect(
+                handlers.speed_up_pull_on_user_action,
+                sender=Resource,
+                dispatch_uid='openstack_tenant.handlers.speed_up_pull_on_%s_action' % name,
+            )
+
         for handler in handlers.resource_handlers:
             model = handler.resource_model
             name = model.__name__.lower()
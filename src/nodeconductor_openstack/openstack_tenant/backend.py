@@ -1,3 +1,4 @@
+import functools
 import json
 import logging
 import time
@@ -12,10 +13,12 @@ from keystoneclient import exceptions as keystone_exceptions
 from neutronclient.client import exceptions as neutron_exceptions
 from novaclient import exceptions as nova_exceptions
 
-from nodeconductor.structure import log_backend_action
-
 from nodeconductor_openstack.openstack_base.backend import (
-    BaseOpenStackBackend, OpenStackBackendError, update_pulled_fields)
+    BaseOpenStackBackend, OpenStackBackendError, fan_out, log_backend_action, update_pulled_fields)
+from nodeconductor_openstack.openstack_base.catalog import public_catalog
+from nodeconductor_openstack.openstack_base.fingerprints import fingerprints, get_fingerprint
+from nodeconductor_openstack.openstack_base.utils import (
+    BulkReconciler, get_chunks, get_marker_pages, get_neutron_pages, get_page_size, prefetch)
 from . import models
 
 
@@ -27,127 +30,188 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
     SNAPSHOT_UPDATE_FIELDS = ('name', 'description', 'size', 'metadata', 'source_volume', 'runtime_state')
     INSTANCE_UPDATE_FIELDS = ('name', 'flavor_name', 'flavor_disk', 'ram', 'cores', 'disk',
                               'runtime_state', 'error_message')
+    # Runtime states of these models could be requested by list_runtime_states.
+    RUNTIME_STATE_MODELS = (models.Instance, models.Volume, models.Snapshot, models.FloatingIP)
 
     def __init__(self, settings):
         super(OpenStackTenantBackend, self).__init__(settings, settings.options['tenant_id'])
+        self._property_indexes = {}
 
     @property
     def external_network_id(self):
         return self.settings.options['external_network_id']
 
     def sync(self):
-        self._pull_flavors()
-        self._pull_images()
-        self.pull_floating_ips()
-        self._pull_security_groups()
-        self._pull_quotas()
-        self._pull_networks()
-        self._pull_subnets()
+        """ Fetch all properties from backend concurrently, then store them in dependency order. """
+        # Session is initialized in the current thread so that fetch threads share it.
+        self.get_client()
+
+        start = time.time()
+        fetched = fan_out({
+            'flavors': self._fetch_flavors,
+            'images': self._fetch_images,
+            'floating_ips': self._fetch_floating_ips,
+            'security_groups': self._fetch_security_groups,
+            'quotas': self._fetch_quotas,
+            'networks': self._fetch_networks,
+            'subnets': self._fetch_subnets,
+        })
+        fetch_duration = time.time() - start
+
+        start = time.time()
+        self._apply_if_changed('flavors', fetched['flavors'], self._apply_flavors)
+        self._apply_if_changed('images', fetched['images'], self._apply_images)
+        self._apply_floating_ips(fetched['floating_ips'])
+        self._apply_security_groups(fetched['security_groups'])
+        self._apply_quotas(fetched['quotas'])
+        networks_applied = self._apply_if_changed('networks', fetched['networks'], self._apply_networks)
+        # Subnets are deleted together with their networks, so they are re-applied if networks are changed.
+        self._apply_if_changed('subnets', fetched['subnets'], self._apply_subnets, force=networks_applied)
+        apply_duration = time.time() - start
+
+        logger.info('Service settings %s (PK: %s) are synchronized: fetch phase took %.2f s, '
+                    'apply phase took %.2f s.', self.settings, self.settings.pk, fetch_duration, apply_duration)
+
+    def _apply_if_changed(self, name, payload, apply_method, force=False):
+        """ Apply payload only if it differs from the payload of the last successful sync.
+
+            Returns True if payload has been applied.
+        """
+        fingerprint = get_fingerprint(payload)
+        if not force and fingerprints.is_unchanged(self.settings, name, fingerprint):
+            fingerprints.record(name, skipped=True)
+            return False
+
+        apply_method(payload)
+        fingerprints.save(self.settings, name, fingerprint)
+        fingerprints.record(name, skipped=False)
+        return True
 
     def _pull_flavors(self):
+        self._apply_flavors(self._fetch_flavors())
+
+    def _fetch_flavors(self):
+        return public_catalog.get_snapshot(self.settings.backend_url, 'flavors', self._fetch_public_flavors)
+
+    def _fetch_public_flavors(self):
         nova = self.nova_client
         try:
             flavors = nova.flavors.findall(is_public=True)
         except nova_exceptions.ClientException as e:
             six.reraise(OpenStackBackendError, e)
 
+        return {flavor.id: {
+            'name': flavor.name,
+            'cores': flavor.vcpus,
+            'ram': flavor.ram,
+            'disk': self.gb2mb(flavor.disk),
+        } for flavor in flavors}
+
+    def _apply_flavors(self, flavors):
         with transaction.atomic():
-            cur_flavors = self._get_current_properties(models.Flavor)
-            for backend_flavor in flavors:
-                cur_flavors.pop(backend_flavor.id, None)
-                models.Flavor.objects.update_or_create(
-                    settings=self.settings,
-                    backend_id=backend_flavor.id,
-                    defaults={
-                        'name': backend_flavor.name,
-                        'cores': backend_flavor.vcpus,
-                        'ram': backend_flavor.ram,
-                        'disk': self.gb2mb(backend_flavor.disk),
-                    })
-
-            models.Flavor.objects.filter(backend_id__in=cur_flavors.keys()).delete()
+            reconciler = self._get_property_reconciler(models.Flavor)
+            for backend_id, values in flavors.items():
+                reconciler.add(backend_id, **values)
+            reconciler.apply()
 
     def _pull_images(self):
+        self._apply_images(self._fetch_images())
+
+    def _fetch_images(self):
+        return public_catalog.get_snapshot(self.settings.backend_url, 'images', self._fetch_public_images)
+
+    def _fetch_public_images(self):
         glance = self.glance_client
+        images = {}
         try:
-            images = [image for image in glance.images.list() if image.is_public and not image.deleted]
-        except glance_exceptions.ClientException as e:
-            six.reraise(OpenStackBackendError, e)
-
-        with transaction.atomic():
-            cur_images = self._get_current_properties(models.Image)
-            for backend_image in images:
-                cur_images.pop(backend_image.id, None)
-                models.Image.objects.update_or_create(
-                    settings=self.settings,
-                    backend_id=backend_image.id,
-                    defaults={
+            for backend_images in prefetch(get_chunks(glance.images.list(page_size=get_page_size()))):
+                for backend_image in backend_images:
+                    if not backend_image.is_public or backend_image.deleted:
+                        continue
+                    images[backend_image.id] = {
                         'name': backend_image.name,
                         'min_ram': backend_image.min_ram,
                         'min_disk': self.gb2mb(backend_image.min_disk),
-                    })
+                    }
+        except glance_exceptions.ClientException as e:
+            six.reraise(OpenStackBackendError, e)
+        return images
 
-            models.Image.objects.filter(backend_id__in=cur_images.keys()).delete()
+    def _apply_images(self, images):
+        with transaction.atomic():
+            reconciler = self._get_property_reconciler(models.Image)
+            for backend_id, values in images.items():
+                reconciler.add(backend_id, **values)
+            reconciler.apply()
 
     def pull_floating_ips(self):
+        self._apply_floating_ips(self._fetch_floating_ips())
+
+    def _fetch_floating_ips(self):
         neutron = self.neutron_client
         try:
-            ips = [ip for ip in neutron.list_floatingips(tenant_id=self.tenant_id)['floatingips']
-                   if ip.get('floating_ip_address') and ip.get('status')]
+            ips = neutron.list_floatingips(tenant_id=self.tenant_id)['floatingips']
         except neutron_exceptions.NeutronClientException as e:
             six.reraise(OpenStackBackendError, e)
 
+        return {ip['id']: {
+            'runtime_state': ip['status'],
+            'address': ip['floating_ip_address'],
+            'backend_network_id': ip['floating_network_id'],
+        } for ip in ips if ip.get('floating_ip_address') and ip.get('status')}
+
+    def _apply_floating_ips(self, floating_ips):
         with transaction.atomic():
-            cur_ips = self._get_current_properties(models.FloatingIP)
-            for backend_ip in ips:
-                cur_ips.pop(backend_ip['id'], None)
-                models.FloatingIP.objects.update_or_create(
-                    settings=self.settings,
-                    backend_id=backend_ip['id'],
-                    defaults={
-                        'runtime_state': backend_ip['status'],
-                        'address': backend_ip['floating_ip_address'],
-                        'backend_network_id': backend_ip['floating_network_id'],
-                    })
-
-            models.FloatingIP.objects.filter(backend_id__in=cur_ips.keys()).exclude(is_booked=True).delete()
+            reconciler = self._get_property_reconciler(models.FloatingIP)
+            for backend_id, values in floating_ips.items():
+                reconciler.add(backend_id, **values)
+            reconciler.apply(delete_queryset=models.FloatingIP.objects.exclude(is_booked=True))
 
     def _pull_security_groups(self):
+        self._apply_security_groups(self._fetch_security_groups())
+
+    def _fetch_security_groups(self):
+        """ Return security groups as dictionary {backend_id: (values, rules)}. """
         nova = self.nova_client
         try:
             security_groups = nova.security_groups.list()
         except nova_exceptions.ClientException as e:
             six.reraise(OpenStackBackendError, e)
 
+        result = {}
+        for security_group in security_groups:
+            rules = {}
+            for rule in security_group.rules:
+                rule = self._normalize_security_group_rule(rule)
+                rules[rule['id']] = {
+                    'from_port': rule['from_port'],
+                    'to_port': rule['to_port'],
+                    'protocol': rule['ip_protocol'],
+                    'cidr': rule['ip_range']['cidr'],
+                }
+            values = {'name': security_group.name, 'description': security_group.description}
+            result[security_group.id] = (values, rules)
+        return result
+
+    def _apply_security_groups(self, security_groups):
         with transaction.atomic():
-            cur_security_groups = self._get_current_properties(models.SecurityGroup)
-            for backend_security_group in security_groups:
-                cur_security_groups.pop(backend_security_group.id, None)
-                security_group, _ = models.SecurityGroup.objects.update_or_create(
-                    settings=self.settings,
-                    backend_id=backend_security_group.id,
-                    defaults={
-                        'name': backend_security_group.name,
-                        'description': backend_security_group.description,
-                    })
-                self._pull_security_group_rules(security_group, backend_security_group)
-
-            models.SecurityGroup.objects.filter(backend_id__in=cur_security_groups.keys()).delete()
-
-    def _pull_security_group_rules(self, security_group, backend_security_group):
-        backend_rules = [self._normalize_security_group_rule(r) for r in backend_security_group.rules]
-        cur_rules = {rule.backend_id: rule for rule in security_group.rules.all()}
-        for backend_rule in backend_rules:
-            cur_rules.pop(backend_rule['id'], None)
-            security_group.rules.update_or_create(
-                backend_id=backend_rule['id'],
-                defaults={
-                    'from_port': backend_rule['from_port'],
-                    'to_port': backend_rule['to_port'],
-                    'protocol': backend_rule['ip_protocol'],
-                    'cidr': backend_rule['ip_range']['cidr'],
-                })
-        security_group.rules.filter(backend_id__in=cur_rules.keys()).delete()
+            reconciler = self._get_property_reconciler(models.SecurityGroup)
+            for backend_id, (values, _) in security_groups.items():
+                reconciler.add(backend_id, **values)
+            reconciler.apply()
+            self.reset_property_index(models.SecurityGroup)
+
+            # bulk_create does not set primary keys, so groups are fetched again to link rules.
+            security_group_ids = dict(models.SecurityGroup.objects.filter(
+                settings=self.settings).values_list('backend_id', 'pk'))
+            self._apply_security_group_rules(security_groups, security_group_ids)
+
+    def _apply_security_group_rules(self, security_groups, security_group_ids):
+        reconciler = BulkReconciler(models.SecurityGroupRule.objects.filter(security_group__settings=self.settings))
+        for security_group_backend_id, (_, rules) in security_groups.items():
+            for backend_id, values in rules.items():
+                reconciler.add(backend_id, security_group_id=security_group_ids[security_group_backend_id], **values)
+        reconciler.apply()
 
     def _normalize_security_group_rule(self, rule):
         if rule['ip_protocol'] is None:
@@ -159,74 +223,107 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
         return rule
 
     def _pull_quotas(self):
-        for quota_name, limit in self.get_tenant_quotas_limits(self.tenant_id).items():
+        self._apply_quotas(self._fetch_quotas())
+
+    def _fetch_quotas(self):
+        return self.get_tenant_quotas_limits(self.tenant_id), self.get_tenant_quotas_usage(self.tenant_id)
+
+    def _apply_quotas(self, quotas):
+        limits, usages = quotas
+        for quota_name, limit in limits.items():
             self.settings.set_quota_limit(quota_name, limit)
-        for quota_name, usage in self.get_tenant_quotas_usage(self.tenant_id).items():
+        for quota_name, usage in usages.items():
             self.settings.set_quota_usage(quota_name, usage, fail_silently=True)
 
     def _pull_networks(self):
+        self._apply_networks(self._fetch_networks())
+
+    def _fetch_networks(self):
         neutron = self.neutron_client
         try:
             networks = neutron.list_networks(tenant_id=self.tenant_id)['networks']
         except neutron_exceptions.NeutronClientException as e:
             six.reraise(OpenStackBackendError, e)
 
+        result = {}
+        for network in networks:
+            values = {
+                'name': network['name'],
+                'description': network['description'],
+            }
+            if network.get('provider:network_type'):
+                values['type'] = network['provider:network_type']
+            if network.get('provider:segmentation_id'):
+                values['segmentation_id'] = network['provider:segmentation_id']
+            result[network['id']] = values
+        return result
+
+    def _apply_networks(self, networks):
         with transaction.atomic():
-            cur_networks = self._get_current_properties(models.Network)
-            for backend_network in networks:
-                cur_networks.pop(backend_network['id'], None)
-                defaults = {
-                    'name': backend_network['name'],
-                    'description': backend_network['description'],
-                }
-                if backend_network.get('provider:network_type'):
-                    defaults['type'] = backend_network['provider:network_type']
-                if backend_network.get('provider:segmentation_id'):
-                    defaults['segmentation_id'] = backend_network['provider:segmentation_id']
-                models.Network.objects.update_or_create(
-                    settings=self.settings,
-                    backend_id=backend_network['id'],
-                    defaults=defaults)
-
-            models.Network.objects.filter(backend_id__in=cur_networks.keys()).delete()
+            reconciler = self._get_property_reconciler(models.Network)
+            for backend_id, values in networks.items():
+                reconciler.add(backend_id, **values)
+            reconciler.apply()
+            self.reset_property_index(models.Network)
 
     def _pull_subnets(self):
+        self._apply_subnets(self._fetch_subnets())
+
+    def _fetch_subnets(self):
+        """ Return subnets as dictionary {backend_id: values}, network is referenced by its backend_id. """
         neutron = self.neutron_client
         try:
             subnets = neutron.list_subnets(tenant_id=self.tenant_id)['subnets']
         except neutron_exceptions.NeutronClientException as e:
             six.reraise(OpenStackBackendError, e)
 
+        return {subnet['id']: {
+            'name': subnet['name'],
+            'description': subnet['description'],
+            'allocation_pools': subnet['allocation_pools'],
+            'cidr': subnet['cidr'],
+            'ip_version': subnet.get('ip_version'),
+            'gateway_ip': subnet.get('gateway_ip'),
+            'enable_dhcp': subnet.get('enable_dhcp', False),
+            'network_backend_id': subnet['network_id'],
+        } for subnet in subnets}
+
+    def _apply_subnets(self, subnets):
         with transaction.atomic():
-            cur_subnets = self._get_current_properties(models.SubNet)
-            for backend_subnet in subnets:
-                cur_subnets.pop(backend_subnet['id'], None)
+            networks = self.get_property_index(models.Network)
+            reconciler = self._get_property_reconciler(models.SubNet)
+            for backend_id, values in subnets.items():
+                values = values.copy()
+                network_backend_id = values.pop('network_backend_id')
                 try:
-                    network = models.Network.objects.get(
-                        settings=self.settings, backend_id=backend_subnet['network_id'])
-                except models.Network.DoesNotExist:
+                    network = networks[network_backend_id]
+                except KeyError:
                     raise OpenStackBackendError(
-                        'Cannot pull subnet for network with id "%s". Network is not pulled yet.')
-                defaults = {
-                    'name': backend_subnet['name'],
-                    'description': backend_subnet['description'],
-                    'allocation_pools': backend_subnet['allocation_pools'],
-                    'cidr': backend_subnet['cidr'],
-                    'ip_version': backend_subnet.get('ip_version'),
-                    'gateway_ip': backend_subnet.get('gateway_ip'),
-                    'enable_dhcp': backend_subnet.get('enable_dhcp', False),
-                    'network': network,
-                }
-                models.SubNet.objects.update_or_create(
-                    settings=self.settings,
-                    backend_id=backend_subnet['id'],
-                    defaults=defaults)
-
-            models.SubNet.objects.filter(backend_id__in=cur_subnets.keys()).delete()
+                        'Cannot pull subnet for network with id "%s". Network is not pulled yet.' %
+                        network_backend_id)
+                reconciler.add(backend_id, network_id=network.pk, **values)
+            reconciler.apply()
+            self.reset_property_index(models.SubNet)
 
     def _get_current_properties(self, model):
         return {p.backend_id: p for p in model.objects.filter(settings=self.settings)}
 
+    def _get_property_reconciler(self, model):
+        return BulkReconciler(model.objects.filter(settings=self.settings), settings=self.settings)
+
+    def get_property_index(self, model):
+        """ Map backend IDs to service properties of given model.
+
+            Index is built once per backend object, so it is shared by all pulls
+            of one synchronization pass, for example by all instances of PullServiceSettingsResources run.
+        """
+        if model not in self._property_indexes:
+            self._property_indexes[model] = self._get_current_properties(model)
+        return self._property_indexes[model]
+
+    def reset_property_index(self, model):
+        self._property_indexes.pop(model, None)
+
     @log_backend_action()
     def create_volume(self, volume):
         kwargs = {
@@ -343,13 +440,33 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
                 volume.device = backend_volume.attachments[0]['device']
         return volume
 
-    def get_volumes(self):
+    def _filter_changed_resources(self, backend_resources, changes_since):
+        """ Leave only resources that were updated after given time.
+
+            Cinder API v2 does not support changes-since filter, so resources are filtered by update time here.
+        """
+        changed_resources = []
+        for backend_resource in backend_resources:
+            updated_at = dateparse.parse_datetime(getattr(backend_resource, 'updated_at', None) or '')
+            if updated_at and timezone.is_naive(updated_at):
+                updated_at = timezone.make_aware(updated_at, timezone.utc)
+            if updated_at is None or updated_at >= changes_since:
+                changed_resources.append(backend_resource)
+        return changed_resources
+
+    def get_volume_pages(self, changes_since=None):
+        """ Yield tenant volumes page by page. Next page is downloaded while current one is processed. """
         cinder = self.cinder_client
         try:
-            backend_volumes = cinder.volumes.list()
+            for backend_volumes in prefetch(get_marker_pages(cinder.volumes.list)):
+                if changes_since:
+                    backend_volumes = self._filter_changed_resources(backend_volumes, changes_since)
+                yield [self._backend_volume_to_volume(backend_volume) for backend_volume in backend_volumes]
         except cinder_exceptions.ClientException as e:
             six.reraise(OpenStackBackendError, e)
-        return [self._backend_volume_to_volume(backend_volume) for backend_volume in backend_volumes]
+
+    def get_volumes(self, changes_since=None):
+        return [volume for volumes in self.get_volume_pages(changes_since) for volume in volumes]
 
     @log_backend_action()
     def pull_volume(self, volume, update_fields=None):
@@ -433,13 +550,19 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
                 service_project_link__service__settings=self.settings, backend_id=backend_snapshot.volume_id).first()
         return snapshot
 
-    def get_snapshots(self):
+    def get_snapshot_pages(self, changes_since=None):
+        """ Yield tenant snapshots page by page. Next page is downloaded while current one is processed. """
         cinder = self.cinder_client
         try:
-            backend_snapshots = cinder.volume_snapshots.list()
+            for backend_snapshots in prefetch(get_marker_pages(cinder.volume_snapshots.list)):
+                if changes_since:
+                    backend_snapshots = self._filter_changed_resources(backend_snapshots, changes_since)
+                yield [self._backend_snapshot_to_snapshot(backend_snapshot) for backend_snapshot in backend_snapshots]
         except cinder_exceptions.ClientException as e:
             six.reraise(OpenStackBackendError, e)
-        return [self._backend_snapshot_to_snapshot(backend_snapshot) for backend_snapshot in backend_snapshots]
+
+    def get_snapshots(self, changes_since=None):
+        return [snapshot for snapshots in self.get_snapshot_pages(changes_since) for snapshot in snapshots]
 
     @log_backend_action()
     def pull_snapshot(self, snapshot, update_fields=None):
@@ -495,8 +618,12 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
 
     @log_backend_action()
     def create_instance(self, instance, backend_flavor_id=None, public_key=None):
+        """ Submit server creation request to nova.
+
+            Method does not wait until server is built: executor polls its runtime state
+            and calls pull_created_instance when server becomes active.
+        """
         nova = self.nova_client
-        neutron = self.neutron_client
 
         try:
             backend_flavor = nova.flavors.get(backend_flavor_id)
@@ -555,15 +682,22 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
             server = nova.servers.create(**server_create_parameters)
 
             instance.backend_id = server.id
+            instance.runtime_state = server.status
             instance.save()
 
-            if not self._wait_for_instance_status(instance, nova, 'ACTIVE', 'ERROR'):
-                logger.error(
-                    "Failed to provision instance %s: timed out waiting "
-                    "for instance to become online",
-                    instance.uuid)
-                raise OpenStackBackendError("Timed out waiting for instance %s to provision" % instance.uuid)
+        except (nova_exceptions.ClientException, neutron_exceptions.NeutronClientException) as e:
+            logger.exception("Failed to provision instance %s", instance.uuid)
+            six.reraise(OpenStackBackendError, e)
+        else:
+            logger.info("Successfully submitted creation of instance %s", instance.uuid)
+
+    @log_backend_action()
+    def pull_created_instance(self, instance):
+        """ Pull internal IPs and security groups of instance that has been built by nova. """
+        nova = self.nova_client
+        neutron = self.neutron_client
 
+        try:
             # nova does not return enough information about internal IPs on creation,
             # we need to pull it additionally from neutron
             for internal_ip in instance.internal_ips_set.all():
@@ -574,7 +708,7 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
                 internal_ip.mac_address = backend_internal_ip['mac_address']
                 internal_ip.save()
 
-            backend_security_groups = server.list_security_group()
+            backend_security_groups = nova.servers.list_security_group(instance.backend_id)
             for bsg in backend_security_groups:
                 if instance.security_groups.filter(name=bsg.name).exists():
                     continue
@@ -589,7 +723,7 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
                     instance.security_groups.add(security_group)
 
         except (nova_exceptions.ClientException, neutron_exceptions.NeutronClientException) as e:
-            logger.exception("Failed to provision instance %s", instance.uuid)
+            logger.exception("Failed to pull created instance %s", instance.uuid)
             six.reraise(OpenStackBackendError, e)
         else:
             logger.info("Successfully provisioned instance %s", instance.uuid)
@@ -605,12 +739,13 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
             logger.exception(
                 'Failed to infer internal ip addresses of instance backend_id %s', instance_backend_id)
         else:
+            subnets = self.get_property_index(models.SubNet)
             for port in ports:
                 fixed_ip = port['fixed_ips'][0]
                 subnet_backend_id = fixed_ip['subnet_id']
                 try:
-                    subnet = models.SubNet.objects.get(settings=self.settings, backend_id=subnet_backend_id)
-                except models.SubNet.DoesNotExist:
+                    subnet = subnets[subnet_backend_id]
+                except KeyError:
                     # subnet was not pulled yet. Floating IP will be pulled with subnet later.
                     continue
 
@@ -723,31 +858,6 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
         except nova_exceptions.ClientException as e:
             six.reraise(OpenStackBackendError, e)
 
-    def _wait_for_instance_status(self, instance, nova, complete_status,
-                                  error_status=None, retries=300, poll_interval=3):
-        complete_state_predicate = lambda o: o.status == complete_status
-        if error_status is not None:
-            error_state_predicate = lambda o: o.status == error_status
-        else:
-            error_state_predicate = lambda _: False
-
-        for _ in range(retries):
-            obj = nova.servers.get(instance.backend_id)
-            logger.debug('Instance %s status: "%s"' % (obj, obj.status))
-            if instance.runtime_state != obj.status:
-                instance.runtime_state = obj.status
-                instance.save(update_fields=['runtime_state'])
-
-            if complete_state_predicate(obj):
-                return True
-
-            if error_state_predicate(obj):
-                return False
-
-            time.sleep(poll_interval)
-        else:
-            return False
-
     @log_backend_action()
     def update_instance(self, instance):
         nova = self.nova_client
@@ -816,20 +926,38 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
             backend_id=backend_instance.id,
         )
 
-    def get_instances(self):
+    def get_instance_pages(self, changes_since=None):
+        """ Yield tenant instances page by page. Next page is downloaded while current one is processed.
+
+            If changes_since is defined - get only instances that were changed since then.
+            Instances that were deleted since that time are returned with DELETED runtime state.
+        """
         nova = self.nova_client
+        search_opts = {}
+        if changes_since:
+            search_opts['changes-since'] = changes_since.isoformat()
+        deleted_states = (models.Instance.RuntimeStates.DELETED, models.Instance.RuntimeStates.SOFT_DELETED)
         try:
-            backend_instances = nova.servers.list()
-            backend_flavors = nova.flavors.list()
+            for backend_instances in prefetch(get_marker_pages(nova.servers.list, search_opts=search_opts)):
+                backend_flavors_map = self.get_flavors([instance.flavor['id'] for instance in backend_instances
+                                                        if instance.status not in deleted_states])
+                instances = []
+                for backend_instance in backend_instances:
+                    if backend_instance.status in deleted_states:
+                        instances.append(models.Instance(
+                            backend_id=backend_instance.id, runtime_state=models.Instance.RuntimeStates.DELETED))
+                        continue
+                    try:
+                        instance_flavor = backend_flavors_map[backend_instance.flavor['id']]
+                    except KeyError:
+                        raise OpenStackBackendError('Cannot find flavor with id %s' % backend_instance.flavor['id'])
+                    instances.append(self._backend_instance_to_instance(backend_instance, instance_flavor))
+                yield instances
         except nova_exceptions.ClientException as e:
             six.reraise(OpenStackBackendError, e)
 
-        backend_flavors_map = {flavor.id: flavor for flavor in backend_flavors}
-        instances = []
-        for backend_instance in backend_instances:
-            instance_flavor = backend_flavors_map[backend_instance.flavor['id']]
-            instances.append(self._backend_instance_to_instance(backend_instance, instance_flavor))
-        return instances
+    def get_instances(self, changes_since=None):
+        return [instance for instances in self.get_instance_pages(changes_since) for instance in instances]
 
     @log_backend_action()
     def pull_instance(self, instance, update_fields=None):
@@ -855,11 +983,12 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
         instance.internal_ips_set.exclude(backend_id__in=[ip['id'] for ip in backend_internal_ips]).delete()
 
         # add or update exist internal IPs
+        subnets = self.get_property_index(models.SubNet)
         for backend_internal_ip in backend_internal_ips:
             backend_subnet_id = backend_internal_ip['fixed_ips'][0]['subnet_id']
             try:
-                subnet = models.SubNet.objects.get(settings=self.settings, backend_id=backend_subnet_id)
-            except models.SubNet.DoesNotExist:
+                subnet = subnets[backend_subnet_id]
+            except KeyError:
                 # subnet was not pulled yet. Internal IP will be pulled with subnet later.
                 continue
             instance.internal_ips_set.update_or_create(
@@ -933,6 +1062,113 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
             else:
                 instance.security_groups.add(security_group)
 
+    def get_instances_network_resources(self):
+        """ List ports and floating IPs of the whole tenant at once.
+
+            Returns dictionary with ports grouped by device ID and floating IPs keyed by port ID,
+            so that network properties of many instances are pulled without requests per instance.
+        """
+        neutron = self.neutron_client
+        try:
+            results = fan_out({
+                'ports': lambda: [port for page in get_neutron_pages(
+                    neutron.list_ports, 'ports', tenant_id=self.tenant_id) for port in page],
+                'floating_ips': lambda: [ip for page in get_neutron_pages(
+                    neutron.list_floatingips, 'floatingips', tenant_id=self.tenant_id) for ip in page],
+            })
+        except neutron_exceptions.NeutronClientException as e:
+            six.reraise(OpenStackBackendError, e)
+
+        ports = {}
+        for port in results['ports']:
+            if port.get('fixed_ips'):
+                ports.setdefault(port['device_id'], []).append(port)
+        floating_ips = {ip['port_id']: ip for ip in results['floating_ips'] if ip.get('port_id')}
+        return {'ports': ports, 'floating_ips': floating_ips}
+
+    def pull_instances_network_properties(self, instances, network_resources):
+        """ Reconcile internal IPs, floating IPs and security groups of instances in bulk.
+
+            Instance security groups are taken from security groups of its ports.
+        """
+        with transaction.atomic():
+            internal_ip_ids = self._pull_instances_internal_ips(instances, network_resources['ports'])
+            self._pull_instances_floating_ips(instances, internal_ip_ids, network_resources['floating_ips'])
+            self._pull_instances_security_groups(instances, network_resources['ports'])
+
+    def _pull_instances_internal_ips(self, instances, ports):
+        """ Return dictionary that maps port IDs to primary keys of internal IPs. """
+        subnets = self.get_property_index(models.SubNet)
+        reconciler = BulkReconciler(models.InternalIP.objects.filter(instance__in=instances))
+        for instance in instances:
+            for port in ports.get(instance.backend_id, []):
+                fixed_ip = port['fixed_ips'][0]
+                subnet = subnets.get(fixed_ip['subnet_id'])
+                if subnet is None:
+                    # subnet was not pulled yet. Internal IP will be pulled with subnet later,
+                    # existing one is kept together with its floating IP.
+                    reconciler.keep(port['id'])
+                    continue
+                reconciler.add(
+                    port['id'],
+                    instance_id=instance.pk,
+                    subnet_id=subnet.pk,
+                    mac_address=port['mac_address'],
+                    ip4_address=fixed_ip['ip_address'])
+        reconciler.apply()
+
+        return dict(models.InternalIP.objects.filter(instance__in=instances).values_list('backend_id', 'pk'))
+
+    def _pull_instances_floating_ips(self, instances, internal_ip_ids, floating_ips):
+        backend_floating_ips = [ip for port_id, ip in floating_ips.items() if port_id in internal_ip_ids]
+        backend_ids = [ip['id'] for ip in backend_floating_ips]
+
+        # disconnect stale:
+        models.FloatingIP.objects.filter(internal_ip__instance__in=instances).exclude(
+            backend_id__in=backend_ids).update(internal_ip=None)
+
+        # create or update exist:
+        reconciler = BulkReconciler(
+            models.FloatingIP.objects.filter(settings=self.settings, backend_id__in=backend_ids),
+            settings=self.settings)
+        for backend_floating_ip in backend_floating_ips:
+            reconciler.add(
+                backend_floating_ip['id'],
+                runtime_state=backend_floating_ip['status'],
+                address=backend_floating_ip['floating_ip_address'],
+                backend_network_id=backend_floating_ip['floating_network_id'],
+                internal_ip_id=internal_ip_ids[backend_floating_ip['port_id']])
+        reconciler.apply()
+
+    def _pull_instances_security_groups(self, instances, ports):
+        security_groups = self.get_property_index(models.SecurityGroup)
+        security_group_backend_ids = {group.pk: backend_id for backend_id, group in security_groups.items()}
+        Binding = models.Instance.security_groups.through
+
+        current = {}
+        for binding_id, instance_id, group_id in Binding.objects.filter(instance__in=instances).values_list(
+                'id', 'instance_id', 'securitygroup_id'):
+            current[instance_id, group_id] = binding_id
+
+        pulled = set()
+        for instance in instances:
+            for port in ports.get(instance.backend_id, []):
+                for group_backend_id in port.get('security_groups', []):
+                    group = security_groups.get(group_backend_id)
+                    if group is None:
+                        logger.warning('Security group with id %s does not exist at NC. Settings: %s',
+                                       group_backend_id, self.settings)
+                        continue
+                    pulled.add((instance.pk, group.pk))
+
+        # groups that are not pushed to backend yet are kept
+        stale = [binding_id for (instance_id, group_id), binding_id in current.items()
+                 if (instance_id, group_id) not in pulled and security_group_backend_ids.get(group_id)]
+        if stale:
+            Binding.objects.filter(id__in=stale).delete()
+        Binding.objects.bulk_create([Binding(instance_id=instance_id, securitygroup_id=group_id)
+                                     for instance_id, group_id in pulled - set(current)])
+
     @log_backend_action()
     def push_instance_security_groups(self, instance):
         nova = self.nova_client
@@ -1041,6 +1277,66 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
             instance.runtime_state = backend_instance.status
             instance.save(update_fields=['runtime_state'])
 
+    def list_runtime_states(self, model, backend_ids, changes_since=None, states=None, max_get_requests=10):
+        """ Get runtime states of tenant resources with as few requests as possible.
+
+            Returns dictionary {backend_id: runtime state} for given backend IDs, resources
+            that do not exist at backend are mapped to None. Up to max_get_requests resources
+            are requested one by one, otherwise only instances that were changed since
+            changes_since and volumes or snapshots with given states are listed,
+            so resources that are not listed are omitted.
+        """
+        if model not in self.RUNTIME_STATE_MODELS:
+            raise NotImplementedError('Runtime states of %s could not be listed.' % model.__name__)
+
+        backend_ids = set(backend_ids)
+        if model is models.FloatingIP:
+            neutron = self.neutron_client
+            try:
+                backend_floating_ips = neutron.list_floatingips(id=list(backend_ids))['floatingips']
+            except neutron_exceptions.NeutronClientException as e:
+                six.reraise(OpenStackBackendError, e)
+            runtime_states = {floating_ip['id']: floating_ip['status'] for floating_ip in backend_floating_ips}
+            return {backend_id: runtime_states.get(backend_id) for backend_id in backend_ids}
+
+        if model is models.Instance:
+            manager = self.nova_client.servers
+            client_exception, not_found_exception = nova_exceptions.ClientException, nova_exceptions.NotFound
+        elif model is models.Volume:
+            manager = self.cinder_client.volumes
+            client_exception, not_found_exception = cinder_exceptions.ClientException, cinder_exceptions.NotFound
+        else:
+            manager = self.cinder_client.volume_snapshots
+            client_exception, not_found_exception = cinder_exceptions.ClientException, cinder_exceptions.NotFound
+
+        if len(backend_ids) <= max_get_requests:
+            def get_runtime_state(backend_id):
+                try:
+                    return manager.get(backend_id).status
+                except not_found_exception:
+                    return None
+
+            try:
+                return fan_out({backend_id: functools.partial(get_runtime_state, backend_id)
+                                for backend_id in backend_ids})
+            except client_exception as e:
+                six.reraise(OpenStackBackendError, e)
+
+        if model is models.Instance:
+            search_opts = {'changes-since': changes_since.isoformat()} if changes_since else {}
+            pages_list = [get_marker_pages(manager.list, search_opts=search_opts)]
+        elif states:
+            pages_list = [get_marker_pages(manager.list, search_opts={'status': state}) for state in states]
+        else:
+            pages_list = [get_marker_pages(manager.list)]
+
+        try:
+            return {backend_resource.id: backend_resource.status
+                    for pages in pages_list for backend_resources in pages for backend_resource in backend_resources
+                    if backend_resource.id in backend_ids}
+        except client_exception as e:
+            six.reraise(OpenStackBackendError, e)
+
     @log_backend_action()
     def confirm_instance_resize(self, instance):
         nova = self.nova_client
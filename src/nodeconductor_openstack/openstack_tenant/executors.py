@@ -23,7 +23,7 @@ class VolumeCreateExecutor(core_executors.CreateExecutor):
                 backend_pull_method='pull_volume_runtime_state',
                 success_state='available',
                 erred_state='error',
-            ).set(countdown=30)
+            )
         )
 
 
@@ -220,7 +220,7 @@ class SnapshotCreateExecutor(core_executors.CreateExecutor):
                 backend_pull_method='pull_snapshot_runtime_state',
                 success_state='available',
                 erred_state='error',
-            ).set(countdown=10)
+            )
         )
 
 
@@ -274,14 +274,15 @@ class InstanceCreateExecutor(core_executors.CreateExecutor):
         for serialized_volume in serialized_volumes:
             _tasks.append(tasks.ThrottleProvisionTask().si(
                 serialized_volume, 'create_volume', state_transition='begin_creating'))
-        for index, serialized_volume in enumerate(serialized_volumes):
-            # Wait for volume creation
-            _tasks.append(tasks.PollRuntimeStateTask().si(
-                serialized_volume,
-                backend_pull_method='pull_volume_runtime_state',
-                success_state='available',
-                erred_state='error',
-            ).set(countdown=30 if index == 0 else 0))
+        # Wait for creation of all volumes at once, Cinder builds them in parallel.
+        _tasks.append(tasks.PollRuntimeStatesBarrierTask().si(
+            serialized_instance,
+            serialized_volumes,
+            backend_pull_method='pull_volume_runtime_state',
+            success_state='available',
+            erred_state='error',
+        ))
+        for serialized_volume in serialized_volumes:
             # Pull volume to sure that it is bootable
             _tasks.append(core_tasks.BackendMethodTask().si(serialized_volume, 'pull_volume'))
             # Mark volume as OK
@@ -295,6 +296,15 @@ class InstanceCreateExecutor(core_executors.CreateExecutor):
         # Wait 10 seconds after volume creation due to OpenStack restrictions.
         _tasks.append(core_tasks.BackendMethodTask().si(
             serialized_instance, 'create_instance', **kwargs).set(countdown=10))
+        # Wait until nova builds the server, worker is not blocked meanwhile.
+        _tasks.append(tasks.PollRuntimeStateTask().si(
+            serialized_instance,
+            backend_pull_method='pull_instance_runtime_state',
+            success_state='ACTIVE',
+            erred_state='ERROR',
+        ))
+        # Pull internal IPs and security groups of built instance
+        _tasks.append(core_tasks.BackendMethodTask().si(serialized_instance, 'pull_created_instance'))
 
         # Update volumes runtime state and device name
         for serialized_volume in serialized_volumes:
@@ -311,13 +321,13 @@ class InstanceCreateExecutor(core_executors.CreateExecutor):
         # Push instance floating IPs
         _tasks.append(core_tasks.BackendMethodTask().si(serialized_instance, 'push_instance_floating_ips'))
         # Wait for operation completion
-        for index, floating_ip in enumerate(instance.floating_ips):
+        for floating_ip in instance.floating_ips:
             _tasks.append(tasks.PollRuntimeStateTask().si(
                 core_utils.serialize_instance(floating_ip),
                 backend_pull_method='pull_floating_ip_runtime_state',
                 success_state='ACTIVE',
                 erred_state='ERRED',
-            ).set(countdown=5 if not index else 0))
+            ))
         return chain(*_tasks)
 
     @classmethod
@@ -494,13 +504,13 @@ class InstanceFloatingIPsUpdateExecutor(core_executors.ActionExecutor):
         # Push instance floating IPs
         _tasks.append(core_tasks.BackendMethodTask().si(serialized_instance, 'push_instance_floating_ips'))
         # Wait for operation completion
-        for index, floating_ip in enumerate(instance.floating_ips):
+        for floating_ip in instance.floating_ips:
             _tasks.append(tasks.PollRuntimeStateTask().si(
                 core_utils.serialize_instance(floating_ip),
                 backend_pull_method='pull_floating_ip_runtime_state',
                 success_state='ACTIVE',
                 erred_state='ERRED',
-            ).set(countdown=5 if not index else 0))
+            ))
         # Pull floating IPs again to update state of disconnected IPs
         _tasks.append(core_tasks.IndependentBackendMethodTask().si(serialized_instance, 'pull_floating_ips'))
         return chain(*_tasks)
@@ -588,13 +598,13 @@ class BackupCreateExecutor(core_executors.CreateExecutor):
         for serialized_snapshot in serialized_snapshots:
             _tasks.append(tasks.ThrottleProvisionTask().si(
                 serialized_snapshot, 'create_snapshot', force=True, state_transition='begin_creating'))
-        for index, serialized_snapshot in enumerate(serialized_snapshots):
+        for serialized_snapshot in serialized_snapshots:
             _tasks.append(tasks.PollRuntimeStateTask().si(
                 serialized_snapshot,
                 backend_pull_method='pull_snapshot_runtime_state',
                 success_state='available',
                 erred_state='error',
-            ).set(countdown=10 if index == 0 else 0))
+            ))
             _tasks.append(core_tasks.StateTransitionTask().si(serialized_snapshot, state_transition='set_ok'))
 
         return chain(*_tasks)
@@ -655,14 +665,15 @@ class BackupRestorationExecutor(core_executors.CreateExecutor):
         for serialized_volume in serialized_volumes:
             _tasks.append(tasks.ThrottleProvisionTask().si(
                 serialized_volume, 'create_volume', state_transition='begin_creating'))
-        for index, serialized_volume in enumerate(serialized_volumes):
-            # Wait for volume creation
-            _tasks.append(tasks.PollRuntimeStateTask().si(
-                serialized_volume,
-                backend_pull_method='pull_volume_runtime_state',
-                success_state='available',
-                erred_state='error',
-            ).set(countdown=30 if index == 0 else 0))
+        # Wait for creation of all volumes at once, Cinder builds them in parallel.
+        _tasks.append(tasks.PollRuntimeStatesBarrierTask().si(
+            serialized_instance,
+            serialized_volumes,
+            backend_pull_method='pull_volume_runtime_state',
+            success_state='available',
+            erred_state='error',
+        ))
+        for serialized_volume in serialized_volumes:
             # Pull volume to sure that it is bootable
             _tasks.append(core_tasks.BackendMethodTask().si(serialized_volume, 'pull_volume'))
             # Mark volume as OK
@@ -672,6 +683,15 @@ class BackupRestorationExecutor(core_executors.CreateExecutor):
             serialized_instance, 'create_instance',
             backend_flavor_id=backup_restoration.flavor.backend_id
         ).set(countdown=10))
+        # Wait until nova builds the server, worker is not blocked meanwhile.
+        _tasks.append(tasks.PollRuntimeStateTask().si(
+            serialized_instance,
+            backend_pull_method='pull_instance_runtime_state',
+            success_state='ACTIVE',
+            erred_state='ERROR',
+        ))
+        # Pull internal IPs and security groups of built instance
+        _tasks.append(core_tasks.BackendMethodTask().si(serialized_instance, 'pull_created_instance'))
         return chain(*_tasks)
 
     @classmethod
@@ -696,7 +716,7 @@ class SnapshotRestorationExecutor(core_executors.CreateExecutor):
                 serialized_volume, 'create_volume', state_transition='begin_creating'),
             tasks.PollRuntimeStateTask().si(
                 serialized_volume, 'pull_volume_runtime_state', success_state='available', erred_state='error',
-            ).set(countdown=30),
+            ),
             core_tasks.BackendMethodTask().si(serialized_volume, 'pull_volume'),
         ]
 
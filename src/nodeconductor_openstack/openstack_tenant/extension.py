@@ -10,6 +10,28 @@ class OpenStackTenantExtension(NodeConductorExtension):
                 'OpenStack.Volume': 4,
                 'OpenStack.Snapshot': 4,
             },
+            # Only resources that were changed since previous pull are requested and updated.
+            # Full reconciliation that detects deleted resources is executed every FULL_PULL_INTERVAL hours.
+            'INCREMENTAL_PULL_ENABLED': True,
+            'FULL_PULL_INTERVAL': 6,
+            # Executors do not poll runtime state of each resource separately: waits are registered
+            # and checked together by openstacktenant-poll-runtime-states task, one list request
+            # per resource type of each tenant. Wait fails if state is not reached in TIMEOUT seconds.
+            # Up to MAX_GET_REQUESTS waited resources of the same type are requested one by one,
+            # otherwise volumes and snapshots are listed filtered by waited states.
+            # Wait fails at once if its resource does not exist at backend.
+            'RUNTIME_STATE_POLL': {
+                'ENABLED': True,
+                'TIMEOUT': 25 * 60,
+                'MAX_GET_REQUESTS': 10,
+            },
+            # Backoff policies of polling resources until target state, keyed by model name and target state,
+            # for example "OpenStackTenant.Instance:SHUTOFF", or by model name only, for example "OpenStack.Tenant".
+            # Delay starts from INITIAL_DELAY seconds and grows by FACTOR up to MAX_DELAY seconds,
+            # it is randomized by JITTER share. Defaults are defined by DEFAULT_POLICIES of openstack_base.polling,
+            # only parameters set here override them, for example {'DEFAULT': {'MAX_DELAY': 60}}.
+            # DEFAULT policy is used if there is no policy for model. Deletion checks use "deleted" target state.
+            'POLL_POLICIES': {},
         }
 
     @staticmethod
@@ -25,9 +47,16 @@ class OpenStackTenantExtension(NodeConductorExtension):
     def celery_tasks():
         from datetime import timedelta
         return {
+            # Pull interval of each settings is adaptive, this task only starts pulls that are due.
+            # Its schedule should match PULL_SCHEDULE['MIN_INTERVAL'] of NODECONDUCTOR_OPENSTACK settings.
             'openstacktenant-pull-resources': {
                 'task': 'openstack_tenant.PullResources',
-                'schedule': timedelta(minutes=30),
+                'schedule': timedelta(minutes=10),
+                'args': (),
+            },
+            'openstacktenant-poll-runtime-states': {
+                'task': 'openstack_tenant.PollRuntimeStates',
+                'schedule': timedelta(seconds=5),
                 'args': (),
             },
             'openstacktenant-schedule-backups': {
@@ -6,6 +6,7 @@ from nodeconductor.core.models import StateMixin
 from nodeconductor.structure import models as structure_models
 
 from ..openstack import models as openstack_models
+from ..openstack_base.scheduling import pull_tracker
 from . import log, models
 
 
@@ -70,6 +71,16 @@ def log_action(sender, instance, created=False, **kwargs):
             resource, resource.tracker.previous('action'), resource.tracker.previous('action_details'))
 
 
+def speed_up_pull_on_user_action(sender, instance, created=False, **kwargs):
+    """ Resources of service settings are pulled more often while users work with them. """
+    resource = instance
+    scheduled_states = (StateMixin.States.CREATION_SCHEDULED,
+                        StateMixin.States.UPDATE_SCHEDULED,
+                        StateMixin.States.DELETION_SCHEDULED)
+    if resource.state in scheduled_states and (created or resource.tracker.has_changed('state')):
+        pull_tracker.record_user_action(resource.service_project_link.service.settings.uuid.hex)
+
+
 def log_snapshot_schedule_creation(sender, instance, created=False, **kwargs):
     if not created:
         return
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-17 07:08
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import jsonfield.fields
+import model_utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('structure', '0043_servicesettings_geolocations'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('openstack_tenant', '0023_remove_instance_external_ip'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RuntimeStateWait',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('object_id', models.PositiveIntegerField()),
+                ('backend_pull_method', models.CharField(max_length=255)),
+                ('success_state', models.CharField(max_length=150)),
+                ('erred_state', models.CharField(max_length=150)),
+                ('task_id', models.CharField(help_text='ID of poll task that has suspended the chain.', max_length=255)),
+                ('callbacks', jsonfield.fields.JSONField(default=[])),
+                ('errbacks', jsonfield.fields.JSONField(default=[])),
+                ('deadline', models.DateTimeField()),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Number of checks of runtime state.')),
+                ('next_check_at', models.DateTimeField(help_text='Time of the next check defined by poll policy.', null=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.ContentType')),
+                ('service_settings', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='structure.ServiceSettings')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -2,6 +2,8 @@ from __future__ import unicode_literals
 
 from urlparse import urlparse
 
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
 from django.core.validators import RegexValidator
 from django.db import models
 from django.utils.encoding import python_2_unicode_compatible
@@ -371,3 +373,30 @@ class InternalIP(openstack_base_models.Port):
     # So another related name should be used.
     instance = models.ForeignKey(Instance, related_name='internal_ips_set')
     subnet = models.ForeignKey(SubNet, related_name='internal_ips')
+
+
+@python_2_unicode_compatible
+class RuntimeStateWait(TimeStampedModel):
+    """ Executor chain that is suspended until resource reaches success or erred runtime state.
+
+        Waits are checked by PollRuntimeStates task in batches, one list request per resource type
+        of each service settings, and remaining tasks of the chain are applied afterwards.
+        Waits registered by the same task are barrier: chain is resumed when all of them
+        are over and fails as soon as any of them fails.
+    """
+    content_type = models.ForeignKey(ContentType)
+    object_id = models.PositiveIntegerField()
+    resource = GenericForeignKey('content_type', 'object_id')
+    service_settings = models.ForeignKey(structure_models.ServiceSettings, related_name='+')
+    backend_pull_method = models.CharField(max_length=255)
+    success_state = models.CharField(max_length=150)
+    erred_state = models.CharField(max_length=150)
+    task_id = models.CharField(max_length=255, help_text='ID of poll task that has suspended the chain.')
+    callbacks = JSONField(default=[])
+    errbacks = JSONField(default=[])
+    deadline = models.DateTimeField()
+    attempts = models.PositiveIntegerField(default=0, help_text='Number of checks of runtime state.')
+    next_check_at = models.DateTimeField(null=True, help_text='Time of the next check defined by poll policy.')
+
+    def __str__(self):
+        return 'Wait for %s state of %s %s' % (self.success_state, self.content_type.model, self.object_id)
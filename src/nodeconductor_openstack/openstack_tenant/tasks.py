@@ -1,11 +1,17 @@
 from __future__ import unicode_literals
 
+import functools
 import logging
 
 from datetime import timedelta
 
+from celery import Task as CeleryTask, signature
+from celery.exceptions import Ignore
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
 from nodeconductor.core import tasks as core_tasks, models as core_models, utils as core_utils
@@ -13,7 +19,12 @@ from nodeconductor.quotas import exceptions as quotas_exceptions
 from nodeconductor.structure import (models as structure_models, ServiceBackendError, tasks as structure_tasks,
                                      SupportedServices)
 
-from nodeconductor_openstack.openstack_base.backend import update_pulled_fields
+from nodeconductor_openstack.openstack_base.backend import set_pulled_fields
+from nodeconductor_openstack.openstack_base.engine import io_engine
+from nodeconductor_openstack.openstack_base.polling import get_poll_policy, poll_stats
+from nodeconductor_openstack.openstack_base.scheduling import (
+    backend_slot, get_countdown, get_schedule_settings, pull_tracker, retry_without_slot)
+from nodeconductor_openstack.openstack_base.utils import bulk_update, get_chunks
 
 from . import models, apps, serializers
 
@@ -25,7 +36,27 @@ class RuntimeStateException(Exception):
     pass
 
 
+def get_runtime_state_poll_settings():
+    nc_settings = getattr(settings, 'NODECONDUCTOR_OPENSTACK_TENANT', {})
+    poll_settings = {
+        'ENABLED': True,
+        'TIMEOUT': 25 * 60,
+        'MAX_GET_REQUESTS': 10,
+    }
+    poll_settings.update(nc_settings.get('RUNTIME_STATE_POLL', {}))
+    return poll_settings
+
+
 class PollRuntimeStateTask(core_tasks.Task):
+    """ Wait until instance reaches success or erred runtime state.
+
+        If batched polling is enabled task does not poll backend itself: it registers
+        the wait and suspends the chain, PollRuntimeStates task checks waits of each
+        service settings together and applies remaining tasks of the chain.
+        Synchronously executed tasks and resources which runtime states could not be
+        requested by PollRuntimeStates are polled by the task itself with retries.
+        Delays between polls are defined by poll policy of model and success state.
+    """
     max_retries = 300
     default_retry_delay = 5
 
@@ -37,15 +68,76 @@ class PollRuntimeStateTask(core_tasks.Task):
         return instance.get_backend()
 
     def execute(self, instance, backend_pull_method, success_state, erred_state):
-        backend = self.get_backend(instance)
-        getattr(backend, backend_pull_method)(instance)
-        instance.refresh_from_db()
-        if instance.runtime_state not in (success_state, erred_state):
-            self.retry()
-        elif instance.runtime_state == erred_state:
-            raise RuntimeStateException(
-                '%s %s (PK: %s) runtime state become erred: %s' % (
-                    instance.__class__.__name__, instance, instance.pk, erred_state))
+        self.wait_for([instance], backend_pull_method, success_state, erred_state)
+        return instance
+
+    def wait_for(self, resources, backend_pull_method, success_state, erred_state):
+        if self.is_suspendable(resources):
+            self.suspend(resources, backend_pull_method, success_state, erred_state)
+        pending = []
+        for resource in resources:
+            backend = self.get_backend(resource)
+            getattr(backend, backend_pull_method)(resource)
+            resource.refresh_from_db()
+            if resource.runtime_state == erred_state:
+                raise RuntimeStateException(
+                    '%s %s (PK: %s) runtime state become erred: %s' % (
+                        resource.__class__.__name__, resource, resource.pk, erred_state))
+            elif resource.runtime_state != success_state:
+                pending.append(resource)
+        if pending:
+            policy = get_poll_policy(pending[0].__class__, success_state)
+            self.retry(countdown=policy.get_delay(self.request.retries))
+
+    def is_suspendable(self, resources):
+        if not get_runtime_state_poll_settings()['ENABLED'] or self.request.is_eager:
+            return False
+        return all(isinstance(resource, getattr(self.get_backend(resource), 'RUNTIME_STATE_MODELS', ()))
+                   for resource in resources)
+
+    def suspend(self, resources, backend_pull_method, success_state, erred_state):
+        timeout = get_runtime_state_poll_settings()['TIMEOUT']
+        waits = []
+        for resource in resources:
+            if isinstance(resource, structure_models.ServiceProperty):
+                service_settings = resource.settings
+            else:
+                service_settings = resource.service_project_link.service.settings
+            policy = get_poll_policy(resource.__class__, success_state)
+            waits.append(models.RuntimeStateWait(
+                content_type=ContentType.objects.get_for_model(resource),
+                object_id=resource.pk,
+                service_settings=service_settings,
+                backend_pull_method=backend_pull_method,
+                success_state=success_state,
+                erred_state=erred_state,
+                task_id=self.request.id,
+                callbacks=self.request.callbacks or [],
+                errbacks=self.request.errbacks or [],
+                deadline=timezone.now() + timedelta(seconds=timeout),
+                next_check_at=timezone.now() + timedelta(seconds=policy.get_delay(0)),
+            ))
+        # Waits of barrier are created at once, so they are never checked partially.
+        models.RuntimeStateWait.objects.bulk_create(waits)
+        # Ignored task does not apply its callbacks, they are applied when the wait is over.
+        raise Ignore()
+
+
+class PollRuntimeStatesBarrierTask(PollRuntimeStateTask):
+    """ Wait until all given resources of instance reach success runtime state.
+
+        Resources are polled together, so the chain proceeds as soon as the slowest
+        of them is ready. Task fails if any resource reaches erred runtime state.
+    """
+
+    @classmethod
+    def get_description(cls, instance, serialized_resources, backend_pull_method, *args, **kwargs):
+        return 'Poll %s resources of instance "%s" with method "%s"' % (
+            len(serialized_resources), instance, backend_pull_method)
+
+    def execute(self, instance, serialized_resources, backend_pull_method, success_state, erred_state):
+        resources = [core_utils.deserialize_instance(resource) for resource in serialized_resources]
+        self.wait_for(resources, backend_pull_method, success_state, erred_state)
         return instance
 
 
@@ -70,6 +162,7 @@ class SetInstanceErredTask(core_tasks.ErrorStateTransitionTask):
         super(SetInstanceErredTask, self).execute(instance)
 
         # delete volumes if they were not created on backend,
+        # mark as OK if they have been created while other volumes were provisioned,
         # mark as erred if creation was started, but not ended,
         # leave as is, if they are OK.
         for volume in instance.volumes.all():
@@ -77,6 +170,9 @@ class SetInstanceErredTask(core_tasks.ErrorStateTransitionTask):
                 volume.delete()
             elif volume.state == models.Volume.States.OK:
                 pass
+            elif volume.state == models.Volume.States.CREATING and volume.runtime_state == 'available':
+                volume.set_ok()
+                volume.save(update_fields=['state'])
             else:
                 volume.set_erred()
                 volume.save(update_fields=['state'])
@@ -125,6 +221,7 @@ class SetBackupRestorationErredTask(core_tasks.ErrorStateTransitionTask):
         instance = backup_restoration.instance
         super(SetBackupRestorationErredTask, self).execute(instance)
         # delete volumes if they were not created on backend,
+        # mark as OK if they have been created while other volumes were provisioned,
         # mark as erred if creation was started, but not ended,
         # leave as is, if they are OK.
         for volume in instance.volumes.all():
@@ -132,6 +229,9 @@ class SetBackupRestorationErredTask(core_tasks.ErrorStateTransitionTask):
                 volume.delete()
             elif volume.state == models.Volume.States.OK:
                 pass
+            elif volume.state == models.Volume.States.CREATING and volume.runtime_state == 'available':
+                volume.set_ok()
+                volume.save(update_fields=['state'])
             else:
                 volume.set_erred()
                 volume.save(update_fields=['state'])
@@ -157,79 +257,151 @@ class PullResources(core_tasks.BackgroundTask):
     def run(self):
         type = apps.OpenStackTenantConfig.service_name
         ok_state = structure_models.ServiceSettings.States.OK
+        tick = get_schedule_settings()['MIN_INTERVAL']
         for service_settings in structure_models.ServiceSettings.objects.filter(type=type, state=ok_state):
+            # Interval of each settings depends on its churn, so only settings that are due are pulled.
+            if not pull_tracker.is_due(service_settings.uuid.hex):
+                continue
             serialized_service_settings = core_utils.serialize_instance(service_settings)
-            PullServiceSettingsResources().delay(serialized_service_settings)
+            # Pulls are spread over interval to avoid simultaneous load of all tenants.
+            PullServiceSettingsResources().apply_async(
+                args=(serialized_service_settings,), countdown=get_countdown(service_settings.uuid.hex, interval=tick))
 
 
 class PullServiceSettingsResources(core_tasks.BackgroundTask):
     name = 'openstack_tenant.PullServiceSettingsResources'
     stable_states = (core_models.StateMixin.States.OK, core_models.StateMixin.States.ERRED)
+    # Changes are requested with margin to tolerate clock skew between NodeConductor and OpenStack.
+    changes_since_margin = timedelta(minutes=5)
 
     def is_equal(self, other_task, serialized_service_settings):
         return self.name == other_task.get('name') and serialized_service_settings in other_task.get('args', [])
 
-    def run(self, serialized_service_settings):
+    def run(self, serialized_service_settings, slot_retries=0):
         service_settings = core_utils.deserialize_instance(serialized_service_settings)
+        with backend_slot(service_settings.backend_url) as acquired:
+            if not acquired:
+                if not retry_without_slot(self, (serialized_service_settings,), slot_retries):
+                    logger.info('Pull of resources for service settings %s is skipped, because too many pulls '
+                                'are running against %s.' % (service_settings, service_settings.backend_url))
+                return
+            self.pull(service_settings)
+
+    def pull(self, service_settings):
         backend = service_settings.get_backend()
+        pull_started_at = timezone.now()
+        pull_state = self.get_pull_state(service_settings)
+        changes_since = None if self.is_full_pull_required(pull_state) else pull_state['changes_since']
         try:
-            self.pull_volumes(service_settings, backend)
-            self.pull_snapshots(service_settings, backend)
-            self.pull_instances(service_settings, backend)
+            changes_count = sum([
+                self.pull_volumes(service_settings, backend, changes_since),
+                self.pull_snapshots(service_settings, backend, changes_since),
+                self.pull_instances(service_settings, backend, changes_since),
+            ])
         except ServiceBackendError as e:
             logger.error('Failed to pull resources for service settings: %s. Error: %s' % (service_settings, e))
             service_settings.set_erred()
             service_settings.error_message = str(e)
             service_settings.save()
-
-    def pull_volumes(self, service_settings, backend):
-        backend_volumes = backend.get_volumes()
-        volumes = models.Volume.objects.filter(
-            service_project_link__service__settings=service_settings, state__in=self.stable_states)
-        backend_volumes_map = {backend_volume.backend_id: backend_volume for backend_volume in backend_volumes}
-        for volume in volumes:
-            try:
-                backend_volume = backend_volumes_map[volume.backend_id]
-            except KeyError:
-                self._set_erred(volume)
-            else:
-                self._update(volume, backend_volume, backend.VOLUME_UPDATE_FIELDS)
-
-    def pull_snapshots(self, service_settings, backend):
-        backend_snapshots = backend.get_snapshots()
-        snapshots = models.Snapshot.objects.filter(
+        else:
+            pull_state['changes_since'] = pull_started_at - self.changes_since_margin
+            if changes_since is None:
+                pull_state['full_pull_at'] = pull_started_at
+            cache.set(self._get_pull_state_key(service_settings), pull_state, None)
+            pull_tracker.record_pull(service_settings.uuid.hex, changes_count)
+
+    @staticmethod
+    def _get_pull_state_key(service_settings):
+        return 'openstack_tenant_pull_state_%s' % service_settings.uuid.hex
+
+    def get_pull_state(self, service_settings):
+        """ Get high-water mark of the last successful pull and time of the last full reconciliation. """
+        return cache.get(self._get_pull_state_key(service_settings)) or {}
+
+    def is_full_pull_required(self, pull_state):
+        """ Incremental pull does not detect volumes and snapshots deletion,
+            so full reconciliation is executed periodically anyway.
+        """
+        nc_settings = getattr(settings, 'NODECONDUCTOR_OPENSTACK_TENANT', {})
+        if not nc_settings.get('INCREMENTAL_PULL_ENABLED', True):
+            return True
+        if not pull_state.get('changes_since') or not pull_state.get('full_pull_at'):
+            return True
+        full_pull_interval = timedelta(hours=nc_settings.get('FULL_PULL_INTERVAL', 6))
+        return pull_state['full_pull_at'] + full_pull_interval < timezone.now()
+
+    def _pull_resources(self, model, service_settings, backend_pages, fields, changes_since):
+        """ Update resources page by page as pages are received from backend.
+
+            Returns number of changed resources, including resources that became erred.
+            Only IDs of pulled resources are kept until the end of the stream,
+            resources that are missing at backend are detected by full pull only.
+        """
+        resources = model.objects.filter(
             service_project_link__service__settings=service_settings, state__in=self.stable_states)
-        backend_snapshots_map = {backend_snapshot.backend_id: backend_snapshot
-                                 for backend_snapshot in backend_snapshots}
-        for snapshot in snapshots:
-            try:
-                backend_snapshot = backend_snapshots_map[snapshot.backend_id]
-            except KeyError:
-                self._set_erred(snapshot)
-            else:
-                self._update(snapshot, backend_snapshot, backend.SNAPSHOT_UPDATE_FIELDS)
-
-    def pull_instances(self, service_settings, backend):
-        backend_instances = backend.get_instances()
+        pulled_ids = set()
+        changes_count = 0
+        for backend_resources in backend_pages:
+            backend_resources_map = {backend_resource.backend_id: backend_resource
+                                     for backend_resource in backend_resources}
+            pulled_ids.update(backend_resources_map.keys())
+            changes = []
+            for resource in resources.filter(backend_id__in=backend_resources_map.keys()):
+                backend_resource = backend_resources_map[resource.backend_id]
+                if backend_resource.runtime_state == models.Instance.RuntimeStates.DELETED:
+                    if self._set_erred(resource):
+                        changes_count += 1
+                    continue
+                changed_fields = self._update(resource, backend_resource, fields)
+                if changed_fields:
+                    changes.append((resource, changed_fields))
+
+            bulk_update(changes)
+            changes_count += len(changes)
+            recovered_count = len([1 for _, changed_fields in changes if 'state' in changed_fields])
+            logger.info('%s resources of service settings %s are pulled from backend: %s received, '
+                        '%s changed, %s recovered from erred state.', model.__name__, service_settings,
+                        len(backend_resources), len(changes), recovered_count)
+
+        if changes_since is None:
+            for resource in resources:
+                if resource.backend_id not in pulled_ids and self._set_erred(resource):
+                    changes_count += 1
+
+        return changes_count
+
+    def pull_volumes(self, service_settings, backend, changes_since=None):
+        return self._pull_resources(models.Volume, service_settings, backend.get_volume_pages(changes_since),
+                                    backend.VOLUME_UPDATE_FIELDS, changes_since)
+
+    def pull_snapshots(self, service_settings, backend, changes_since=None):
+        return self._pull_resources(models.Snapshot, service_settings, backend.get_snapshot_pages(changes_since),
+                                    backend.SNAPSHOT_UPDATE_FIELDS, changes_since)
+
+    def pull_instances(self, service_settings, backend, changes_since=None):
+        changes_count = self._pull_resources(
+            models.Instance, service_settings, backend.get_instance_pages(changes_since),
+            backend.INSTANCE_UPDATE_FIELDS, changes_since)
+
+        # Ports and floating IPs are listed once for the whole tenant instead of per instance.
+        # Network properties of all instances are reconciled, because changes of ports
+        # and floating IPs are not reported by changes-since filter of Nova.
+        network_resources = backend.get_instances_network_resources()
         instances = models.Instance.objects.filter(
-            service_project_link__service__settings=service_settings, state__in=self.stable_states)
-        backend_instances_map = {backend_instance.backend_id: backend_instance
-                                 for backend_instance in backend_instances}
-        for instance in instances:
-            try:
-                backend_instance = backend_instances_map[instance.backend_id]
-            except KeyError:
-                self._set_erred(instance)
-            else:
-                self._update(instance, backend_instance, backend.INSTANCE_UPDATE_FIELDS)
-                backend.pull_instance_security_groups(instance)
-                backend.pull_instance_internal_ips(instance)
-                backend.pull_instance_floating_ips(instance)
+            service_project_link__service__settings=service_settings, state=core_models.StateMixin.States.OK)
+        for chunk in get_chunks(instances.iterator()):
+            backend.pull_instances_network_properties(chunk, network_resources)
+
+        return changes_count
 
     def _set_erred(self, resource):
+        """ Mark resource that does not exist at backend as erred, return False if it is marked already. """
+        message = 'Does not exist at backend.'
+        if (resource.state == core_models.StateMixin.States.ERRED and not resource.runtime_state and
+                message in resource.error_message):
+            return False
         resource.set_erred()
         resource.runtime_state = ''
-        message = 'Does not exist at backend.'
         if message not in resource.error_message:
             if not resource.error_message:
                 resource.error_message = message
@@ -238,15 +410,225 @@ class PullServiceSettingsResources(core_tasks.BackgroundTask):
         resource.save()
         logger.warning('%s %s (PK: %s) does not exist at backend.' % (
             resource.__class__.__name__, resource, resource.pk))
+        return True
 
     def _update(self, resource, backend_resource, fields):
-        update_pulled_fields(resource, backend_resource, fields)
+        """ Update resource in memory and return names of changed fields, they are saved in bulk. """
+        changed_fields = set_pulled_fields(resource, backend_resource, fields)
         if resource.state == core_models.StateMixin.States.ERRED:
             resource.recover()
             resource.error_message = ''
-            resource.save(update_fields=['state', 'error_message'])
-        logger.info('%s %s (PK: %s) successfully pulled from backend.' % (
-            resource.__class__.__name__, resource, resource.pk))
+            changed_fields += [field for field in ('state', 'error_message') if field not in changed_fields]
+        return changed_fields
+
+
+class PollRuntimeStates(core_tasks.BackgroundTask):
+    """ Start checks of runtime states that are waited by executors.
+
+        Waits of each service settings are checked by separate task,
+        so load of backend and broker depends on number of tenants, not resources.
+        Only service settings that have waits due to be checked are polled.
+        If I/O engine is enabled waits of all service settings are checked by this task,
+        runtime states of different tenants are requested concurrently by the engine.
+    """
+    name = 'openstack_tenant.PollRuntimeStates'
+
+    def is_equal(self, other_task):
+        return self.name == other_task.get('name')
+
+    def run(self):
+        due_waits = models.RuntimeStateWait.objects.filter(
+            Q(next_check_at__isnull=True) | Q(next_check_at__lte=timezone.now()))
+        settings_ids = due_waits.values_list('service_settings', flat=True).distinct()
+        service_settings_list = structure_models.ServiceSettings.objects.filter(id__in=settings_ids)
+        if io_engine.is_enabled():
+            PollServiceSettingsRuntimeStates().poll(list(service_settings_list))
+            return
+        for service_settings in service_settings_list:
+            serialized_service_settings = core_utils.serialize_instance(service_settings)
+            PollServiceSettingsRuntimeStates().delay(serialized_service_settings)
+
+
+class PollServiceSettingsRuntimeStates(CeleryTask):
+    """ Check runtime states of resources waited by executors and resume their chains.
+
+        Runtime states of few resources are requested one by one, otherwise with
+        one filtered list request per resource type.
+        Waits that are not checked yet are rescheduled according to their poll policies.
+        Service settings are skipped if the previous check of their waits is still running.
+    """
+    name = 'openstack_tenant.PollServiceSettingsRuntimeStates'
+    batched_pull_methods = {
+        'pull_volume_runtime_state': models.Volume,
+        'pull_snapshot_runtime_state': models.Snapshot,
+        'pull_instance_runtime_state': models.Instance,
+        'pull_floating_ip_runtime_state': models.FloatingIP,
+    }
+    lock_timeout = 10 * 60
+    # Instance changes are requested with margin to tolerate clock skew between NodeConductor and OpenStack.
+    changes_since_margin = timedelta(minutes=5)
+
+    def run(self, serialized_service_settings):
+        service_settings = core_utils.deserialize_instance(serialized_service_settings)
+        self.poll([service_settings])
+
+    def _get_lock_key(self, service_settings):
+        return 'openstack_tenant_poll_runtime_states_%s' % service_settings.uuid.hex
+
+    def poll(self, service_settings_list):
+        locked = [service_settings for service_settings in service_settings_list
+                  if cache.add(self._get_lock_key(service_settings), True, self.lock_timeout)]
+        try:
+            self.check_waits(locked)
+        finally:
+            cache.delete_many([self._get_lock_key(service_settings) for service_settings in locked])
+
+    def check_waits(self, service_settings_list):
+        jobs = []
+        now = timezone.now()
+        for service_settings in service_settings_list:
+            waits = models.RuntimeStateWait.objects.filter(
+                Q(next_check_at__isnull=True) | Q(next_check_at__lte=now),
+                service_settings=service_settings,
+            ).select_related('content_type')
+            waits_per_model = {}
+            for wait in waits:
+                waits_per_model.setdefault(wait.content_type.model_class(), []).append(wait)
+            if not waits_per_model:
+                continue
+            resources_per_model = {model: model.objects.in_bulk([wait.object_id for wait in model_waits])
+                                   for model, model_waits in waits_per_model.items()}
+            jobs.append((service_settings, service_settings.get_backend(), waits_per_model, resources_per_model))
+
+        # Backend is only requested by fetch calls, so runtime states of different
+        # service settings could be requested concurrently, database is updated by this thread.
+        runtime_states = io_engine.map({
+            index: functools.partial(self.fetch_runtime_states, backend, waits_per_model, resources_per_model)
+            for index, (_, backend, waits_per_model, resources_per_model) in enumerate(jobs)
+        })
+
+        for index, (service_settings, backend, waits_per_model, resources_per_model) in enumerate(jobs):
+            for model, model_waits in waits_per_model.items():
+                resources = resources_per_model[model]
+                missing_backend_ids = set()
+                try:
+                    missing_backend_ids = self.pull_runtime_states(
+                        backend, model, model_waits, resources, runtime_states[index][model])
+                except ServiceBackendError as e:
+                    # Waits are checked again according to their policies until deadline.
+                    logger.warning('Failed to pull runtime states of %s for service settings %s. Error: %s',
+                                   model.__name__, service_settings, e)
+                self.check_model_waits(model, model_waits, resources, missing_backend_ids)
+
+    def _get_batched_resources(self, model, waits, resources):
+        return [resources[wait.object_id] for wait in waits
+                if wait.object_id in resources and self.batched_pull_methods.get(wait.backend_pull_method) is model]
+
+    def fetch_runtime_states(self, backend, waits_per_model, resources_per_model):
+        """ Request runtime states of resources that could be pulled in batch.
+
+            Returns dictionary {model: {backend_id: runtime state}} or {model: error}
+            if runtime states of model could not be requested.
+        """
+        runtime_states = {}
+        for model, waits in waits_per_model.items():
+            batched_resources = self._get_batched_resources(model, waits, resources_per_model[model])
+            if not batched_resources:
+                runtime_states[model] = {}
+                continue
+            changes_since = min(wait.created for wait in waits) - self.changes_since_margin
+            states = {wait.success_state for wait in waits} | {wait.erred_state for wait in waits}
+            try:
+                runtime_states[model] = backend.list_runtime_states(
+                    model, [resource.backend_id for resource in batched_resources],
+                    changes_since=changes_since, states=states,
+                    max_get_requests=get_runtime_state_poll_settings()['MAX_GET_REQUESTS'])
+            except ServiceBackendError as e:
+                runtime_states[model] = e
+        return runtime_states
+
+    def pull_runtime_states(self, backend, model, waits, resources, runtime_states):
+        """ Update runtime states of waited resources, pull resources that could not be pulled in batch.
+
+            Returns backend IDs of resources that do not exist at backend.
+        """
+        for wait in waits:
+            resource = resources.get(wait.object_id)
+            if resource is not None and self.batched_pull_methods.get(wait.backend_pull_method) is not model:
+                getattr(backend, wait.backend_pull_method)(resource)
+                resource.refresh_from_db()
+
+        if isinstance(runtime_states, ServiceBackendError):
+            raise runtime_states
+        missing_backend_ids = set()
+        for resource in self._get_batched_resources(model, waits, resources):
+            if resource.backend_id not in runtime_states:
+                continue
+            runtime_state = runtime_states[resource.backend_id]
+            if runtime_state is None:
+                missing_backend_ids.add(resource.backend_id)
+            elif runtime_state != resource.runtime_state:
+                resource.runtime_state = runtime_state
+                resource.save(update_fields=['runtime_state'])
+        return missing_backend_ids
+
+    def check_model_waits(self, model, waits, resources, missing_backend_ids=()):
+        now = timezone.now()
+        for wait in waits:
+            resource = resources.get(wait.object_id)
+            if resource is None:
+                self.fail(wait, RuntimeStateException(
+                    '%s (PK: %s) does not exist anymore.' % (model.__name__, wait.object_id)))
+            elif resource.backend_id in missing_backend_ids:
+                self.fail(wait, RuntimeStateException(
+                    '%s %s (PK: %s) does not exist at backend.' % (model.__name__, resource, resource.pk)))
+            elif resource.runtime_state == wait.success_state:
+                self.resume(wait, resource)
+            elif resource.runtime_state == wait.erred_state:
+                self.fail(wait, RuntimeStateException(
+                    '%s %s (PK: %s) runtime state become erred: %s' % (
+                        model.__name__, resource, resource.pk, wait.erred_state)))
+            elif wait.deadline < now:
+                self.fail(wait, RuntimeStateException(
+                    '%s %s (PK: %s) has not reached runtime state %s in time. Current runtime state: %s' % (
+                        model.__name__, resource, resource.pk, wait.success_state, resource.runtime_state)))
+            else:
+                wait.attempts += 1
+                delay = get_poll_policy(model, wait.success_state).get_delay(wait.attempts)
+                wait.next_check_at = now + timedelta(seconds=delay)
+                # Wait could be already cancelled by failed wait of the same barrier.
+                models.RuntimeStateWait.objects.filter(pk=wait.pk).update(
+                    attempts=wait.attempts, next_check_at=wait.next_check_at)
+
+    def _claim(self, wait, succeeded):
+        """ Delete wait, so that its chain is resumed only once even if checks overlap. """
+        deleted, _ = models.RuntimeStateWait.objects.filter(pk=wait.pk).delete()
+        if deleted:
+            policy = get_poll_policy(wait.content_type.model_class(), wait.success_state)
+            duration = (timezone.now() - wait.created).total_seconds()
+            poll_stats.record(policy.key, succeeded, wait.attempts + 1, duration)
+        return deleted > 0
+
+    def resume(self, wait, resource):
+        if not self._claim(wait, succeeded=True):
+            return
+        # Waits of the same task form a barrier, the chain is resumed after the last of them.
+        if models.RuntimeStateWait.objects.filter(task_id=wait.task_id).exists():
+            return
+        serialized_resource = core_utils.serialize_instance(resource)
+        for callback in wait.callbacks:
+            signature(callback, app=self.app).apply_async((serialized_resource,))
+
+    def fail(self, wait, exception):
+        if not self._claim(wait, succeeded=False):
+            return
+        models.RuntimeStateWait.objects.filter(task_id=wait.task_id).delete()
+        logger.warning('Wait of runtime state of %s (PK: %s) has failed. Error: %s',
+                       wait.content_type.model, wait.object_id, exception)
+        # Error callbacks read error message from result of the suspended task.
+        self.app.backend.mark_as_failure(wait.task_id, exception, traceback='')
+        for errback in wait.errbacks:
+            signature(errback, app=self.app).apply_async((wait.task_id,))
 
 
 class BaseScheduleTask(core_tasks.BackgroundTask):
@@ -0,0 +1,186 @@
+""" In-memory fakes of nova, neutron, cinder and glance clients used by benchmarks.
+
+    Fakes implement only calls that are made by OpenStackTenantBackend during
+    synchronization, but support pagination the same way as real clients do.
+"""
+import uuid
+
+
+class FakeResource(object):
+
+    def __init__(self, **kwargs):
+        self._info = kwargs
+        self.__dict__.update(kwargs)
+
+    def to_dict(self):
+        return self._info
+
+
+class FakeManager(object):
+
+    def __init__(self, resources):
+        self.resources = resources
+        self._index = {resource.id: position for position, resource in enumerate(resources)}
+
+    def list(self, detailed=True, search_opts=None, marker=None, limit=None, **kwargs):
+        start = self._index[marker] + 1 if marker is not None else 0
+        end = start + limit if limit else len(self.resources)
+        return self.resources[start:end]
+
+    def findall(self, **kwargs):
+        return [resource for resource in self.resources
+                if all(getattr(resource, key) == value for key, value in kwargs.items())]
+
+    def get(self, resource_id):
+        return self.resources[self._index[resource_id]]
+
+
+def get_id():
+    return uuid.uuid4().hex
+
+
+class FakeTenant(object):
+    """ Synthetic tenant of configurable size.
+
+        Each instance is connected to one of subnets by port, floating IPs
+        are associated with ports of the first instances.
+    """
+
+    def __init__(self, tenant_id, flavors=5000, images=2000, security_groups=500, rules=20, volumes=10000,
+                 snapshots=1000, instances=1000, networks=50, floating_ips=500):
+        self.tenant_id = tenant_id
+        self.flavors = [
+            FakeResource(id=get_id(), name='flavor-%s' % i, ram=1024, vcpus=1, disk=10, is_public=True)
+            for i in range(flavors)]
+        self.images = [
+            FakeResource(id=get_id(), name='image-%s' % i, min_ram=0, min_disk=1, is_public=True, deleted=False)
+            for i in range(images)]
+        self.security_groups = [
+            FakeResource(id=get_id(), name='group-%s' % i, description='', rules=[
+                {'id': get_id(), 'from_port': port, 'to_port': port, 'ip_protocol': 'tcp',
+                 'ip_range': {'cidr': '0.0.0.0/0'}} for port in range(rules)])
+            for i in range(security_groups)]
+        self.volumes = [
+            FakeResource(id=get_id(), name='volume-%s' % i, description='', size=1, metadata={},
+                         volume_type='', bootable='false', status='available', attachments=[],
+                         updated_at='2017-01-01T00:00:00.000000')
+            for i in range(volumes)]
+        self.snapshots = [
+            FakeResource(id=get_id(), name='snapshot-%s' % i, description='', size=1, metadata={},
+                         status='available', updated_at='2017-01-01T00:00:00.000000')
+            for i in range(snapshots)]
+        self.instances = [
+            FakeResource(id=get_id(), name='instance-%s' % i, key_name='', status='ACTIVE',
+                         created='2017-01-01T00:00:00Z', flavor={'id': self.flavors[i % flavors].id},
+                         **{'OS-SRV-USG:launched_at': '2017-01-01T00:00:00.000000'})
+            for i in range(instances)]
+        self.networks = [
+            {'id': get_id(), 'name': 'network-%s' % i, 'description': ''}
+            for i in range(networks)]
+        self.subnets = [
+            {'id': get_id(), 'name': 'subnet-%s' % i, 'description': '', 'network_id': network['id'],
+             'allocation_pools': [], 'cidr': '192.168.%s.0/24' % (i % 255), 'ip_version': 4,
+             'gateway_ip': '192.168.%s.1' % (i % 255), 'enable_dhcp': True}
+            for i, network in enumerate(self.networks)]
+        self.floating_ips = [
+            {'id': get_id(), 'floating_ip_address': '10.0.%s.%s' % (i // 255, i % 255), 'status': 'DOWN',
+             'floating_network_id': get_id(), 'port_id': None}
+            for i in range(floating_ips)]
+        self.ports = [
+            {'id': get_id(), 'device_id': instance.id,
+             'mac_address': 'fa:16:3e:%02x:%02x:%02x' % (i >> 16 & 255, i >> 8 & 255, i & 255),
+             'fixed_ips': [{'subnet_id': self.subnets[i % len(self.subnets)]['id'],
+                            'ip_address': '192.168.%s.%s' % (i % len(self.subnets) % 255,
+                                                             i // len(self.subnets) % 250 + 2)}],
+             'security_groups': [group.id for group in self.security_groups[:1]]}
+            for i, instance in enumerate(self.instances if self.subnets else [])]
+        for floating_ip, port in zip(self.floating_ips, self.ports):
+            floating_ip.update(port_id=port['id'], status='ACTIVE')
+
+    def get_clients(self):
+        return {
+            'nova': FakeNovaClient(self),
+            'cinder': FakeCinderClient(self),
+            'neutron': FakeNeutronClient(self),
+            'glance': FakeGlanceClient(self),
+        }
+
+
+class FakeNovaClient(object):
+
+    def __init__(self, tenant):
+        self.flavors = FakeManager(tenant.flavors)
+        self.security_groups = FakeManager(tenant.security_groups)
+        self.servers = FakeManager(tenant.instances)
+        self.servers.list_security_group = lambda server_id: tenant.security_groups[:1]
+        self.quotas = FakeManager([])
+        self.quotas.get = lambda tenant_id: FakeResource(ram=-1, cores=-1, instances=-1)
+        self.limits = FakeManager([])
+        self.limits.get = lambda tenant_id=None: FakeResource(absolute=[
+            FakeResource(name='totalRAMUsed', value=len(tenant.instances) * 1024),
+            FakeResource(name='totalCoresUsed', value=len(tenant.instances)),
+            FakeResource(name='totalInstancesUsed', value=len(tenant.instances)),
+        ])
+
+
+class FakeCinderClient(object):
+
+    def __init__(self, tenant):
+        self.volumes = FakeManager(tenant.volumes)
+        self.volume_snapshots = FakeManager(tenant.snapshots)
+        self.quotas = FakeManager([])
+        self.quotas.get = lambda tenant_id, usage=False: FakeResource(
+            gigabytes={'in_use': len(tenant.volumes)} if usage else -1,
+            volumes={'in_use': len(tenant.volumes)} if usage else -1,
+            snapshots={'in_use': len(tenant.snapshots)} if usage else -1,
+        )
+
+
+class FakeNeutronClient(object):
+
+    def __init__(self, tenant):
+        self.tenant = tenant
+
+    def _list(self, collection, items, retrieve_all=True, limit=None, **params):
+        if retrieve_all:
+            return {collection: items}
+        limit = limit or len(items) or 1
+        return iter([{collection: items[start:start + limit]} for start in range(0, len(items), limit)])
+
+    def list_networks(self, retrieve_all=True, **params):
+        return self._list('networks', self.tenant.networks, retrieve_all, **params)
+
+    def list_subnets(self, retrieve_all=True, **params):
+        return self._list('subnets', self.tenant.subnets, retrieve_all, **params)
+
+    def list_floatingips(self, retrieve_all=True, limit=None, **params):
+        floating_ips = self.tenant.floating_ips
+        if 'port_id' in params:
+            floating_ips = [ip for ip in floating_ips if ip['port_id'] in params['port_id']]
+        return self._list('floatingips', floating_ips, retrieve_all, limit)
+
+    def list_ports(self, retrieve_all=True, limit=None, **params):
+        ports = self.tenant.ports
+        if 'device_id' in params:
+            ports = [port for port in ports if port['device_id'] == params['device_id']]
+        return self._list('ports', ports, retrieve_all, limit)
+
+    def show_quota(self, tenant_id):
+        return {'quota': {name: -1 for name in (
+            'security_group', 'security_group_rule', 'floatingip', 'network', 'subnet')}}
+
+    def get(self, path):
+        return {'quota': {
+            'security_group': {'used': len(self.tenant.security_groups)},
+            'security_group_rule': {'used': sum(len(group.rules) for group in self.tenant.security_groups)},
+            'floatingip': {'used': len(self.tenant.floating_ips)},
+            'network': {'used': len(self.tenant.networks)},
+            'subnet': {'used': len(self.tenant.subnets)},
+        }}
+
+
+class FakeGlanceClient(object):
+
+    def __init__(self, tenant):
+        self.images = FakeManager(tenant.images)
+        self.images.list = lambda page_size=None, **kwargs: iter(tenant.images)
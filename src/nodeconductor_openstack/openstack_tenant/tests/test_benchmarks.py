@@ -0,0 +1,94 @@
+""" Benchmarks of tenant synchronization against synthetic large tenants.
+
+    Benchmarks are skipped by default, run them with:
+        OPENSTACK_BENCHMARK=1 nodeconductor test nodeconductor_openstack.openstack_tenant.tests.test_benchmarks
+
+    Tenant size could be configured with environment variables, for example OPENSTACK_BENCHMARK_VOLUMES=20000.
+"""
+from __future__ import print_function
+
+import os
+import resource
+import time
+import unittest
+
+import mock
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from nodeconductor.core import utils as core_utils
+
+from .. import models, tasks
+from ..backend import OpenStackTenantBackend
+from . import factories, fake_clients
+
+
+TENANT_SIZE = {
+    'flavors': 5000,
+    'images': 2000,
+    'security_groups': 500,
+    'rules': 20,
+    'volumes': 10000,
+    'snapshots': 1000,
+    'instances': 1000,
+    'networks': 50,
+    'floating_ips': 500,
+}
+
+
+def get_tenant_size():
+    return {name: int(os.environ.get('OPENSTACK_BENCHMARK_%s' % name.upper(), default))
+            for name, default in TENANT_SIZE.items()}
+
+
+@unittest.skipUnless(os.environ.get('OPENSTACK_BENCHMARK'), 'Benchmarks are enabled by OPENSTACK_BENCHMARK variable.')
+class TenantSyncBenchmark(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.spl = factories.OpenStackTenantServiceProjectLinkFactory()
+        self.service_settings = self.spl.service.settings
+        self.fake_tenant = fake_clients.FakeTenant(self.service_settings.options['tenant_id'], **get_tenant_size())
+        clients = self.fake_tenant.get_clients()
+
+        patcher = mock.patch.object(OpenStackTenantBackend, 'get_client',
+                                    side_effect=lambda name=None, admin=False: clients.get(name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def measure(self, name, func):
+        with CaptureQueriesContext(connection) as context:
+            start = time.time()
+            func()
+            duration = time.time() - start
+        peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print('\n%s: wall time %.2f s, %s SQL queries, peak memory %s KB' % (
+            name, duration, len(context.captured_queries), peak_memory))
+
+    def create_resources(self):
+        models.Volume.objects.bulk_create([
+            models.Volume(service_project_link=self.spl, name=volume.name, size=1024, backend_id=volume.id,
+                          state=models.Volume.States.OK)
+            for volume in self.fake_tenant.volumes
+        ])
+        models.Instance.objects.bulk_create([
+            models.Instance(service_project_link=self.spl, name=instance.name, backend_id=instance.id,
+                            state=models.Instance.States.OK)
+            for instance in self.fake_tenant.instances
+        ])
+
+    def test_sync(self):
+        backend = self.service_settings.get_backend()
+        self.measure('Initial sync', backend.sync)
+        self.measure('Repeated sync', backend.sync)
+
+    def test_pull_service_settings_resources(self):
+        self.service_settings.get_backend().sync()
+        self.create_resources()
+        serialized_settings = core_utils.serialize_instance(self.service_settings)
+
+        self.measure('Pull resources', lambda: tasks.PullServiceSettingsResources().run(serialized_settings))
+        self.measure('Repeated pull resources',
+                     lambda: tasks.PullServiceSettingsResources().run(serialized_settings))
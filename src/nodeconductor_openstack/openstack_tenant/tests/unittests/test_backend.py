@@ -0,0 +1,297 @@
+import mock
+
+from cinderclient import exceptions as cinder_exceptions
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from nodeconductor_openstack.openstack_base.catalog import public_catalog
+
+from ... import models
+from ...backend import OpenStackTenantBackend
+from ...tests import factories, fake_clients
+
+
+class PullPropertiesTest(TestCase):
+
+    def setUp(self):
+        # Public catalog snapshot is shared by all settings with the same backend URL.
+        cache.clear()
+        self.settings = factories.OpenStackTenantServiceSettingsFactory()
+        self.backend = OpenStackTenantBackend(self.settings)
+        self.nova = mock.Mock()
+        self.neutron = mock.Mock()
+        patcher = mock.patch.object(OpenStackTenantBackend, 'get_client',
+                                    side_effect=lambda name=None, admin=False: getattr(self, name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def mock_flavor(self, backend_id, name, vcpus=2, ram=2048, disk=10):
+        flavor = mock.Mock(id=backend_id, vcpus=vcpus, ram=ram, disk=disk)
+        flavor.name = name
+        return flavor
+
+    def test_flavors_are_created_updated_and_deleted(self):
+        changed = factories.FlavorFactory(settings=self.settings, backend_id='changed', cores=1)
+        factories.FlavorFactory(settings=self.settings, backend_id='stale')
+        self.nova.flavors.findall.return_value = [
+            self.mock_flavor('new', 'new flavor'),
+            self.mock_flavor('changed', changed.name, vcpus=4),
+        ]
+
+        self.backend._pull_flavors()
+
+        flavors = models.Flavor.objects.filter(settings=self.settings)
+        self.assertEqual(set(flavors.values_list('backend_id', flat=True)), {'new', 'changed'})
+        self.assertEqual(flavors.get(backend_id='changed').cores, 4)
+        self.assertEqual(flavors.get(backend_id='new').disk, 10 * 1024)
+
+    def test_identical_flavors_are_not_updated(self):
+        flavor = factories.FlavorFactory(settings=self.settings, cores=2, ram=2048, disk=10 * 1024)
+        self.nova.flavors.findall.return_value = [self.mock_flavor(flavor.backend_id, flavor.name)]
+
+        with CaptureQueriesContext(connection) as context:
+            self.backend._pull_flavors()
+
+        self.assertFalse([query for query in context.captured_queries
+                          if query['sql'].startswith(('UPDATE', 'INSERT', 'DELETE'))])
+
+    def test_booked_floating_ips_are_not_deleted(self):
+        booked_ip = factories.FloatingIPFactory(settings=self.settings, is_booked=True)
+        factories.FloatingIPFactory(settings=self.settings)
+        self.neutron.list_floatingips.return_value = {'floatingips': [{
+            'id': 'new', 'floating_ip_address': '10.0.0.1', 'status': 'DOWN', 'floating_network_id': 'net',
+        }]}
+
+        self.backend.pull_floating_ips()
+
+        floating_ips = models.FloatingIP.objects.filter(settings=self.settings)
+        self.assertEqual(set(floating_ips.values_list('backend_id', flat=True)), {booked_ip.backend_id, 'new'})
+
+    def test_security_group_rules_are_reconciled(self):
+        security_group = factories.SecurityGroupFactory(settings=self.settings, backend_id='group')
+        security_group.rules.create(backend_id='stale', protocol='tcp', from_port=1, to_port=1, cidr='0.0.0.0/0')
+        security_group.rules.create(backend_id='changed', protocol='tcp', from_port=2, to_port=2, cidr='0.0.0.0/0')
+        backend_group = mock.Mock(id='group', description='', rules=[
+            {'id': 'changed', 'from_port': 2, 'to_port': 3, 'ip_protocol': 'tcp', 'ip_range': {}},
+        ])
+        backend_group.name = 'group'
+        new_backend_group = mock.Mock(id='new', description='', rules=[
+            {'id': 'new', 'from_port': 22, 'to_port': 22, 'ip_protocol': None, 'ip_range': {'cidr': '10.0.0.0/8'}},
+        ])
+        new_backend_group.name = 'new group'
+        self.nova.security_groups.list.return_value = [backend_group, new_backend_group]
+
+        self.backend._pull_security_groups()
+
+        rules = models.SecurityGroupRule.objects.filter(security_group__settings=self.settings)
+        self.assertEqual(set(rules.values_list('backend_id', 'security_group__backend_id', 'to_port')),
+                         {('changed', 'group', 3), ('new', 'new', 22)})
+
+    def test_security_group_index_is_reset_after_reconciliation(self):
+        factories.SecurityGroupFactory(settings=self.settings, backend_id='stale')
+        self.backend.get_property_index(models.SecurityGroup)
+        backend_group = mock.Mock(id='new', description='', rules=[])
+        backend_group.name = 'new group'
+        self.nova.security_groups.list.return_value = [backend_group]
+
+        self.backend._pull_security_groups()
+
+        self.assertEqual(list(self.backend.get_property_index(models.SecurityGroup).keys()), ['new'])
+
+    def test_subnets_are_resolved_from_index_once_per_backend(self):
+        subnet = factories.SubNetFactory(settings=self.settings, backend_id='subnet')
+        instances = factories.InstanceFactory.create_batch(2, service_project_link__service__settings=self.settings)
+        self.neutron.list_ports.side_effect = lambda device_id: {'ports': [{
+            'id': 'port-%s' % device_id, 'mac_address': 'fa:16:3e:00:00:01',
+            'fixed_ips': [{'subnet_id': 'subnet', 'ip_address': '192.168.0.2'}],
+        }]}
+
+        with CaptureQueriesContext(connection) as context:
+            for instance in instances:
+                self.backend.pull_instance_internal_ips(instance)
+
+        subnet_queries = [query for query in context.captured_queries
+                          if query['sql'].startswith('SELECT') and 'FROM "openstack_tenant_subnet"' in query['sql']]
+        self.assertEqual(len(subnet_queries), 1)
+        self.assertEqual(models.InternalIP.objects.filter(subnet=subnet).count(), 2)
+
+
+class SyncTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.settings = factories.OpenStackTenantServiceSettingsFactory()
+        self.fake_tenant = fake_clients.FakeTenant(
+            self.settings.options['tenant_id'], flavors=3, images=3, security_groups=2, rules=2, volumes=0,
+            snapshots=0, instances=0, networks=2, floating_ips=2)
+        clients = self.fake_tenant.get_clients()
+        patcher = mock.patch.object(OpenStackTenantBackend, 'get_client',
+                                    side_effect=lambda name=None, admin=False: clients.get(name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_properties_fetched_concurrently_are_stored_in_dependency_order(self):
+        OpenStackTenantBackend(self.settings).sync()
+
+        for model, count in ((models.Flavor, 3), (models.Image, 3), (models.SecurityGroup, 2),
+                             (models.FloatingIP, 2), (models.Network, 2)):
+            self.assertEqual(model.objects.filter(settings=self.settings).count(), count)
+        subnets = models.SubNet.objects.filter(settings=self.settings)
+        self.assertEqual(set(subnets.values_list('backend_id', 'network__backend_id')),
+                         {(subnet['id'], subnet['network_id']) for subnet in self.fake_tenant.subnets})
+
+    def test_unchanged_properties_are_not_applied_again(self):
+        OpenStackTenantBackend(self.settings).sync()
+        self.fake_tenant.images[0].name = 'renamed'
+        public_catalog.invalidate(self.settings.backend_url, 'images')
+
+        with mock.patch.object(OpenStackTenantBackend, '_apply_flavors') as apply_flavors:
+            OpenStackTenantBackend(self.settings).sync()
+
+        self.assertFalse(apply_flavors.called)
+        self.assertTrue(models.Image.objects.filter(settings=self.settings, name='renamed').exists())
+
+    def test_public_catalog_is_shared_by_settings_of_the_same_cloud(self):
+        other_settings = factories.OpenStackTenantServiceSettingsFactory(backend_url=self.settings.backend_url)
+        OpenStackTenantBackend(self.settings).sync()
+
+        with mock.patch.object(OpenStackTenantBackend, '_fetch_public_flavors') as fetch_flavors:
+            OpenStackTenantBackend(other_settings).sync()
+
+        self.assertFalse(fetch_flavors.called)
+        self.assertEqual(models.Flavor.objects.filter(settings=other_settings).count(), 3)
+
+
+class PullInstancesNetworkPropertiesTest(TestCase):
+
+    def setUp(self):
+        self.instance = factories.InstanceFactory(backend_id='instance')
+        self.settings = self.instance.service_project_link.service.settings
+        self.backend = OpenStackTenantBackend(self.settings)
+        self.subnet = factories.SubNetFactory(settings=self.settings, backend_id='subnet')
+        self.security_group = factories.SecurityGroupFactory(settings=self.settings, backend_id='group')
+        self.stale_group = factories.SecurityGroupFactory(settings=self.settings, backend_id='stale-group')
+        self.instance.security_groups.add(self.stale_group)
+        self.instance.internal_ips_set.create(subnet=self.subnet, backend_id='stale-port')
+        self.network_resources = {
+            'ports': {'instance': [{
+                'id': 'port', 'device_id': 'instance', 'mac_address': 'fa:16:3e:00:00:01',
+                'fixed_ips': [{'subnet_id': 'subnet', 'ip_address': '192.168.0.2'}], 'security_groups': ['group'],
+            }]},
+            'floating_ips': {'port': {
+                'id': 'floating-ip', 'port_id': 'port', 'floating_ip_address': '10.0.0.1', 'status': 'ACTIVE',
+                'floating_network_id': 'external',
+            }},
+        }
+
+    def test_instance_network_properties_are_reconciled(self):
+        self.backend.pull_instances_network_properties([self.instance], self.network_resources)
+
+        internal_ip = self.instance.internal_ips_set.get()
+        self.assertEqual((internal_ip.backend_id, internal_ip.ip4_address), ('port', '192.168.0.2'))
+        floating_ip = models.FloatingIP.objects.get(settings=self.settings, backend_id='floating-ip')
+        self.assertEqual(floating_ip.internal_ip, internal_ip)
+        self.assertEqual(list(self.instance.security_groups.all()), [self.security_group])
+
+    def test_internal_ip_is_kept_if_subnet_is_not_pulled_yet(self):
+        self.backend.pull_instances_network_properties([self.instance], self.network_resources)
+        self.network_resources['ports']['instance'][0]['fixed_ips'][0]['subnet_id'] = 'new-subnet'
+
+        self.backend.pull_instances_network_properties([self.instance], self.network_resources)
+
+        internal_ip = self.instance.internal_ips_set.get()
+        self.assertEqual(internal_ip.backend_id, 'port')
+        floating_ip = models.FloatingIP.objects.get(settings=self.settings, backend_id='floating-ip')
+        self.assertEqual(floating_ip.internal_ip, internal_ip)
+
+    def test_floating_ip_is_disconnected_if_port_is_removed(self):
+        self.backend.pull_instances_network_properties([self.instance], self.network_resources)
+        self.network_resources['floating_ips'] = {}
+
+        self.backend.pull_instances_network_properties([self.instance], self.network_resources)
+
+        floating_ip = models.FloatingIP.objects.get(settings=self.settings, backend_id='floating-ip')
+        self.assertIsNone(floating_ip.internal_ip)
+
+
+class CreateInstanceTest(TestCase):
+
+    def setUp(self):
+        self.instance = factories.InstanceFactory()
+        self.settings = self.instance.service_project_link.service.settings
+        self.settings.options['availability_zone'] = ''
+        self.settings.save()
+        factories.VolumeFactory(service_project_link=self.instance.service_project_link, instance=self.instance,
+                                bootable=True)
+        factories.VolumeFactory(service_project_link=self.instance.service_project_link, instance=self.instance,
+                                bootable=False)
+        self.subnet = factories.SubNetFactory(settings=self.settings)
+        self.internal_ip = self.instance.internal_ips_set.create(subnet=self.subnet)
+        self.backend = OpenStackTenantBackend(self.settings)
+        self.nova = mock.Mock()
+        self.neutron = mock.Mock()
+        patcher = mock.patch.object(OpenStackTenantBackend, 'get_client',
+                                    side_effect=lambda name=None, admin=False: getattr(self, name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_instance_creation_is_submitted_without_waiting_for_server(self):
+        self.nova.servers.create.return_value = mock.Mock(id='server', status='BUILD')
+
+        self.backend.create_instance(self.instance, backend_flavor_id='flavor')
+
+        self.instance.refresh_from_db()
+        self.assertEqual((self.instance.backend_id, self.instance.runtime_state), ('server', 'BUILD'))
+        self.assertFalse(self.nova.servers.get.called)
+
+    def test_internal_ips_and_security_groups_are_pulled_after_boot(self):
+        self.instance.backend_id = 'server'
+        self.instance.save()
+        security_group = factories.SecurityGroupFactory(settings=self.settings)
+        backend_security_group = mock.Mock()
+        backend_security_group.name = security_group.name
+        self.nova.servers.list_security_group.return_value = [backend_security_group]
+        self.neutron.list_ports.return_value = {'ports': [{
+            'id': 'port', 'mac_address': 'fa:16:3e:00:00:01', 'fixed_ips': [{'ip_address': '192.168.0.2'}]}]}
+
+        self.backend.pull_created_instance(self.instance)
+
+        self.internal_ip.refresh_from_db()
+        self.assertEqual((self.internal_ip.backend_id, self.internal_ip.ip4_address), ('port', '192.168.0.2'))
+        self.assertEqual(list(self.instance.security_groups.all()), [security_group])
+
+
+class ListRuntimeStatesTest(TestCase):
+
+    def setUp(self):
+        self.backend = OpenStackTenantBackend(factories.OpenStackTenantServiceSettingsFactory())
+        self.cinder = mock.Mock()
+        patcher = mock.patch.object(OpenStackTenantBackend, 'get_client',
+                                    side_effect=lambda name=None, admin=False: getattr(self, name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_few_resources_are_requested_one_by_one_and_missing_ones_are_mapped_to_none(self):
+        def get_volume(backend_id):
+            if backend_id == 'missing':
+                raise cinder_exceptions.NotFound(404)
+            return mock.Mock(id=backend_id, status='available')
+        self.cinder.volumes.get.side_effect = get_volume
+
+        runtime_states = self.backend.list_runtime_states(models.Volume, ['volume', 'missing'])
+
+        self.assertEqual(runtime_states, {'volume': 'available', 'missing': None})
+        self.assertFalse(self.cinder.volumes.list.called)
+
+    def test_many_resources_are_listed_filtered_by_states(self):
+        self.cinder.volumes.list.side_effect = lambda search_opts, **kwargs: [
+            mock.Mock(id='volume_1', status=search_opts['status'])] if search_opts['status'] == 'error' else []
+
+        runtime_states = self.backend.list_runtime_states(
+            models.Volume, ['volume_0', 'volume_1'], states={'available', 'error'}, max_get_requests=1)
+
+        self.assertEqual(runtime_states, {'volume_1': 'error'})
+        self.assertEqual(self.cinder.volumes.list.call_count, 2)
+        self.assertFalse(self.cinder.volumes.get.called)
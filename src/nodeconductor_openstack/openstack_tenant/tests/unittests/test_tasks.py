@@ -2,12 +2,16 @@ import mock
 
 from datetime import timedelta
 
+from celery.exceptions import Ignore, Retry
 from ddt import ddt, data
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.utils import timezone
 
 from nodeconductor.core import utils as core_utils
 
+from nodeconductor_openstack.openstack_base.utils import bulk_update
+
 from ... import tasks, models
 from ...tests import factories
 
@@ -134,3 +138,261 @@ class SetErredProvisioningResourcesTaskTest(TestCase):
 
         self.assertEqual(ok_vm.state, models.Instance.States.CREATING)
         self.assertEqual(ok_volume.state, models.Volume.States.CREATING)
+
+
+@mock.patch('nodeconductor.structure.models.ServiceSettings.get_backend')
+class PullServiceSettingsResourcesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.instance = factories.InstanceFactory(state=models.Instance.States.OK, backend_id='instance-id')
+        self.service_settings = self.instance.service_project_link.service.settings
+        self.serialized_settings = core_utils.serialize_instance(self.service_settings)
+
+    def mock_backend(self, mocked_get_backend, backend_instances):
+        backend = mocked_get_backend.return_value
+        backend.get_volume_pages.return_value = []
+        backend.get_snapshot_pages.return_value = []
+        backend.get_instance_pages.return_value = [backend_instances]
+        backend.INSTANCE_UPDATE_FIELDS = ('runtime_state',)
+        return backend
+
+    def test_full_pull_is_executed_if_there_is_no_high_water_mark(self, mocked_get_backend):
+        backend = self.mock_backend(mocked_get_backend, [])
+
+        tasks.PullServiceSettingsResources().run(self.serialized_settings)
+
+        backend.get_instance_pages.assert_called_once_with(None)
+        self.instance.refresh_from_db()
+        self.assertEqual(self.instance.state, models.Instance.States.ERRED)
+
+    def test_only_changed_resources_are_requested_after_full_pull(self, mocked_get_backend):
+        backend = self.mock_backend(mocked_get_backend, [models.Instance(backend_id='instance-id')])
+        tasks.PullServiceSettingsResources().run(self.serialized_settings)
+
+        backend.get_instance_pages.return_value = []
+        tasks.PullServiceSettingsResources().run(self.serialized_settings)
+
+        self.assertIsNotNone(backend.get_instance_pages.call_args[0][0])
+        self.instance.refresh_from_db()
+        self.assertEqual(self.instance.state, models.Instance.States.OK)
+
+    def test_network_properties_of_unchanged_instances_are_pulled_incrementally(self, mocked_get_backend):
+        backend = self.mock_backend(mocked_get_backend, [models.Instance(backend_id='instance-id')])
+        tasks.PullServiceSettingsResources().run(self.serialized_settings)
+
+        backend.get_instance_pages.return_value = []
+        backend.pull_instances_network_properties.reset_mock()
+        tasks.PullServiceSettingsResources().run(self.serialized_settings)
+
+        instances, network_resources = backend.pull_instances_network_properties.call_args[0]
+        self.assertEqual(instances, [self.instance])
+        self.assertEqual(network_resources, backend.get_instances_network_resources.return_value)
+
+    def test_instance_deleted_since_previous_pull_becomes_erred(self, mocked_get_backend):
+        backend = self.mock_backend(mocked_get_backend, [models.Instance(backend_id='instance-id')])
+        tasks.PullServiceSettingsResources().run(self.serialized_settings)
+
+        backend.get_instance_pages.return_value = [[models.Instance(
+            backend_id='instance-id', runtime_state=models.Instance.RuntimeStates.DELETED)]]
+        tasks.PullServiceSettingsResources().run(self.serialized_settings)
+
+        self.instance.refresh_from_db()
+        self.assertEqual(self.instance.state, models.Instance.States.ERRED)
+
+    def test_changed_fields_are_written_in_bulk_and_erred_resource_is_recovered(self, mocked_get_backend):
+        self.instance.set_erred()
+        self.instance.error_message = 'Does not exist at backend.'
+        self.instance.save()
+        unchanged_instance = factories.InstanceFactory(
+            state=models.Instance.States.OK, backend_id='unchanged-id', runtime_state='ACTIVE',
+            service_project_link=self.instance.service_project_link)
+        self.mock_backend(mocked_get_backend, [
+            models.Instance(backend_id='instance-id', runtime_state='SHUTOFF'),
+            models.Instance(backend_id='unchanged-id', runtime_state='ACTIVE'),
+        ])
+
+        with mock.patch('nodeconductor_openstack.openstack_tenant.tasks.bulk_update') as mocked_bulk_update:
+            tasks.PullServiceSettingsResources().run(self.serialized_settings)
+
+        changes = mocked_bulk_update.call_args[0][0]
+        self.assertEqual(len(changes), 1)
+        resource, changed_fields = changes[0]
+        self.assertEqual(resource, self.instance)
+        self.assertEqual(set(changed_fields), {'runtime_state', 'state', 'error_message'})
+        self.assertEqual(resource.state, models.Instance.States.OK)
+        self.assertNotIn(unchanged_instance, [resource for resource, _ in changes])
+
+    @mock.patch('nodeconductor_openstack.openstack_tenant.tasks.pull_tracker')
+    def test_resource_that_is_already_marked_as_missing_is_not_counted_as_change(
+            self, mocked_pull_tracker, mocked_get_backend):
+        self.instance.set_erred()
+        self.instance.runtime_state = ''
+        self.instance.error_message = 'Does not exist at backend.'
+        self.instance.save()
+        self.mock_backend(mocked_get_backend, [])
+
+        tasks.PullServiceSettingsResources().run(self.serialized_settings)
+
+        mocked_pull_tracker.record_pull.assert_called_once_with(self.service_settings.uuid.hex, 0)
+
+
+class BulkUpdateTest(TestCase):
+
+    def test_modified_timestamp_is_updated_for_changed_objects_only(self):
+        changed, unchanged = factories.VolumeFactory.create_batch(2, runtime_state='creating')
+        unchanged_modified = unchanged.modified
+        changed.runtime_state = 'available'
+
+        bulk_update([(changed, ['runtime_state']), (unchanged, [])])
+
+        changed_modified = changed.modified
+        changed.refresh_from_db()
+        unchanged.refresh_from_db()
+        self.assertEqual(changed.runtime_state, 'available')
+        self.assertEqual(changed.modified, changed_modified)
+        self.assertGreater(changed.modified, unchanged_modified)
+        self.assertEqual(unchanged.modified, unchanged_modified)
+
+
+class PollRuntimeStateTaskTest(TestCase):
+
+    def setUp(self):
+        self.volume = factories.VolumeFactory(backend_id='volume_id', runtime_state='creating')
+        self.task = tasks.PollRuntimeStateTask()
+        self.task.request.update(id='task_id', callbacks=[{'task': 'next'}], errbacks=[{'task': 'error'}],
+                                 is_eager=False)
+
+    def test_task_registers_wait_and_suspends_chain(self):
+        with self.assertRaises(Ignore):
+            self.task.execute(self.volume, 'pull_volume_runtime_state', 'available', 'error')
+
+        wait = models.RuntimeStateWait.objects.get()
+        self.assertEqual(wait.resource, self.volume)
+        self.assertEqual(wait.service_settings, self.volume.service_project_link.service.settings)
+        self.assertEqual(wait.callbacks, [{'task': 'next'}])
+        self.assertEqual(wait.errbacks, [{'task': 'error'}])
+
+    def test_resource_is_polled_by_task_if_its_runtime_state_could_not_be_listed(self):
+        backend = mock.Mock(RUNTIME_STATE_MODELS=())
+        self.task.get_backend = mock.Mock(return_value=backend)
+        self.task.retry = mock.Mock(side_effect=Retry())
+
+        with self.assertRaises(Retry):
+            self.task.execute(self.volume, 'pull_volume_runtime_state', 'available', 'error')
+
+        backend.pull_volume_runtime_state.assert_called_once_with(self.volume)
+        self.assertFalse(models.RuntimeStateWait.objects.exists())
+
+
+@mock.patch('nodeconductor_openstack.openstack_tenant.tasks.signature')
+@mock.patch('nodeconductor.structure.models.ServiceSettings.get_backend')
+class PollServiceSettingsRuntimeStatesTest(TestCase):
+
+    def setUp(self):
+        self.volumes = [factories.VolumeFactory(backend_id='volume_%s' % index, runtime_state='creating')
+                        for index in range(3)]
+        self.service_settings = self.volumes[0].service_project_link.service.settings
+        for volume in self.volumes[1:]:
+            volume.service_project_link = self.volumes[0].service_project_link
+            volume.save()
+        for index, volume in enumerate(self.volumes):
+            models.RuntimeStateWait.objects.create(
+                resource=volume, service_settings=self.service_settings, task_id='task_%s' % index,
+                backend_pull_method='pull_volume_runtime_state', success_state='available', erred_state='error',
+                callbacks=[{'task': 'next_%s' % index}], errbacks=[{'task': 'error_%s' % index}],
+                deadline=timezone.now() + timedelta(minutes=10))
+        self.serialized_settings = core_utils.serialize_instance(self.service_settings)
+
+    def test_runtime_states_are_requested_with_one_call_and_chains_are_resumed(self, mocked_get_backend,
+                                                                               mocked_signature):
+        backend = mocked_get_backend.return_value
+        backend.list_runtime_states.return_value = {'volume_0': 'available', 'volume_1': 'creating'}
+
+        tasks.PollServiceSettingsRuntimeStates().run(self.serialized_settings)
+
+        self.assertEqual(backend.list_runtime_states.call_count, 1)
+        self.assertEqual(backend.list_runtime_states.call_args[0][0], models.Volume)
+        mocked_signature.assert_called_once_with({'task': 'next_0'}, app=mock.ANY)
+        self.assertEqual(set(models.RuntimeStateWait.objects.values_list('task_id', flat=True)),
+                         {'task_1', 'task_2'})
+        self.volumes[0].refresh_from_db()
+        self.assertEqual(self.volumes[0].runtime_state, 'available')
+
+    @mock.patch('nodeconductor_openstack.openstack_tenant.tasks.PollServiceSettingsRuntimeStates.app')
+    def test_error_callbacks_are_applied_if_runtime_state_is_erred_or_wait_is_timed_out(
+            self, mocked_app, mocked_get_backend, mocked_signature):
+        mocked_get_backend.return_value.list_runtime_states.return_value = {'volume_0': 'error'}
+        models.RuntimeStateWait.objects.filter(task_id='task_1').update(deadline=timezone.now())
+
+        tasks.PollServiceSettingsRuntimeStates().run(self.serialized_settings)
+
+        mocked_signature.assert_has_calls([
+            mock.call({'task': 'error_0'}, app=mocked_app),
+            mock.call({'task': 'error_1'}, app=mocked_app),
+        ], any_order=True)
+        self.assertEqual(mocked_app.backend.mark_as_failure.call_count, 2)
+        self.assertEqual(list(models.RuntimeStateWait.objects.values_list('task_id', flat=True)), ['task_2'])
+
+    def test_waits_that_are_not_due_are_skipped_and_pending_waits_are_rescheduled(self, mocked_get_backend,
+                                                                                  mocked_signature):
+        backend = mocked_get_backend.return_value
+        backend.list_runtime_states.return_value = {}
+        models.RuntimeStateWait.objects.filter(task_id='task_2').update(
+            next_check_at=timezone.now() + timedelta(minutes=1))
+
+        tasks.PollServiceSettingsRuntimeStates().run(self.serialized_settings)
+
+        backend_ids = backend.list_runtime_states.call_args[0][1]
+        self.assertEqual(set(backend_ids), {'volume_0', 'volume_1'})
+        wait = models.RuntimeStateWait.objects.get(task_id='task_0')
+        self.assertEqual(wait.attempts, 1)
+        self.assertGreater(wait.next_check_at, timezone.now())
+
+    @override_settings(NODECONDUCTOR_OPENSTACK={'IO_ENGINE': {'ENABLED': True}})
+    @mock.patch('nodeconductor_openstack.openstack_tenant.tasks.PollServiceSettingsRuntimeStates.delay')
+    def test_waits_of_all_service_settings_are_checked_by_one_task_if_io_engine_is_enabled(
+            self, mocked_delay, mocked_get_backend, mocked_signature):
+        backend = mocked_get_backend.return_value
+        backend.list_runtime_states.return_value = {'volume_0': 'available'}
+
+        tasks.PollRuntimeStates().run()
+
+        self.assertEqual(mocked_delay.call_count, 0)
+        self.assertEqual(backend.list_runtime_states.call_count, 1)
+        mocked_signature.assert_called_once_with({'task': 'next_0'}, app=mock.ANY)
+
+    def test_chain_of_barrier_is_resumed_when_all_its_waits_are_over(self, mocked_get_backend, mocked_signature):
+        models.RuntimeStateWait.objects.filter(task_id='task_1').update(task_id='task_0')
+        backend = mocked_get_backend.return_value
+        backend.list_runtime_states.return_value = {'volume_0': 'available'}
+
+        tasks.PollServiceSettingsRuntimeStates().run(self.serialized_settings)
+        self.assertEqual(mocked_signature.call_count, 0)
+
+        models.RuntimeStateWait.objects.update(next_check_at=None)
+        backend.list_runtime_states.return_value = {'volume_1': 'available'}
+        tasks.PollServiceSettingsRuntimeStates().run(self.serialized_settings)
+
+        mocked_signature.assert_called_once_with({'task': 'next_0'}, app=mock.ANY)
+
+    @mock.patch('nodeconductor_openstack.openstack_tenant.tasks.PollServiceSettingsRuntimeStates.app')
+    def test_other_waits_of_barrier_are_cancelled_if_one_of_them_fails(
+            self, mocked_app, mocked_get_backend, mocked_signature):
+        models.RuntimeStateWait.objects.filter(task_id='task_1').update(task_id='task_0')
+        mocked_get_backend.return_value.list_runtime_states.return_value = {'volume_0': 'error'}
+
+        tasks.PollServiceSettingsRuntimeStates().run(self.serialized_settings)
+
+        mocked_signature.assert_called_once_with({'task': 'error_0'}, app=mocked_app)
+        self.assertEqual(list(models.RuntimeStateWait.objects.values_list('task_id', flat=True)), ['task_2'])
+
+    @mock.patch('nodeconductor_openstack.openstack_tenant.tasks.PollServiceSettingsRuntimeStates.app')
+    def test_wait_fails_at_once_if_resource_does_not_exist_at_backend(
+            self, mocked_app, mocked_get_backend, mocked_signature):
+        mocked_get_backend.return_value.list_runtime_states.return_value = {'volume_0': None}
+
+        tasks.PollServiceSettingsRuntimeStates().run(self.serialized_settings)
+
+        mocked_signature.assert_called_once_with({'task': 'error_0'}, app=mocked_app)
+        self.assertEqual(set(models.RuntimeStateWait.objects.values_list('task_id', flat=True)),
+                         {'task_1', 'task_2'})